@@ -0,0 +1,313 @@
+import asyncio
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Deque, FrozenSet, List, Optional, Sequence, Tuple
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.response import create_response
+
+BACKEND_MEMORY = "memory"
+BACKEND_SQLITE = "sqlite"
+BACKEND_REDIS = "redis"
+
+class TokenBucketRateLimiter:
+    """
+    In-process token buckets, one per client key
+
+    The number of tracked clients is bounded; the least recently seen
+    client is dropped first, which at worst grants it a fresh bucket.
+    """
+    def __init__(self, rate: float, burst: int, max_clients: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def acquire(self, key: str) -> Tuple[bool, float]:
+        """
+        Take one token for `key`
+
+        Returns:
+            Tuple of (allowed, seconds until a token is available)
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+        return allowed, 0.0 if allowed else (1 - tokens) / self.rate
+
+class SQLiteRateLimiter:
+    """
+    Token buckets shared by every worker on a host through a SQLite file
+    """
+    def __init__(self, rate: float, burst: int, path: str):
+        self.rate = rate
+        self.burst = burst
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def _acquire(self, key: str) -> Tuple[bool, float]:
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens = float(self.burst) if row is None else min(self.burst, row[0] + max(now - row[1], 0) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            connection.execute(
+                "INSERT INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now)
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        return allowed, 0.0 if allowed else (1 - tokens) / self.rate
+
+    async def acquire(self, key: str) -> Tuple[bool, float]:
+        return await run_in_threadpool(self._acquire, key)
+
+class RedisRateLimiter:
+    """
+    Token buckets shared across hosts through Redis or a Redis-compatible server
+    """
+    SCRIPT = """
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local tokens = tonumber(bucket[1]) or burst
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(now - updated, 0) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, rate: float, burst: int, url: str):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("ADMISSION_BACKEND=redis requires the redis package")
+
+        self.rate = rate
+        self.burst = burst
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    async def acquire(self, key: str) -> Tuple[bool, float]:
+        allowed, tokens = await self._script(
+            keys=[f"rate_limit:{key}"],
+            args=[self.rate, self.burst, time.time()]
+        )
+        if allowed:
+            return True, 0.0
+        return False, (1 - float(tokens)) / self.rate
+
+class ConcurrencyLimiter:
+    """
+    Caps requests in flight, with a short bounded wait queue
+
+    Released slots are handed directly to the oldest waiter so queued
+    requests are served in order.
+    """
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.queue_size or self.queue_timeout <= 0:
+            return False
+
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as the timeout fired
+                return True
+            waiter.cancel()
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+def _hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()[:32]
+
+@lru_cache(maxsize=8)
+def _known_key_hashes(api_keys: Tuple[str, ...]) -> FrozenSet[str]:
+    return frozenset(_hash_api_key(api_key) for api_key in api_keys)
+
+def get_client_key(scope: Scope) -> str:
+    """
+    Identify the client by API key, falling back to its IP address
+
+    Only keys listed in CLIENT_API_KEYS count: an arbitrary X-API-Key is
+    ignored, so sending a fresh key can't buy a fresh rate limit bucket or
+    usage budget.
+    """
+    api_key = Headers(scope=scope).get("x-api-key")
+    if api_key:
+        digest = _hash_api_key(api_key)
+        if digest in _known_key_hashes(tuple(settings.CLIENT_API_KEYS)):
+            return "key:" + digest
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+def create_rate_limiter():
+    """
+    Create the configured rate limiter backend, or None when disabled
+    """
+    if settings.RATE_LIMIT_PER_SECOND <= 0:
+        return None
+    rate, burst = settings.RATE_LIMIT_PER_SECOND, max(settings.RATE_LIMIT_BURST, 1)
+    if settings.ADMISSION_BACKEND == BACKEND_SQLITE:
+        return SQLiteRateLimiter(rate, burst, settings.ADMISSION_BACKEND_URL or "./admission.db")
+    if settings.ADMISSION_BACKEND == BACKEND_REDIS:
+        return RedisRateLimiter(rate, burst, settings.ADMISSION_BACKEND_URL or "redis://localhost:6379/0")
+    return TokenBucketRateLimiter(rate, burst)
+
+def create_concurrency_limiters() -> Tuple[Optional[ConcurrencyLimiter], List[Tuple[str, ConcurrencyLimiter]]]:
+    """
+    Create the global limiter and per-route-prefix limiters from settings
+    """
+    queue_size = settings.ADMISSION_QUEUE_SIZE
+    queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+    global_limiter = None
+    if settings.MAX_CONCURRENT_REQUESTS > 0:
+        global_limiter = ConcurrencyLimiter("global", settings.MAX_CONCURRENT_REQUESTS, queue_size, queue_timeout)
+
+    route_limiters = [
+        (prefix, ConcurrencyLimiter(prefix, limit, queue_size, queue_timeout))
+        for prefix, limit in sorted(settings.ROUTE_CONCURRENCY_LIMITS.items(), key=lambda item: -len(item[0]))
+        if limit > 0
+    ]
+    return global_limiter, route_limiters
+
+def _rejection(status_code: int, message: str, retry_after: float, scope: Scope) -> JSONResponse:
+    trace_id = scope.get("state", {}).get("trace_id") or str(uuid.uuid4())
+    return JSONResponse(
+        status_code=status_code,
+        content=create_response(data=None, trace_id=trace_id, is_success=False, message=message, error=message),
+        headers={"Retry-After": str(max(int(math.ceil(retry_after)), 1))}
+    )
+
+class AdmissionControlMiddleware:
+    """
+    Per-client rate limiting plus global and per-route concurrency limits
+
+    Over-limit requests fail fast: 429 when the client exceeds its rate,
+    503 when the server is at capacity and the wait queue is full or the
+    short queue wait times out. Both carry Retry-After. Exempt paths (health
+    probes) skip every check.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        rate_limiter=None,
+        global_limiter: Optional[ConcurrencyLimiter] = None,
+        route_limiters: Sequence[Tuple[str, ConcurrencyLimiter]] = (),
+        exempt_paths: Sequence[str] = ()
+    ):
+        self.app = app
+        self.rate_limiter = rate_limiter
+        self.global_limiter = global_limiter
+        self.route_limiters = list(route_limiters)
+        self.exempt_paths = tuple(exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if scope["type"] != "http" or path.startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        if self.rate_limiter is not None:
+            try:
+                allowed, retry_after = await self.rate_limiter.acquire(get_client_key(scope))
+            except Exception as e:
+                # A broken shared backend must not take the API down with it
+                logger.error(f"Rate limiter backend error: {e}")
+                allowed, retry_after = True, 0.0
+            if not allowed:
+                await _rejection(429, "Rate limit exceeded", retry_after, scope)(scope, receive, send)
+                return
+
+        limiters = [self.global_limiter] if self.global_limiter is not None else []
+        route_limiter = next((limiter for prefix, limiter in self.route_limiters if path.startswith(prefix)), None)
+        if route_limiter is not None:
+            limiters.append(route_limiter)
+
+        acquired: List[ConcurrencyLimiter] = []
+        try:
+            for limiter in limiters:
+                if not await limiter.acquire():
+                    logger.warning(f"Shedding {path}: {limiter.name} concurrency limit reached")
+                    await _rejection(503, "Server is over capacity", 1, scope)(scope, receive, send)
+                    return
+                acquired.append(limiter)
+
+            await self.app(scope, receive, send)
+        finally:
+            for limiter in reversed(acquired):
+                limiter.release()
@@ -0,0 +1,102 @@
+import uuid
+from typing import Dict, Optional
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.response import create_response
+
+ERROR_BODY_TOO_LARGE = "Request body too large"
+# Named HTTP_413_CONTENT_TOO_LARGE or HTTP_413_REQUEST_ENTITY_TOO_LARGE depending on the Starlette version
+STATUS_BODY_TOO_LARGE = 413
+
+class RequestBodyTooLarge(HTTPException):
+    """
+    Raised from `receive` once a request body passes its limit
+
+    An HTTPException, so FastAPI turns it into a 413 when raised while a
+    route reads the body; middlewares that read the body themselves let it
+    propagate to BodyLimitMiddleware, which responds instead.
+    """
+    def __init__(self):
+        super().__init__(status_code=STATUS_BODY_TOO_LARGE, detail=ERROR_BODY_TOO_LARGE)
+
+def resolve_body_limit(path: str, route_limits: Dict[str, int], default: int) -> Optional[int]:
+    """
+    Byte limit for a request body: the longest matching route prefix, else `default`; 0 means unlimited
+    """
+    limit = default
+    matches = [prefix for prefix in route_limits if path.startswith(prefix)]
+    if matches:
+        limit = route_limits[max(matches, key=len)]
+    return limit if limit > 0 else None
+
+class BodyLimitMiddleware:
+    """
+    Reject request bodies over a size limit without buffering them
+
+    A declared Content-Length over the limit is refused before anything is
+    read. Otherwise bytes are counted as they stream in and the request is
+    cut off at the first chunk that crosses the limit, so chunked uploads
+    can't get around it.
+    """
+    def __init__(self, app: ASGIApp, default_limit: int = 10 * 1024 * 1024, route_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.default_limit = default_limit
+        self.route_limits = dict(route_limits or {})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = resolve_body_limit(scope.get("path", ""), self.route_limits, self.default_limit)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._send_too_large(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def receive_wrapper() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise RequestBodyTooLarge()
+            return message
+
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except RequestBodyTooLarge:
+            if response_started:
+                raise
+            await self._send_too_large(scope, receive, send)
+
+    async def _send_too_large(self, scope: Scope, receive: Receive, send: Send):
+        trace_id = scope.get("state", {}).get("trace_id") or str(uuid.uuid4())
+        response = JSONResponse(
+            status_code=STATUS_BODY_TOO_LARGE,
+            content=create_response(
+                data=None,
+                trace_id=trace_id,
+                is_success=False,
+                message=ERROR_BODY_TOO_LARGE,
+                error=ERROR_BODY_TOO_LARGE
+            ),
+            # The rest of the body is never read, so the connection can't be reused
+            headers={"connection": "close"}
+        )
+        await response(scope, receive, send)
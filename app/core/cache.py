@@ -0,0 +1,206 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Union
+from urllib.parse import urlencode
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from app.core.config import settings
+from app.core.compression import PrecompressedBody, accepts_encoding, ENCODING_GZIP
+from app.core.logger import logger
+
+# Placeholder serialized in place of meta.traceId so cached bodies never hold a real trace id
+TRACE_ID_PLACEHOLDER = "__cached-trace-id__"
+REQUEST_PARAM = "_cache_request"
+
+class CacheEntry:
+    """
+    A cached, serialized response body
+    """
+    def __init__(self, body: PrecompressedBody, status_code: int, ttl: float, stale_while_revalidate: float):
+        now = time.monotonic()
+        self.body = body
+        self.status_code = status_code
+        self.etag = f'W/"{hashlib.blake2b(body.prefix + body.suffix, digest_size=16).hexdigest()}"'
+        self.expires_at = now + ttl
+        self.stale_until = self.expires_at + stale_while_revalidate
+        self.refreshing = False
+
+class ResponseCache:
+    """
+    Bounded LRU of cache entries keyed by route and normalized query
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() > entry.stale_until:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def make_cache_key(request: Request) -> str:
+    """
+    Build a cache key from the method, path and sorted query parameters
+    """
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return f"{request.method}:{request.url.path}?{query}"
+
+def serialize_body(content: Any) -> PrecompressedBody:
+    """
+    Serialize a response payload the way JSONResponse does, split around meta.traceId
+    """
+    content = jsonable_encoder(content)
+    meta = content.get("meta") if isinstance(content, dict) else None
+    if isinstance(meta, dict) and "traceId" in meta:
+        content = {**content, "meta": {**meta, "traceId": TRACE_ID_PLACEHOLDER}}
+
+    body = json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+    prefix, _, suffix = body.partition(TRACE_ID_PLACEHOLDER.encode("utf-8"))
+    return PrecompressedBody(prefix, suffix)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def build_cached_response(entry: CacheEntry, request: Request, cache_status: str) -> Response:
+    """
+    Render a cache entry for one request, splicing in its trace id
+    """
+    headers = {"ETag": entry.etag, "X-Cache": cache_status}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+
+    trace_id = getattr(request.state, "trace_id", "")
+    value = json.dumps(trace_id)[1:-1].encode("utf-8")
+
+    if (
+        settings.COMPRESSION_ENABLED
+        and entry.body.size >= settings.COMPRESSION_MINIMUM_SIZE
+        and accepts_encoding(request.headers.get("accept-encoding", ""), ENCODING_GZIP)
+    ):
+        headers["Content-Encoding"] = ENCODING_GZIP
+        headers["Vary"] = "Accept-Encoding"
+        content = entry.body.render_gzip(value)
+    else:
+        content = entry.body.render(value)
+
+    return Response(content=content, status_code=entry.status_code, media_type="application/json", headers=headers)
+
+def cached_route(ttl: float, max_entries: int = 256, stale_while_revalidate: float = 0):
+    """
+    Cache a GET endpoint's serialized body per route and normalized query
+
+    Hits reuse the stored (precompressed) body with the current request's
+    trace id spliced into meta.traceId, honour If-None-Match with 304s, and
+    within `stale_while_revalidate` seconds after expiry serve the stale body
+    while one background refresh runs. Endpoints returning a Response object
+    are passed through uncached.
+
+    Args:
+        ttl: Seconds an entry is fresh
+        max_entries: Maximum cached variants for the route
+        stale_while_revalidate: Seconds a stale entry may still be served
+    """
+    def decorator(func: Callable):
+        cache = ResponseCache(max_entries)
+        inflight: Dict[str, asyncio.Future] = {}
+        signature = inspect.signature(func)
+        request_param = next(
+            (name for name, param in signature.parameters.items() if param.annotation is Request),
+            None
+        )
+
+        async def build_entry(key: str, args, kwargs) -> Union[CacheEntry, Response]:
+            result = await func(*args, **kwargs)
+            if isinstance(result, Response):
+                return result
+            entry = CacheEntry(serialize_body(result), 200, ttl, stale_while_revalidate)
+            cache.set(key, entry)
+            return entry
+
+        async def refresh(key: str, entry: CacheEntry, args, kwargs):
+            try:
+                await build_entry(key, args, kwargs)
+            except Exception as e:
+                logger.error(f"Background refresh of {key} failed: {e}")
+            finally:
+                entry.refreshing = False
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = kwargs[request_param] if request_param else kwargs.pop(REQUEST_PARAM)
+            if not settings.RESPONSE_CACHE_ENABLED:
+                return await func(*args, **kwargs)
+
+            key = make_cache_key(request)
+            entry = cache.get(key)
+
+            if entry is not None:
+                if time.monotonic() <= entry.expires_at:
+                    return build_cached_response(entry, request, "HIT")
+                if not entry.refreshing:
+                    entry.refreshing = True
+                    asyncio.ensure_future(refresh(key, entry, args, kwargs))
+                return build_cached_response(entry, request, "STALE")
+
+            # Collapse concurrent misses for the same key into one call
+            if key in inflight:
+                entry = await asyncio.shield(inflight[key])
+            else:
+                future = asyncio.get_event_loop().create_future()
+                inflight[key] = future
+                try:
+                    entry = await build_entry(key, args, kwargs)
+                    future.set_result(entry)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except BaseException as e:
+                    future.set_exception(e)
+                    # Mark the exception retrieved when nobody else is waiting
+                    future.exception()
+                    raise
+                finally:
+                    del inflight[key]
+
+            if isinstance(entry, Response):
+                return entry
+            return build_cached_response(entry, request, "MISS")
+
+        if request_param is None:
+            # FastAPI reads __signature__, so the wrapper receives the Request as well
+            wrapper.__signature__ = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+            ])
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
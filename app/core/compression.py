@@ -0,0 +1,255 @@
+import struct
+import zlib
+from typing import Dict, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+ENCODING_GZIP = "gzip"
+ENCODING_BROTLI = "br"
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml"
+)
+
+def _parse_accept_encoding(accept_encoding: str) -> Dict[str, float]:
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+    return accepted
+
+def accepts_encoding(accept_encoding: str, encoding: str) -> bool:
+    """
+    Check whether an Accept-Encoding header allows a specific encoding
+    """
+    accepted = _parse_accept_encoding(accept_encoding)
+    return accepted.get(encoding, accepted.get("*", 0)) > 0
+
+def select_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best supported encoding from an Accept-Encoding header
+    """
+    accepted = _parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0)
+    # `*` only stands in for encodings the header doesn't name, so q=0 refusals hold
+    if brotli is not None and accepted.get(ENCODING_BROTLI, wildcard) > 0:
+        return ENCODING_BROTLI
+    if accepted.get(ENCODING_GZIP, wildcard) > 0:
+        return ENCODING_GZIP
+    return None
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """
+    Check whether a content type is worth compressing
+    """
+    if not content_type:
+        return False
+    content_type = content_type.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or "+json" in content_type or "+xml" in content_type
+
+class StreamCompressor:
+    """
+    Incremental gzip or brotli compressor
+
+    `compress` flushes after every chunk so each streamed chunk (e.g. an SSE
+    event) reaches the client immediately instead of waiting in the encoder.
+    """
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == ENCODING_BROTLI:
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == ENCODING_BROTLI:
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == ENCODING_BROTLI:
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+class PrecompressedBody:
+    """
+    Gzip body compressed once, with a per-response value spliced in at serve time
+
+    The body is stored as `prefix + value + suffix`. Prefix and suffix are
+    compressed up front as separate byte-aligned deflate segments, so serving
+    a response only compresses the (small) value and computes the CRC; cached
+    responses pay almost nothing for compression while still carrying a
+    per-request value such as the trace id.
+    """
+    GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+
+    def __init__(self, prefix: bytes, suffix: bytes, level: Optional[int] = None):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.level = level if level is not None else settings.COMPRESSION_GZIP_LEVEL
+        self._prefix_crc = zlib.crc32(prefix)
+        self._compressed_prefix = self._deflate(prefix, final=False)
+        self._compressed_suffix = self._deflate(suffix, final=True)
+
+    def _deflate(self, data: bytes, final: bool) -> bytes:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+    @property
+    def size(self) -> int:
+        return len(self.prefix) + len(self.suffix)
+
+    def render(self, value: bytes = b"") -> bytes:
+        """
+        Return the uncompressed body with `value` spliced in
+        """
+        return self.prefix + value + self.suffix
+
+    def render_gzip(self, value: bytes = b"") -> bytes:
+        """
+        Return the gzip-encoded body with `value` spliced in
+        """
+        crc = zlib.crc32(self.suffix, zlib.crc32(value, self._prefix_crc)) & 0xFFFFFFFF
+        length = (len(self.prefix) + len(value) + len(self.suffix)) & 0xFFFFFFFF
+        return b"".join((
+            self.GZIP_HEADER,
+            self._compressed_prefix,
+            self._deflate(value, final=False) if value else b"",
+            self._compressed_suffix,
+            struct.pack("<II", crc, length)
+        ))
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/brotli compression for buffered and streaming responses
+
+    Buffered bodies under the minimum size go out unchanged. Streaming bodies
+    are compressed chunk by chunk without buffering. Responses that already
+    carry a Content-Encoding (e.g. precompressed cache hits) and partial
+    (206 / Content-Range) responses pass through. A strong ETag is weakened
+    on compressed responses.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await _CompressionResponder(self, encoding, send).run(scope, receive)
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[StreamCompressor] = None
+        self.passthrough = False
+
+    async def run(self, scope: Scope, receive: Receive):
+        await self.middleware.app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message: Message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.start_message = message
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 206, 304)
+                # Range offsets refer to the identity body, so parts can't be re-encoded
+                or "content-range" in headers
+                or not is_compressible(headers.get("content-type"))
+            )
+            if not self.passthrough:
+                MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+            return
+
+        if message_type != "http.response.body":
+            # e.g. pathsend / zerocopysend: hand the file to the server untouched
+            await self._flush_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough:
+            await self._flush_start()
+            await self.send(message)
+            return
+
+        if self.start_message is not None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            declared = headers.get("content-length")
+            small = len(body) < self.middleware.minimum_size if not more_body else (
+                declared is not None and declared.isdigit() and int(declared) < self.middleware.minimum_size
+            )
+            if small:
+                self.passthrough = True
+                await self._flush_start()
+                await self.send(message)
+                return
+
+            self.compressor = StreamCompressor(
+                self.encoding,
+                self.middleware.gzip_level,
+                self.middleware.brotli_quality
+            )
+            headers["Content-Encoding"] = self.encoding
+            etag = headers.get("etag")
+            if etag is not None and not etag.startswith("W/"):
+                # The encoded body is a different byte sequence, so it can't keep a strong validator
+                headers["ETag"] = f"W/{etag}"
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self._flush_start()
+                await self.send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+            await self._flush_start()
+
+        chunk = self.compressor.compress(body) if more_body else self.compressor.finish(body)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _flush_start(self):
+        if self.start_message is not None:
+            message, self.start_message = self.start_message, None
+            await self.send(message)
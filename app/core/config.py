@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 from functools import lru_cache
 
@@ -12,9 +12,86 @@ class Settings(BaseSettings):
     # API settings
     API_PREFIX: str = "/api"
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
+
+    # Process settings: roles this process runs (api, scheduler, worker) and modules to load (all when empty)
+    PROCESS_ROLES: List[str] = ["api", "scheduler"]
+    ENABLED_MODULES: List[str] = []
     
     # CORS settings
     CORS_ORIGINS: List[str] = ["*"]
+
+    # Admission control settings
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "True").lower() == "true"
+    ADMISSION_BACKEND: str = os.getenv("ADMISSION_BACKEND", "memory")
+    ADMISSION_BACKEND_URL: Optional[str] = os.getenv("ADMISSION_BACKEND_URL")
+    ADMISSION_EXEMPT_PATHS: List[str] = ["/api/health"]
+    ADMISSION_QUEUE_SIZE: int = int(os.getenv("ADMISSION_QUEUE_SIZE", 50))
+    ADMISSION_QUEUE_TIMEOUT_MS: int = int(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", 100))
+    RATE_LIMIT_PER_SECOND: float = float(os.getenv("RATE_LIMIT_PER_SECOND", 20))
+    RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", 40))
+    MAX_CONCURRENT_REQUESTS: int = int(os.getenv("MAX_CONCURRENT_REQUESTS", 256))
+    ROUTE_CONCURRENCY_LIMITS: Dict[str, int] = {"/api/ai": 64}
+    # X-API-Key values that identify a client; any other key is ignored and the client is keyed by IP
+    CLIENT_API_KEYS: List[str] = []
+
+    # Idempotency-Key settings; the database backend shares keys across workers
+    IDEMPOTENCY_ENABLED: bool = os.getenv("IDEMPOTENCY_ENABLED", "True").lower() == "true"
+    IDEMPOTENCY_HEADER: str = os.getenv("IDEMPOTENCY_HEADER", "Idempotency-Key")
+    IDEMPOTENCY_PATHS: List[str] = ["/api/ai", "/api/jobs"]
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", 86400))
+    IDEMPOTENCY_MAX_RESPONSE_BYTES: int = int(os.getenv("IDEMPOTENCY_MAX_RESPONSE_BYTES", 1024 * 1024))
+    IDEMPOTENCY_MEMORY_BYTES: int = int(os.getenv("IDEMPOTENCY_MEMORY_BYTES", 64 * 1024 * 1024))
+    IDEMPOTENCY_BACKEND: str = os.getenv("IDEMPOTENCY_BACKEND", "memory")
+    IDEMPOTENCY_LOCK_SECONDS: float = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", 150))
+
+    # Request deadline settings; a timeout of 0 means no deadline
+    REQUEST_DEADLINE_ENABLED: bool = os.getenv("REQUEST_DEADLINE_ENABLED", "True").lower() == "true"
+    REQUEST_TIMEOUT_HEADER: str = os.getenv("REQUEST_TIMEOUT_HEADER", "X-Request-Timeout")
+    REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_SECONDS", 30))
+    REQUEST_TIMEOUT_MAX_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_MAX_SECONDS", 300))
+    ROUTE_TIMEOUTS: Dict[str, float] = {"/api/ai": 120, "/api/ai/history/export": 0, "/api/storage": 0, "/api/jobs": 0}
+
+    # Request body limits in bytes, enforced while the body streams in; the longest matching prefix wins and 0 means unlimited
+    REQUEST_MAX_BODY_BYTES: int = int(os.getenv("REQUEST_MAX_BODY_BYTES", 1024 * 1024))
+    ROUTE_BODY_LIMITS: Dict[str, int] = {"/api/ai": 8 * 1024 * 1024, "/api/jobs": 8 * 1024 * 1024, "/api/storage": 0}
+
+    # Circuit breaker settings (one breaker per provider and model)
+    CIRCUIT_BREAKER_FAILURE_RATE: float = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", 0.5))
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_SLOW_CALL_SECONDS", 30))
+    CIRCUIT_BREAKER_SLOW_CALL_RATE: float = float(os.getenv("CIRCUIT_BREAKER_SLOW_CALL_RATE", 0.8))
+    CIRCUIT_BREAKER_WINDOW_SIZE: int = int(os.getenv("CIRCUIT_BREAKER_WINDOW_SIZE", 20))
+    CIRCUIT_BREAKER_MINIMUM_CALLS: int = int(os.getenv("CIRCUIT_BREAKER_MINIMUM_CALLS", 10))
+    CIRCUIT_BREAKER_OPEN_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", 30))
+    CIRCUIT_BREAKER_HALF_OPEN_CALLS: int = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_CALLS", 3))
+
+    # Bulkhead settings: concurrent calls allowed per provider
+    BULKHEAD_LIMITS: Dict[str, int] = {"openai": 32, "google": 32, "fake": 64}
+    BULKHEAD_DEFAULT_LIMIT: int = int(os.getenv("BULKHEAD_DEFAULT_LIMIT", 32))
+    BULKHEAD_QUEUE_SIZE: int = int(os.getenv("BULKHEAD_QUEUE_SIZE", 100))
+    BULKHEAD_QUEUE_TIMEOUT_MS: int = int(os.getenv("BULKHEAD_QUEUE_TIMEOUT_MS", 1000))
+
+    # Background job queue settings; the lease is the visibility timeout of a claimed job
+    JOBS_WORKER_CONCURRENCY: int = int(os.getenv("JOBS_WORKER_CONCURRENCY", 16))
+    JOBS_WORKER_POLL_INTERVAL_MS: float = float(os.getenv("JOBS_WORKER_POLL_INTERVAL_MS", 1000))
+    JOBS_LEASE_SECONDS: float = float(os.getenv("JOBS_LEASE_SECONDS", 60))
+    JOBS_TIMEOUT_SECONDS: float = float(os.getenv("JOBS_TIMEOUT_SECONDS", 600))
+    JOBS_MAX_ATTEMPTS: int = int(os.getenv("JOBS_MAX_ATTEMPTS", 3))
+    JOBS_RETRY_BASE_SECONDS: float = float(os.getenv("JOBS_RETRY_BASE_SECONDS", 2))
+    JOBS_RETRY_MAX_SECONDS: float = float(os.getenv("JOBS_RETRY_MAX_SECONDS", 300))
+    JOBS_SHUTDOWN_GRACE_SECONDS: float = float(os.getenv("JOBS_SHUTDOWN_GRACE_SECONDS", 30))
+    JOBS_MAX_WAIT_SECONDS: float = float(os.getenv("JOBS_MAX_WAIT_SECONDS", 30))
+    JOBS_WATCH_POLL_INTERVAL_MS: float = float(os.getenv("JOBS_WATCH_POLL_INTERVAL_MS", 500))
+    JOBS_STREAM_MAX_SECONDS: float = float(os.getenv("JOBS_STREAM_MAX_SECONDS", 900))
+    JOBS_RETENTION_DAYS: int = int(os.getenv("JOBS_RETENTION_DAYS", 7))
+
+    # Response cache settings
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() == "true"
+
+    # Compression settings
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", 1024))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
     
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./app.db")
@@ -24,17 +101,112 @@ class Settings(BaseSettings):
     
     # Google AI settings
     GOOGLE_API_KEY: Optional[str] = os.getenv("GOOGLE_API_KEY")
+
+    # Most messages accepted in one chat request
+    AI_CHAT_MAX_MESSAGES: int = int(os.getenv("AI_CHAT_MAX_MESSAGES", 10000))
+
+    # Completion history: stored per completion, listed in pages and exported in chunks
+    AI_HISTORY_ENABLED: bool = os.getenv("AI_HISTORY_ENABLED", "True").lower() == "true"
+    AI_HISTORY_MAX_PAGE_SIZE: int = int(os.getenv("AI_HISTORY_MAX_PAGE_SIZE", 500))
+    AI_HISTORY_EXPORT_CHUNK_SIZE: int = int(os.getenv("AI_HISTORY_EXPORT_CHUNK_SIZE", 5000))
+
+    # Token usage ledger: buffered per-minute rollups flushed every AI_USAGE_FLUSH_SECONDS,
+    # and optional per-client token budgets per window (0 = unlimited)
+    AI_USAGE_ENABLED: bool = os.getenv("AI_USAGE_ENABLED", "True").lower() == "true"
+    AI_USAGE_FLUSH_SECONDS: float = float(os.getenv("AI_USAGE_FLUSH_SECONDS", 10))
+    AI_USAGE_BUDGET_WINDOW_HOURS: int = int(os.getenv("AI_USAGE_BUDGET_WINDOW_HOURS", 24))
+    AI_USAGE_DEFAULT_BUDGET: int = int(os.getenv("AI_USAGE_DEFAULT_BUDGET", 0))
+    AI_USAGE_BUDGETS: Dict[str, int] = {}
+
+    # Completion history retention: days kept by default and per model (0 keeps forever),
+    # deleted in small batches and optionally archived first
+    AI_RETENTION_DAYS: int = int(os.getenv("AI_RETENTION_DAYS", 90))
+    AI_RETENTION_POLICIES: Dict[str, int] = {}
+    AI_RETENTION_BATCH_SIZE: int = int(os.getenv("AI_RETENTION_BATCH_SIZE", 1000))
+    AI_RETENTION_BATCH_PAUSE_SECONDS: float = float(os.getenv("AI_RETENTION_BATCH_PAUSE_SECONDS", 0.05))
+    AI_RETENTION_MAX_RUN_SECONDS: float = float(os.getenv("AI_RETENTION_MAX_RUN_SECONDS", 3600))
+    AI_RETENTION_ARCHIVE: str = os.getenv("AI_RETENTION_ARCHIVE", "none")
+    AI_RETENTION_ARCHIVE_PATH: str = os.getenv("AI_RETENTION_ARCHIVE_PATH", "./archive/ai_history")
+    AI_RETENTION_ARCHIVE_FILE_ROWS: int = int(os.getenv("AI_RETENTION_ARCHIVE_FILE_ROWS", 50000))
+
+    # Upper bound on a single provider call, further capped by the request deadline
+    AI_REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("AI_REQUEST_TIMEOUT_SECONDS", 120))
+    
+    # Embedding and vector index settings
+    AI_EMBEDDING_DIMENSIONS: int = int(os.getenv("AI_EMBEDDING_DIMENSIONS", 256))
+    AI_EMBEDDING_MAX_INPUTS: int = int(os.getenv("AI_EMBEDDING_MAX_INPUTS", 2048))
+    AI_EMBEDDING_BATCH_SIZE: int = int(os.getenv("AI_EMBEDDING_BATCH_SIZE", 256))
+    AI_EMBEDDING_BATCH_WAIT_MS: float = float(os.getenv("AI_EMBEDDING_BATCH_WAIT_MS", 5))
+    AI_VECTOR_INDEX_PATH: str = os.getenv("AI_VECTOR_INDEX_PATH", "./vector_index")
+    AI_VECTOR_COMPACTION_MIN_DELETED_RATIO: float = float(os.getenv("AI_VECTOR_COMPACTION_MIN_DELETED_RATIO", 0.1))
+    AI_VECTOR_COMPACTION_CHUNK_ROWS: int = int(os.getenv("AI_VECTOR_COMPACTION_CHUNK_ROWS", 65536))
+    AI_VECTOR_COMPACTION_INTERVAL_SECONDS: int = int(os.getenv("AI_VECTOR_COMPACTION_INTERVAL_SECONDS", 3600))
+
+    # Fake AI provider settings: "off", "models" (serve the fake-* models) or "all" (serve every model)
+    AI_FAKE_PROVIDER: str = os.getenv("AI_FAKE_PROVIDER", "off")
+    AI_FAKE_TTFT_MS: float = float(os.getenv("AI_FAKE_TTFT_MS", 200))
+    AI_FAKE_TOKENS_PER_SECOND: float = float(os.getenv("AI_FAKE_TOKENS_PER_SECOND", 50))
+    AI_FAKE_OUTPUT_TOKENS: int = int(os.getenv("AI_FAKE_OUTPUT_TOKENS", 64))
+    AI_FAKE_ERROR_RATE: float = float(os.getenv("AI_FAKE_ERROR_RATE", 0.0))
+    AI_FAKE_RATE_LIMIT_RATE: float = float(os.getenv("AI_FAKE_RATE_LIMIT_RATE", 0.0))
+    AI_FAKE_RETRY_AFTER: int = int(os.getenv("AI_FAKE_RETRY_AFTER", 1))
+    AI_FAKE_SEED: int = int(os.getenv("AI_FAKE_SEED", 0))
     
     # AWS S3 settings
     AWS_ACCESS_KEY_ID: Optional[str] = os.getenv("AWS_ACCESS_KEY_ID")
     AWS_SECRET_ACCESS_KEY: Optional[str] = os.getenv("AWS_SECRET_ACCESS_KEY")
     AWS_REGION: str = os.getenv("AWS_REGION", "us-east-1")
     S3_BUCKET_NAME: Optional[str] = os.getenv("S3_BUCKET_NAME")
+    S3_ENDPOINT_URL: Optional[str] = os.getenv("S3_ENDPOINT_URL")
+    S3_MULTIPART_CHUNK_SIZE: int = int(os.getenv("S3_MULTIPART_CHUNK_SIZE", 8 * 1024 * 1024))
+    S3_MAX_CONCURRENCY: int = int(os.getenv("S3_MAX_CONCURRENCY", 4))
+    S3_MAX_POOL_CONNECTIONS: int = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 32))
+    S3_PRESIGNED_URL_EXPIRY: int = int(os.getenv("S3_PRESIGNED_URL_EXPIRY", 3600))
+
+    # Storage settings (local disk is used when S3 is not configured)
+    STORAGE_LOCAL_PATH: str = os.getenv("STORAGE_LOCAL_PATH", "./uploads")
+    STORAGE_MAX_UPLOAD_SIZE: int = int(os.getenv("STORAGE_MAX_UPLOAD_SIZE", 5 * 1024 * 1024 * 1024))
+    
+    # Debug settings: debug endpoints and profiling require DEBUG_TOKEN in X-Debug-Token
+    DEBUG_TOKEN: Optional[str] = os.getenv("DEBUG_TOKEN") or None
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+    PROFILING_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", 5))
+    PROFILING_MAX_PROFILES: int = int(os.getenv("PROFILING_MAX_PROFILES", 50))
+    PROFILING_GLOBAL_ENABLED: bool = os.getenv("PROFILING_GLOBAL_ENABLED", "False").lower() == "true"
+    PROFILING_GLOBAL_INTERVAL_MS: float = float(os.getenv("PROFILING_GLOBAL_INTERVAL_MS", 100))
+    PROFILING_GLOBAL_WINDOW_MINUTES: int = int(os.getenv("PROFILING_GLOBAL_WINDOW_MINUTES", 10))
+    DEBUG_MEMORY_ENABLED: bool = os.getenv("DEBUG_MEMORY_ENABLED", "False").lower() == "true"
+    DEBUG_MAX_SNAPSHOTS: int = int(os.getenv("DEBUG_MAX_SNAPSHOTS", 10))
+
+    # Traffic capture: a sampled fraction of requests under TRAFFIC_CAPTURE_PATHS, written to
+    # rotating gzipped JSONL files by a background thread, for replay with benchmarks.replay
+    TRAFFIC_CAPTURE_ENABLED: bool = os.getenv("TRAFFIC_CAPTURE_ENABLED", "False").lower() == "true"
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", 0.01))
+    TRAFFIC_CAPTURE_PATHS: List[str] = ["/api"]
+    TRAFFIC_CAPTURE_REDACT_HEADERS: List[str] = [
+        "authorization", "proxy-authorization", "cookie", "set-cookie", "x-api-key", "x-debug-token"
+    ]
+    TRAFFIC_CAPTURE_DIR: str = os.getenv("TRAFFIC_CAPTURE_DIR", "./captures")
+    TRAFFIC_CAPTURE_MAX_BODY_BYTES: int = int(os.getenv("TRAFFIC_CAPTURE_MAX_BODY_BYTES", 1024 * 1024))
+    TRAFFIC_CAPTURE_MAX_FILE_BYTES: int = int(os.getenv("TRAFFIC_CAPTURE_MAX_FILE_BYTES", 64 * 1024 * 1024))
+    TRAFFIC_CAPTURE_MAX_FILES: int = int(os.getenv("TRAFFIC_CAPTURE_MAX_FILES", 50))
+    TRAFFIC_CAPTURE_QUEUE_SIZE: int = int(os.getenv("TRAFFIC_CAPTURE_QUEUE_SIZE", 10000))
     
     # Logging settings
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT: str = "{time} | {level} | {message}"
     
+    # Warm-up after startup: pooled DB connections to open, provider connections, and the time limit before reporting ready anyway
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "True").lower() == "true"
+    WARMUP_TIMEOUT_SECONDS: float = float(os.getenv("WARMUP_TIMEOUT_SECONDS", 20))
+    WARMUP_DB_CONNECTIONS: int = int(os.getenv("WARMUP_DB_CONNECTIONS", 5))
+    WARMUP_PROVIDERS: bool = os.getenv("WARMUP_PROVIDERS", "True").lower() == "true"
+
+    # SQL instrumentation: slow statements are logged, and a statement repeated this often in one request is flagged as N+1
+    SQL_INSTRUMENTATION_ENABLED: bool = os.getenv("SQL_INSTRUMENTATION_ENABLED", "True").lower() == "true"
+    SQL_SLOW_QUERY_MS: float = float(os.getenv("SQL_SLOW_QUERY_MS", 200))
+    SQL_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 10))
+
     # Tracing settings
     ENABLE_TRACING: bool = os.getenv("ENABLE_TRACING", "True").lower() == "true"
     OTLP_ENDPOINT: Optional[str] = os.getenv("OTLP_ENDPOINT")
@@ -1,7 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.deadline import is_expired, get_timeout
+from app.core.db_instrumentation import instrument_engine
 from app.core.logger import setup_logging
 from app.core.tracing import get_tracer
 
@@ -14,6 +16,35 @@ engine = create_engine(
     connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
 )
 
+# SQLite VM instructions between deadline checks
+SQLITE_DEADLINE_CHECK_STEPS = 10000
+
+def _interrupt_if_expired() -> int:
+    # A non-zero return makes SQLite abort the statement with "interrupted"
+    return 1 if is_expired() else 0
+
+@event.listens_for(engine, "connect")
+def _install_deadline_handler(dbapi_connection, connection_record):
+    """
+    Abort SQLite statements that outlive the request deadline
+    """
+    if engine.dialect.name == "sqlite":
+        dbapi_connection.set_progress_handler(_interrupt_if_expired, SQLITE_DEADLINE_CHECK_STEPS)
+
+@event.listens_for(engine, "begin")
+def _apply_statement_timeout(connection):
+    """
+    Bound PostgreSQL statements in the transaction by the remaining request budget
+    """
+    if engine.dialect.name == "postgresql":
+        timeout = get_timeout()
+        if timeout is not None:
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(int(timeout * 1000), 1)}")
+
+# Time every statement for spans, metrics, the slow-query log and N+1 detection
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    instrument_engine(engine)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -0,0 +1,199 @@
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Iterator, Optional
+from opentelemetry import trace
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.tracing import get_meter
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+N_PLUS_ONE_HEADER = "X-DB-N-Plus-One"
+
+# Longest statement attached to a span event
+MAX_STATEMENT_LENGTH = 2000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+meter = get_meter()
+query_duration = meter.create_histogram(
+    "db.client.query.duration", unit="ms", description="Duration of database statements"
+)
+request_query_count = meter.create_histogram(
+    "http.server.db.query_count", unit="{query}", description="Database statements per request"
+)
+request_query_duration = meter.create_histogram(
+    "http.server.db.duration", unit="ms", description="Database time per request"
+)
+
+class QueryStats:
+    """
+    Database statements run on behalf of one request
+
+    The same instance is shared with threadpool workers through the copied
+    context, so updates are locked.
+    """
+    def __init__(self, n_plus_one_threshold: int = 10):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.count = 0
+        self.total_time = 0.0
+        self.statements: Counter = Counter()
+        self.n_plus_one = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float) -> bool:
+        """
+        Count a statement; returns True the first time it repeats often enough to look like N+1
+        """
+        with self._lock:
+            self.count += 1
+            self.total_time += duration
+            self.statements[statement] += 1
+            if self.n_plus_one_threshold > 0 and self.statements[statement] == self.n_plus_one_threshold:
+                self.n_plus_one.append(statement)
+                return True
+            return False
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def get_query_stats() -> Optional[QueryStats]:
+    """
+    Get the statistics of the current request, or None outside a query scope
+    """
+    return _query_stats.get()
+
+@contextmanager
+def query_scope(n_plus_one_threshold: Optional[int] = None) -> Iterator[QueryStats]:
+    """
+    Collect the statements run inside a block into a fresh QueryStats
+    """
+    stats = QueryStats(
+        settings.SQL_N_PLUS_ONE_THRESHOLD if n_plus_one_threshold is None else n_plus_one_threshold
+    )
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+@lru_cache(maxsize=1024)
+def normalize_statement(statement: str) -> str:
+    """
+    Collapse literals, placeholder lists and whitespace so equal queries compare equal
+    """
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("(?)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """
+    Describe bound parameters by type only, so logs never carry their values
+    """
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameter_shape(parameters[0]) if parameters else "()"
+        return f"{len(parameters)} x {first}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+def _operation(statement: str) -> str:
+    return statement.split(" ", 1)[0].upper() if statement else ""
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start", None)
+    if start is None:
+        return
+    duration = time.perf_counter() - start
+    duration_ms = duration * 1000
+    normalized = normalize_statement(statement)
+    operation = _operation(normalized)
+
+    query_duration.record(duration_ms, {"db.system": conn.dialect.name, "db.operation": operation})
+
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.add_event("db.query", {
+            "db.statement": normalized[:MAX_STATEMENT_LENGTH],
+            "db.operation": operation,
+            "db.duration_ms": round(duration_ms, 3)
+        })
+
+    if settings.SQL_SLOW_QUERY_MS > 0 and duration_ms >= settings.SQL_SLOW_QUERY_MS:
+        logger.warning(
+            f"Slow query ({duration_ms:.1f}ms): {normalized} "
+            f"params={parameter_shape(parameters, executemany)}"
+        )
+
+    stats = _query_stats.get()
+    if stats is not None and stats.record(normalized, duration):
+        logger.warning(f"Likely N+1: statement ran {stats.n_plus_one_threshold} times in one request: {normalized}")
+        if span.is_recording():
+            span.add_event("db.n_plus_one", {"db.statement": normalized[:MAX_STATEMENT_LENGTH]})
+
+def instrument_engine(engine: Engine):
+    """
+    Time every statement run on `engine`
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+class QueryStatsMiddleware:
+    """
+    Collect per-request database statistics
+
+    Totals are recorded on the request span and as metrics. With
+    `debug_headers`, they are also returned as X-DB-* and Server-Timing
+    response headers; the headers reflect the statements run before the
+    response started, which is all of them except for streamed bodies.
+    """
+    def __init__(self, app: ASGIApp, debug_headers: bool = False):
+        self.app = app
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with query_scope() as stats:
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start" and self.debug_headers:
+                    headers = MutableHeaders(scope=message)
+                    total_ms = stats.total_time * 1000
+                    headers.append(QUERY_COUNT_HEADER, str(stats.count))
+                    headers.append(QUERY_TIME_HEADER, f"{total_ms:.1f}")
+                    headers.append("Server-Timing", f"db;desc=\"{stats.count} queries\";dur={total_ms:.1f}")
+                    if stats.n_plus_one:
+                        headers.append(N_PLUS_ONE_HEADER, str(len(stats.n_plus_one)))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                total_ms = stats.total_time * 1000
+                request_query_count.record(stats.count)
+                request_query_duration.record(total_ms)
+                span = trace.get_current_span()
+                if span.is_recording():
+                    span.set_attribute("db.query_count", stats.count)
+                    span.set_attribute("db.duration_ms", round(total_ms, 3))
+                    span.set_attribute("db.n_plus_one_count", len(stats.n_plus_one))
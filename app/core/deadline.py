@@ -0,0 +1,225 @@
+import asyncio
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.logger import logger
+from app.core.response import create_response
+
+ERROR_DEADLINE_EXCEEDED = "Request deadline exceeded"
+
+# Absolute deadline of the current request on the time.monotonic() clock
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when the current request has no time budget left
+    """
+
+def get_deadline() -> Optional[float]:
+    """
+    Get the current deadline (time.monotonic() based), or None when unbounded
+    """
+    return _deadline.get()
+
+def remaining_time() -> Optional[float]:
+    """
+    Seconds left before the current deadline, or None when unbounded
+    """
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def is_expired() -> bool:
+    """
+    Check whether the current deadline has passed
+    """
+    deadline = _deadline.get()
+    return deadline is not None and time.monotonic() >= deadline
+
+def get_timeout(default: Optional[float] = None) -> Optional[float]:
+    """
+    Timeout for an outbound call: the remaining budget, capped at `default`
+
+    Raises:
+        DeadlineExceeded: If the budget is already spent
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return default
+    if remaining <= 0:
+        raise DeadlineExceeded(ERROR_DEADLINE_EXCEEDED)
+    return remaining if default is None else min(remaining, default)
+
+def record_deadline(span) -> None:
+    """
+    Record the remaining budget on a span
+    """
+    remaining = remaining_time()
+    if remaining is not None:
+        span.set_attribute("deadline.remaining_ms", round(remaining * 1000, 1))
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Run a block under a deadline `seconds` from now; never extends an existing one
+    """
+    deadline = _deadline.get()
+    if seconds is not None and seconds > 0:
+        candidate = time.monotonic() + seconds
+        deadline = candidate if deadline is None else min(deadline, candidate)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def parse_timeout(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a timeout header value: seconds, or milliseconds with an `ms` suffix
+    """
+    if not value:
+        return None
+    value = value.strip().lower()
+    try:
+        if value.endswith("ms"):
+            return float(value[:-2]) / 1000
+        return float(value.rstrip("s"))
+    except ValueError:
+        return None
+
+def resolve_timeout(path: str, header_value: Optional[str], route_timeouts: Dict[str, float], default: float, maximum: float) -> Optional[float]:
+    """
+    Pick the time budget for a request
+
+    The client's header wins when valid, clamped to `maximum`. Otherwise
+    the longest matching route prefix applies, then `default`. A budget of
+    zero means no deadline.
+    """
+    requested = parse_timeout(header_value)
+    if requested is not None and requested > 0:
+        return min(requested, maximum) if maximum > 0 else requested
+
+    timeout = default
+    matches = [prefix for prefix in route_timeouts if path.startswith(prefix)]
+    if matches:
+        timeout = route_timeouts[max(matches, key=len)]
+    return timeout if timeout > 0 else None
+
+class DeadlineMiddleware:
+    """
+    Attach a deadline to every request and cancel work that outlives it
+
+    The deadline is exposed through a contextvar so provider and database
+    calls can size their own timeouts from the remaining budget. The app is
+    cancelled when the deadline passes (504 if nothing was sent yet) or when
+    the client disconnects before the response is complete, so abandoned
+    requests stop consuming provider tokens.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        header_name: str = "x-request-timeout",
+        default_timeout: float = 30.0,
+        max_timeout: float = 300.0,
+        route_timeouts: Optional[Dict[str, float]] = None
+    ):
+        self.app = app
+        self.header_name = header_name.lower()
+        self.default_timeout = default_timeout
+        self.max_timeout = max_timeout
+        self.route_timeouts = dict(route_timeouts or {})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timeout = resolve_timeout(
+            scope.get("path", ""),
+            Headers(scope=scope).get(self.header_name),
+            self.route_timeouts,
+            self.default_timeout,
+            self.max_timeout
+        )
+        token = _deadline.set(time.monotonic() + timeout if timeout is not None else None)
+        try:
+            await _DeadlineResponder(self.app, scope, receive, send).run(timeout)
+        finally:
+            _deadline.reset(token)
+
+class _DeadlineResponder:
+    def __init__(self, app: ASGIApp, scope: Scope, receive: Receive, send: Send):
+        self.app = app
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        # Size 1 keeps backpressure on request bodies while still noticing disconnects
+        self.messages: "asyncio.Queue[Message]" = asyncio.Queue(maxsize=1)
+        self.app_task: Optional[asyncio.Task] = None
+        self.response_started = False
+        self.response_complete = False
+        self.disconnected = False
+
+    async def run(self, timeout: Optional[float]):
+        self.app_task = asyncio.ensure_future(self.app(self.scope, self.receive_wrapper, self.send_wrapper))
+        reader = asyncio.ensure_future(self._read_messages())
+        path = self.scope.get("path", "")
+        try:
+            await asyncio.wait_for(self.app_task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Deadline of {timeout:.3f}s exceeded for {path}")
+            if not self.response_started:
+                await self._send_timeout()
+            # A partially sent response is left incomplete so the client sees the failure
+        except asyncio.CancelledError:
+            if not self.disconnected or not self.app_task.cancelled():
+                raise
+            logger.info(f"Client disconnected, cancelled {path}")
+        finally:
+            reader.cancel()
+
+    async def _read_messages(self):
+        while True:
+            message = await self.receive()
+            if message["type"] == "http.disconnect":
+                self.disconnected = True
+                if not self.response_complete and self.app_task is not None:
+                    self.app_task.cancel()
+                # Left for the app, which may be polling for the disconnect itself
+                if self.messages.empty():
+                    self.messages.put_nowait(message)
+                return
+            await self.messages.put(message)
+
+    async def receive_wrapper(self) -> Message:
+        if self.disconnected and self.messages.empty():
+            return {"type": "http.disconnect"}
+        return await self.messages.get()
+
+    async def send_wrapper(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.response_started = True
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            # Set before sending: the server may report the disconnect from inside send
+            self.response_complete = True
+        elif message["type"] in ("http.response.zerocopysend", "http.response.pathsend"):
+            self.response_complete = not message.get("more_body", False)
+        await self.send(message)
+
+    async def _send_timeout(self):
+        trace_id = self.scope.get("state", {}).get("trace_id") or str(uuid.uuid4())
+        response = JSONResponse(
+            status_code=504,
+            content=create_response(
+                data=None,
+                trace_id=trace_id,
+                is_success=False,
+                message=ERROR_DEADLINE_EXCEEDED,
+                error=ERROR_DEADLINE_EXCEEDED
+            )
+        )
+        await response(self.scope, self.receive_wrapper, self.send)
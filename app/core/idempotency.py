@@ -0,0 +1,405 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from fastapi.responses import JSONResponse
+from sqlalchemy import Column, DateTime, Integer, JSON, LargeBinary, String, delete, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.admission import get_client_key
+from app.core.config import settings
+from app.core.database import Base, SessionLocal
+from app.core.logger import logger
+from app.core.response import create_response
+
+BACKEND_MEMORY = "memory"
+BACKEND_DATABASE = "database"
+
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+
+ERROR_KEY_INVALID = "Idempotency-Key must be 1 to 255 characters"
+ERROR_KEY_REUSED = "Idempotency-Key was already used with a different request"
+
+# Outcomes of claiming a key in the shared tier
+CLAIM_ACQUIRED = "acquired"
+CLAIM_COMPLETED = "completed"
+CLAIM_BUSY = "busy"
+CLAIM_MISMATCH = "mismatch"
+
+class IdempotencyRecord:
+    """
+    A stored response, replayed verbatim for retries with the same key
+    """
+    def __init__(self, fingerprint: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes, expires_at: float):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires_at = expires_at
+
+class MemoryIdempotencyStore:
+    """
+    LRU of completed responses, bounded by total body size, plus the
+    requests in flight in this process
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._records: "OrderedDict[str, IdempotencyRecord]" = OrderedDict()
+        self.inflight: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    def get(self, key: str) -> Optional[IdempotencyRecord]:
+        record = self._records.get(key)
+        if record is None:
+            return None
+        if time.time() > record.expires_at:
+            self._pop(key)
+            return None
+        self._records.move_to_end(key)
+        return record
+
+    def set(self, key: str, record: IdempotencyRecord):
+        self._pop(key)
+        self._records[key] = record
+        self.size += len(record.body)
+        while self.size > self.max_bytes and self._records:
+            self._pop(next(iter(self._records)))
+
+    def _pop(self, key: str):
+        record = self._records.pop(key, None)
+        if record is not None:
+            self.size -= len(record.body)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+class IdempotencyKey(Base):
+    """
+    Shared idempotency key row; `owner` holds the claim while the first request runs
+    """
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    owner = Column(String(36), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    response_status = Column(Integer, nullable=True)
+    response_headers = Column(JSON, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class DatabaseIdempotencyStore:
+    """
+    Idempotency keys shared by every worker through the application database
+
+    A key is claimed by inserting its row; a duplicate on another worker
+    sees the claim and waits for the response to be written. A claim whose
+    owner died is taken over once `lock_seconds` pass.
+    """
+    def __init__(self, lock_seconds: float):
+        self.lock_seconds = lock_seconds
+
+    def claim(self, key: str, fingerprint: str, owner: str, ttl: float) -> Tuple[str, Optional[IdempotencyRecord]]:
+        now = _utcnow()
+        locked_until = now + timedelta(seconds=self.lock_seconds)
+        with SessionLocal() as db:
+            try:
+                db.add(IdempotencyKey(
+                    key=key,
+                    fingerprint=fingerprint,
+                    owner=owner,
+                    locked_until=locked_until,
+                    expires_at=now + timedelta(seconds=ttl)
+                ))
+                db.commit()
+                return CLAIM_ACQUIRED, None
+            except IntegrityError:
+                db.rollback()
+
+            row = db.get(IdempotencyKey, key)
+            if row is None:
+                return CLAIM_BUSY, None
+            if row.expires_at <= now or (row.owner is not None and row.locked_until <= now):
+                # Expired, or its owner died mid-request: take it over
+                result = db.execute(
+                    update(IdempotencyKey)
+                    .where(
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.owner.is_(None) if row.owner is None else IdempotencyKey.owner == row.owner
+                    )
+                    .values(
+                        fingerprint=fingerprint,
+                        owner=owner,
+                        locked_until=locked_until,
+                        response_status=None,
+                        response_headers=None,
+                        response_body=None,
+                        expires_at=now + timedelta(seconds=ttl)
+                    )
+                )
+                db.commit()
+                return (CLAIM_ACQUIRED if result.rowcount == 1 else CLAIM_BUSY), None
+            if row.fingerprint != fingerprint:
+                return CLAIM_MISMATCH, None
+            if row.owner is not None:
+                return CLAIM_BUSY, None
+            return CLAIM_COMPLETED, IdempotencyRecord(
+                row.fingerprint,
+                row.response_status,
+                [(name.encode("latin-1"), value.encode("latin-1")) for name, value in row.response_headers],
+                row.response_body,
+                row.expires_at.replace(tzinfo=timezone.utc).timestamp()
+            )
+
+    def complete(self, key: str, owner: str, record: IdempotencyRecord):
+        with SessionLocal() as db:
+            db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key, IdempotencyKey.owner == owner)
+                .values(
+                    owner=None,
+                    locked_until=None,
+                    response_status=record.status,
+                    response_headers=[[name.decode("latin-1"), value.decode("latin-1")] for name, value in record.headers],
+                    response_body=record.body
+                )
+            )
+            db.commit()
+
+    def release(self, key: str, owner: str):
+        with SessionLocal() as db:
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.owner == owner))
+            db.commit()
+
+def purge_expired_idempotency_keys() -> int:
+    """
+    Delete expired rows from the shared idempotency tier
+
+    Returns:
+        int: Number of keys deleted
+    """
+    with SessionLocal() as db:
+        result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < _utcnow()))
+        db.commit()
+        return result.rowcount
+
+def is_storable(status: int) -> bool:
+    """
+    Check whether a response is final enough to replay
+
+    Server errors, timeouts, conflicts and rate limits are transient, so a
+    retry with the same key should run again rather than replay them.
+    """
+    return status < 500 and status not in (408, 409, 429)
+
+def _rejection(status_code: int, message: str, scope: Scope, retry_after: Optional[int] = None) -> JSONResponse:
+    trace_id = scope.get("state", {}).get("trace_id") or str(uuid.uuid4())
+    return JSONResponse(
+        status_code=status_code,
+        content=create_response(data=None, trace_id=trace_id, is_success=False, message=message, error=message),
+        headers={"Retry-After": str(retry_after)} if retry_after is not None else None
+    )
+
+class IdempotencyMiddleware:
+    """
+    Run a write at most once per Idempotency-Key
+
+    Applies to `methods` on paths under `paths` that carry the key header;
+    keys are scoped per client (see get_client_key), method and path. The
+    first request runs and its response is stored for `ttl` seconds when it
+    is final (see is_storable) and at most `max_response_bytes` long.
+    Duplicates arriving meanwhile wait for it, and later retries replay the
+    stored status, headers and body byte for byte with an
+    Idempotent-Replayed header. Reusing a key with a different body is
+    rejected with 422. If the first request fails transiently or is
+    cancelled, the next duplicate runs instead.
+
+    The in-process tier handles a single worker; `shared_store` extends
+    claims and stored responses to every worker through the database.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Sequence[str] = ("/api/ai",),
+        methods: Sequence[str] = ("POST",),
+        header_name: str = "idempotency-key",
+        ttl: float = 86400.0,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        max_response_bytes: int = 1024 * 1024,
+        shared_store: Optional[DatabaseIdempotencyStore] = None,
+        poll_interval: float = 0.25
+    ):
+        self.app = app
+        self.paths = tuple(paths)
+        self.methods = set(method.upper() for method in methods)
+        self.header_name = header_name.lower()
+        self.ttl = ttl
+        self.max_response_bytes = max_response_bytes
+        self.store = MemoryIdempotencyStore(max_memory_bytes)
+        self.shared_store = shared_store
+        self.poll_interval = poll_interval
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in self.methods
+            or not scope.get("path", "").startswith(self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = Headers(scope=scope).get(self.header_name)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+            await _rejection(400, ERROR_KEY_INVALID, scope)(scope, receive, send)
+            return
+
+        body, disconnect = await self._read_body(receive)
+        if disconnect is not None:
+            # The client went away before sending the whole body
+            return
+        key = hashlib.sha256(
+            f"{get_client_key(scope)}\n{scope['method']}\n{scope['path']}\n{idempotency_key}".encode()
+        ).hexdigest()
+        fingerprint = hashlib.sha256(body).hexdigest()
+        replay_receive = self._replay_body(body, receive)
+
+        while True:
+            record = self.store.get(key)
+            if record is not None:
+                await self._respond_with_record(record, fingerprint, scope, replay_receive, send)
+                return
+
+            inflight = self.store.inflight.get(key)
+            if inflight is None:
+                break
+            if inflight[0] != fingerprint:
+                await _rejection(422, ERROR_KEY_REUSED, scope)(scope, replay_receive, send)
+                return
+            # Wait for the first request; if it stores nothing, loop and run ourselves
+            await asyncio.shield(inflight[1])
+
+        future = asyncio.get_event_loop().create_future()
+        self.store.inflight[key] = (fingerprint, future)
+        try:
+            await self._run_once(key, fingerprint, scope, replay_receive, send)
+        finally:
+            del self.store.inflight[key]
+            future.set_result(None)
+
+    async def _run_once(self, key: str, fingerprint: str, scope: Scope, receive: Receive, send: Send):
+        owner = str(uuid.uuid4())
+        shared = self.shared_store
+        while shared is not None:
+            try:
+                outcome, record = await run_in_threadpool(shared.claim, key, fingerprint, owner, self.ttl)
+            except Exception as e:
+                # A broken shared tier must not take the endpoint down; fall back to this process
+                logger.error(f"Idempotency store error: {e}")
+                shared = None
+                break
+            if outcome == CLAIM_ACQUIRED:
+                break
+            if outcome == CLAIM_MISMATCH:
+                await _rejection(422, ERROR_KEY_REUSED, scope)(scope, receive, send)
+                return
+            if outcome == CLAIM_COMPLETED:
+                self.store.set(key, record)
+                await self._respond_with_record(record, fingerprint, scope, receive, send)
+                return
+            # Another worker is running it; the request deadline bounds this wait
+            await asyncio.sleep(self.poll_interval)
+
+        record = None
+        try:
+            record = await self._run_and_capture(fingerprint, scope, receive, send)
+        finally:
+            if record is not None:
+                self.store.set(key, record)
+            if shared is not None:
+                try:
+                    if record is not None:
+                        await run_in_threadpool(shared.complete, key, owner, record)
+                    else:
+                        await run_in_threadpool(shared.release, key, owner)
+                except Exception as e:
+                    logger.error(f"Idempotency store error: {e}")
+
+    async def _run_and_capture(self, fingerprint: str, scope: Scope, receive: Receive, send: Send) -> Optional[IdempotencyRecord]:
+        status = 0
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        size = 0
+        complete = False
+
+        async def capture(message: Message):
+            nonlocal status, headers, size, complete
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                size += len(body)
+                if size <= self.max_response_bytes:
+                    chunks.append(body)
+                complete = not message.get("more_body", False)
+            await send(message)
+
+        await self.app(scope, receive, capture)
+        if not complete or size > self.max_response_bytes or not is_storable(status):
+            return None
+        return IdempotencyRecord(fingerprint, status, headers, b"".join(chunks), time.time() + self.ttl)
+
+    async def _respond_with_record(self, record: IdempotencyRecord, fingerprint: str, scope: Scope, receive: Receive, send: Send):
+        if record.fingerprint != fingerprint:
+            await _rejection(422, ERROR_KEY_REUSED, scope)(scope, receive, send)
+            return
+        await send({
+            "type": "http.response.start",
+            "status": record.status,
+            "headers": [*record.headers, (REPLAYED_HEADER, b"true")]
+        })
+        await send({"type": "http.response.body", "body": record.body})
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> Tuple[bytes, Optional[Message]]:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return b"", message
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks), None
+
+    @staticmethod
+    def _replay_body(body: bytes, receive: Receive) -> Receive:
+        sent = False
+
+        async def replay() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return replay
+
+def create_shared_idempotency_store() -> Optional[DatabaseIdempotencyStore]:
+    """
+    Create the shared tier when IDEMPOTENCY_BACKEND is "database"
+    """
+    if settings.IDEMPOTENCY_BACKEND == BACKEND_DATABASE:
+        return DatabaseIdempotencyStore(settings.IDEMPOTENCY_LOCK_SECONDS)
+    return None
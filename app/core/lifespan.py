@@ -1,22 +1,70 @@
+import asyncio
+import signal
 from app.core.config import settings
 from app.core.logger import logger
 from app.core.database import create_db_and_tables
-from app.core.scheduler import scheduler
+from app.core.modules import ROLE_SCHEDULER, get_process_roles, load_tables, run_hooks
+from app.core.profiling import global_sampler
+from app.core.traffic_capture import capture_writer
+from app.core.warmup import start_warmup, stop_warmup
 from app.core.tracing import tracer, trace_request
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup
+async def startup():
+    """
+    Start everything this process's roles need
+    """
     with tracer.start_as_current_span("application_startup"):
-        logger.info("Starting application...")
+        roles = get_process_roles()
+        logger.info(f"Starting application with roles {', '.join(sorted(roles))}...")
+        load_tables()
+        if ROLE_SCHEDULER in roles:
+            # Imported here so other processes don't load APScheduler; before
+            # create_db_and_tables so the tables its jobs purge exist
+            from app.core.scheduler import start_scheduler
         create_db_and_tables()
-        scheduler.start()
+        if ROLE_SCHEDULER in roles:
+            start_scheduler()
+        if settings.PROFILING_GLOBAL_ENABLED:
+            global_sampler.start()
+        if settings.TRAFFIC_CAPTURE_ENABLED:
+            capture_writer.start()
+        await run_hooks("startup", roles)
+        # Runs in the background; readiness reports not-ready until it finishes
+        start_warmup(roles)
         logger.info("Application started successfully")
-    yield
-    # Shutdown
+
+async def shutdown():
+    """
+    Stop what startup() started, in reverse order
+    """
     with tracer.start_as_current_span("application_shutdown"):
+        roles = get_process_roles()
         logger.info("Shutting down application...")
-        scheduler.shutdown()
-        logger.info("Application shutdown complete")
\ No newline at end of file
+        await stop_warmup()
+        await run_hooks("shutdown", roles)
+        global_sampler.stop()
+        capture_writer.stop()
+        if ROLE_SCHEDULER in roles:
+            from app.core.scheduler import shutdown_scheduler
+            shutdown_scheduler()
+        logger.info("Application shutdown complete")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    yield
+    await shutdown()
+
+async def run_background_process():
+    """
+    Run the roles of a process that serves no HTTP (worker, scheduler) until SIGINT or SIGTERM
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await startup()
+    await stop.wait()
+    await shutdown()
@@ -0,0 +1,200 @@
+import asyncio
+import importlib
+import importlib.util
+import os
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+from app.core.config import settings
+from app.core.logger import logger
+
+ROLE_API = "api"
+ROLE_SCHEDULER = "scheduler"
+ROLE_WORKER = "worker"
+ROLES = (ROLE_API, ROLE_SCHEDULER, ROLE_WORKER)
+
+MODULES_PACKAGE = "app.modules"
+SPEC_ATTRIBUTE = "module"
+
+def resolve(target: str) -> Any:
+    """
+    Import "package.module:attribute" and return the attribute
+    """
+    module_name, _, attribute = target.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute) if attribute else module
+
+class RouterSpec:
+    """
+    A router to mount in API processes, given as "package.module:attribute"
+    """
+    def __init__(self, target: str, prefix: str, tags: Optional[List[str]] = None):
+        self.target = target
+        self.prefix = prefix
+        self.tags = tags
+
+class ModuleSpec:
+    """
+    What a module contributes to each process role
+
+    Every hook is an import path ("package.module:attribute"), so reading a
+    spec imports nothing: a module's code and SDKs are only loaded by
+    processes running a role that uses them.
+
+    Args:
+        name: Module name, matched against ENABLED_MODULES
+        routers: Routers mounted by API processes
+        cron: Function registering cron jobs on the scheduler (scheduler role)
+        job_handlers: Function registering background job handlers (worker role)
+        tables: Modules defining database tables, imported before tables are created
+        startup: Per-role hooks run at process startup (sync or async)
+        shutdown: Per-role hooks run at process shutdown, in reverse order
+        warmup: Per-role hooks run concurrently in the background after startup;
+            API processes report not-ready until they finish
+        dependencies: Third-party packages the module needs, checked before loading it
+        enabled: False to skip the module regardless of ENABLED_MODULES
+    """
+    def __init__(
+        self,
+        name: str,
+        routers: Sequence[RouterSpec] = (),
+        cron: Optional[str] = None,
+        job_handlers: Optional[str] = None,
+        tables: Sequence[str] = (),
+        startup: Optional[Dict[str, List[str]]] = None,
+        shutdown: Optional[Dict[str, List[str]]] = None,
+        warmup: Optional[Dict[str, List[str]]] = None,
+        dependencies: Sequence[str] = (),
+        enabled: bool = True
+    ):
+        self.name = name
+        self.routers = list(routers)
+        self.cron = cron
+        self.job_handlers = job_handlers
+        self.tables = list(tables)
+        self.startup = startup or {}
+        self.shutdown = shutdown or {}
+        self.warmup = warmup or {}
+        self.dependencies = list(dependencies)
+        self.enabled = enabled
+
+    def missing_dependencies(self) -> List[str]:
+        """
+        Declared dependencies that are not installed, found without importing them
+        """
+        return [name for name in self.dependencies if importlib.util.find_spec(name) is None]
+
+@lru_cache()
+def discover_modules() -> List[ModuleSpec]:
+    """
+    Find every `app/modules/<name>/<name>_module.py` spec
+    """
+    # Module packages have no __init__.py, so list directories rather than use pkgutil
+    package = importlib.import_module(MODULES_PACKAGE)
+    names = sorted({
+        name
+        for path in package.__path__
+        for name in os.listdir(path)
+        if os.path.isfile(os.path.join(path, name, f"{name}_module.py"))
+    })
+    specs = []
+    for name in names:
+        spec_module = f"{MODULES_PACKAGE}.{name}.{name}_module"
+        specs.append(getattr(importlib.import_module(spec_module), SPEC_ATTRIBUTE))
+    return specs
+
+@lru_cache()
+def get_enabled_modules() -> List[ModuleSpec]:
+    """
+    Discovered modules selected by ENABLED_MODULES (all when empty)
+
+    Raises:
+        RuntimeError: If an enabled module's dependencies are not installed
+    """
+    selected = set(settings.ENABLED_MODULES)
+    modules = [
+        module for module in discover_modules()
+        if module.enabled and (not selected or module.name in selected)
+    ]
+    for module in modules:
+        missing = module.missing_dependencies()
+        if missing:
+            raise RuntimeError(f"Module {module.name} requires missing packages: {', '.join(missing)}")
+    unknown = selected - {module.name for module in discover_modules()}
+    if unknown:
+        logger.warning(f"ENABLED_MODULES lists unknown modules: {', '.join(sorted(unknown))}")
+    return modules
+
+def get_process_roles() -> Set[str]:
+    """
+    Roles this process runs, from PROCESS_ROLES
+    """
+    roles = set(settings.PROCESS_ROLES)
+    unknown = roles - set(ROLES)
+    if unknown:
+        raise RuntimeError(f"Unknown process roles: {', '.join(sorted(unknown))}")
+    return roles
+
+def load_tables():
+    """
+    Import the table definitions of enabled modules so create_all sees them
+    """
+    for module in get_enabled_modules():
+        for target in module.tables:
+            resolve(target)
+
+def include_routers(app):
+    """
+    Mount the routers of enabled modules
+    """
+    for module in get_enabled_modules():
+        for router in module.routers:
+            app.include_router(resolve(router.target), prefix=router.prefix, tags=router.tags)
+
+def register_cron_jobs(scheduler):
+    """
+    Register the cron jobs of enabled modules
+    """
+    for module in get_enabled_modules():
+        if module.cron:
+            resolve(module.cron)(scheduler)
+
+def register_job_handlers(register: Callable):
+    """
+    Register the background job handlers of enabled modules
+    """
+    for module in get_enabled_modules():
+        if module.job_handlers:
+            resolve(module.job_handlers)(register)
+
+def get_hooks(phase: str, roles: Set[str]) -> List[str]:
+    """
+    The "startup", "shutdown" or "warmup" hooks of enabled modules for `roles`, without duplicates
+    """
+    modules = get_enabled_modules()
+    if phase == "shutdown":
+        modules = list(reversed(modules))
+    hooks = []
+    for module in modules:
+        for role in ROLES:
+            if role not in roles:
+                continue
+            for target in getattr(module, phase).get(role, []):
+                if target not in hooks:
+                    hooks.append(target)
+    return hooks
+
+async def call_hook(target: str):
+    """
+    Call a sync or async hook
+    """
+    result = resolve(target)()
+    if asyncio.iscoroutine(result):
+        await result
+
+async def run_hooks(phase: str, roles: Set[str]):
+    """
+    Run the "startup" or "shutdown" hooks of enabled modules for `roles` in order
+    """
+    for target in get_hooks(phase, roles):
+        logger.info(f"Running {phase} hook {target}")
+        await call_hook(target)
@@ -0,0 +1,24 @@
+import orjson
+from fastapi import Request
+from fastapi.routing import APIRoute
+
+class ORJSONRequest(Request):
+    """
+    Request whose JSON body is parsed with orjson
+    """
+    async def json(self):
+        if not hasattr(self, "_json"):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+class ORJSONRoute(APIRoute):
+    """
+    Route that parses JSON bodies with orjson; use as an APIRouter's route_class
+    """
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def orjson_route_handler(request: Request):
+            return await handler(ORJSONRequest(request.scope, request.receive))
+
+        return orjson_route_handler
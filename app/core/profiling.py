@@ -0,0 +1,366 @@
+import asyncio
+import hmac
+import json
+import sys
+import threading
+import time
+import weakref
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.logger import logger
+
+MODE_SAMPLE = "sample"
+MODE_TRACE = "trace"
+
+FORMAT_COLLAPSED = "collapsed"
+FORMAT_SPEEDSCOPE = "speedscope"
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+DEBUG_TOKEN_HEADER = "x-debug-token"
+
+# Leaf frames of threads that are only waiting (event loop selector, idle pool workers)
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("_thread.py", "run")
+}
+
+Frame = Tuple[str, str, int]
+Stack = Tuple[Frame, ...]
+
+_session: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+def is_authorized(token: Optional[str], expected: Optional[str]) -> bool:
+    """
+    Constant-time check of a debug token; always false when no token is configured
+    """
+    return bool(expected) and bool(token) and hmac.compare_digest(token.encode(), expected.encode())
+
+def _frame_key(frame) -> Frame:
+    code = frame.f_code
+    return code.co_name, code.co_filename, code.co_firstlineno
+
+def _stack(frame) -> Stack:
+    frames = []
+    while frame is not None:
+        frames.append(_frame_key(frame))
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+def _is_idle(stack: Stack) -> bool:
+    if not stack:
+        return True
+    name, filename, _ = stack[-1]
+    return (filename.rsplit("/", 1)[-1], name) in IDLE_FRAMES
+
+class Profile:
+    """
+    Aggregated stacks with weights in microseconds
+    """
+    def __init__(self, profile_id: str, mode: str, name: str, stacks: Dict[Stack, float], duration: float):
+        self.profile_id = profile_id
+        self.mode = mode
+        self.name = name
+        self.stacks = stacks
+        self.duration = duration
+        self.created_at = time.time()
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "id": self.profile_id,
+            "mode": self.mode,
+            "name": self.name,
+            "durationMs": round(self.duration * 1000, 3),
+            "stacks": len(self.stacks),
+            "createdAt": self.created_at
+        }
+
+    def to_collapsed(self) -> str:
+        """
+        Render as collapsed stacks (`frame;frame;frame weight`), as read by flamegraph.pl and speedscope
+        """
+        lines = []
+        for stack, weight in sorted(self.stacks.items(), key=lambda item: -item[1]):
+            frames = ";".join(f"{name} ({filename}:{line})" for name, filename, line in stack)
+            lines.append(f"{frames} {max(int(round(weight)), 1)}")
+        return "\n".join(lines) + "\n"
+
+    def to_speedscope(self) -> str:
+        """
+        Render as a speedscope JSON file with one sampled profile
+        """
+        frames: List[Dict[str, object]] = []
+        index: Dict[Frame, int] = {}
+        samples, weights = [], []
+        for stack, weight in self.stacks.items():
+            sample = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                sample.append(index[frame])
+            samples.append(sample)
+            weights.append(round(weight, 3))
+
+        return json.dumps({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.name,
+                "unit": "microseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": samples,
+                "weights": weights
+            }],
+            "name": f"{self.name} ({self.profile_id})",
+            "exporter": "fastapi-modular-backend"
+        })
+
+class ProfileStore:
+    """
+    The most recent request profiles, keyed by trace id
+    """
+    def __init__(self, max_profiles: int):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile):
+        with self._lock:
+            self._profiles[profile.profile_id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Profile]:
+        return list(reversed(self._profiles.values()))
+
+class ProfileSession:
+    """
+    Profile of one request
+
+    Sample mode: a thread snapshots the event loop thread's stack every
+    interval, keeping samples taken while one of the request's tasks is
+    running (tasks are tagged through a loop task factory). Trace mode: a
+    setprofile hook on the loop thread records self time per stack for
+    calls made in the request's context. Both only see the event loop
+    thread; time spent in threadpool workers shows up as the awaiting frame.
+    """
+    def __init__(self, mode: str, interval: float):
+        self.mode = mode
+        self.interval = interval
+        self.stacks: Dict[Stack, float] = Counter()
+        self.tasks: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        self.started = time.perf_counter()
+        self._trace_stack: List[Frame] = []
+        self._last_event = self.started
+        self._stopped = threading.Event()
+
+    def sample(self, loop: asyncio.AbstractEventLoop, thread_id: int):
+        while not self._stopped.wait(self.interval):
+            task = asyncio.tasks._current_tasks.get(loop)
+            if task is None or task not in self.tasks:
+                continue
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                self.stacks[_stack(frame)] += self.interval * 1e6
+
+    def on_event(self, frame, event: str, arg):
+        now = time.perf_counter()
+        if self._trace_stack:
+            self.stacks[tuple(self._trace_stack)] += (now - self._last_event) * 1e6
+        self._last_event = now
+
+        if event == "call":
+            self._trace_stack.append(_frame_key(frame))
+        elif event == "c_call":
+            self._trace_stack.append((getattr(arg, "__qualname__", repr(arg)), "<builtin>", 0))
+        elif self._trace_stack:
+            # return / c_return / c_exception; returns of frames entered before profiling started are ignored
+            self._trace_stack.pop()
+
+    def stop(self) -> float:
+        self._stopped.set()
+        return time.perf_counter() - self.started
+
+def _trace_hook(frame, event, arg):
+    session = _session.get()
+    if session is not None and session.mode == MODE_TRACE:
+        session.on_event(frame, event, arg)
+
+class _LoopHooks:
+    """
+    Installs the task factory and setprofile hook while profiled requests are in flight
+    """
+    def __init__(self):
+        self.active_sessions = 0
+        self.trace_sessions = 0
+        self.previous_factory = None
+
+    def enter(self, loop: asyncio.AbstractEventLoop, session: ProfileSession):
+        if self.active_sessions == 0:
+            self.previous_factory = loop.get_task_factory()
+            loop.set_task_factory(self._task_factory)
+        self.active_sessions += 1
+        if session.mode == MODE_TRACE:
+            if self.trace_sessions == 0:
+                sys.setprofile(_trace_hook)
+            self.trace_sessions += 1
+
+    def exit(self, loop: asyncio.AbstractEventLoop, session: ProfileSession):
+        if session.mode == MODE_TRACE:
+            self.trace_sessions -= 1
+            if self.trace_sessions == 0:
+                sys.setprofile(None)
+        self.active_sessions -= 1
+        if self.active_sessions == 0:
+            loop.set_task_factory(self.previous_factory)
+
+    def _task_factory(self, loop, coro, **kwargs):
+        if self.previous_factory is not None:
+            task = self.previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        session = _session.get()
+        if session is not None:
+            session.tasks.add(task)
+        return task
+
+_hooks = _LoopHooks()
+
+class ProfilingMiddleware:
+    """
+    Profile requests that carry an authorized `X-Profile: sample|trace` header
+
+    Requests need `X-Debug-Token` to match the configured token; anything
+    else runs untouched. The finished profile is stored under the request's
+    trace id, which is returned in `X-Profile-Id`. Only installed when
+    profiling is enabled, so it costs nothing otherwise.
+    """
+    def __init__(self, app: ASGIApp, token: Optional[str], store: ProfileStore, interval: float = 0.005):
+        self.app = app
+        self.token = token
+        self.store = store
+        self.interval = interval
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        mode = headers.get(PROFILE_HEADER, "").strip().lower()
+        if mode not in (MODE_SAMPLE, MODE_TRACE) or not is_authorized(headers.get(DEBUG_TOKEN_HEADER), self.token):
+            await self.app(scope, receive, send)
+            return
+
+        loop = asyncio.get_event_loop()
+        session = ProfileSession(mode, self.interval)
+        session.tasks.add(asyncio.current_task())
+        profile_id = scope.get("state", {}).get("trace_id") or f"profile-{id(session):x}"
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(raw=message["headers"])[PROFILE_ID_HEADER] = profile_id
+            await send(message)
+
+        token = _session.set(session)
+        _hooks.enter(loop, session)
+        sampler = None
+        if mode == MODE_SAMPLE:
+            sampler = threading.Thread(target=session.sample, args=(loop, threading.get_ident()), daemon=True)
+            sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = session.stop()
+            _hooks.exit(loop, session)
+            _session.reset(token)
+            if sampler is not None:
+                sampler.join()
+            name = f"{scope.get('method', '')} {scope.get('path', '')}"
+            self.store.add(Profile(profile_id, mode, name, dict(session.stacks), duration))
+            logger.info(f"Stored {mode} profile {profile_id} for {name} ({duration * 1000:.1f}ms)")
+
+class GlobalSampler:
+    """
+    Low-rate sampler of every thread, aggregated per minute
+
+    Runs for the process lifetime when enabled. Idle stacks (threads
+    waiting on a selector, lock or queue) are dropped, and only the last
+    `window_minutes` of minute buckets are kept.
+    """
+    def __init__(self, interval: float, window_minutes: int):
+        self.interval = interval
+        self.window_minutes = window_minutes
+        self._buckets: "OrderedDict[int, Counter]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="global-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            minute = int(time.time() // 60)
+            stacks = [
+                _stack(frame) for thread_id, frame in sys._current_frames().items() if thread_id != own_id
+            ]
+            with self._lock:
+                bucket = self._buckets.get(minute)
+                if bucket is None:
+                    bucket = self._buckets[minute] = Counter()
+                    while len(self._buckets) > self.window_minutes:
+                        self._buckets.popitem(last=False)
+                for stack in stacks:
+                    if not _is_idle(stack):
+                        bucket[stack] += self.interval * 1e6
+
+    def aggregate(self, minutes: int) -> Profile:
+        """
+        Merge the buckets of the last `minutes` minutes into one profile
+        """
+        since = int(time.time() // 60) - max(minutes, 1) + 1
+        stacks: Counter = Counter()
+        with self._lock:
+            for minute, bucket in self._buckets.items():
+                if minute >= since:
+                    stacks.update(bucket)
+        return Profile(f"global-{minutes}m", MODE_SAMPLE, f"All threads, last {minutes} minutes", dict(stacks), minutes * 60)
+
+def render_profile(profile: Profile, fmt: str) -> Tuple[str, str, str]:
+    """
+    Render a profile for download
+
+    Returns:
+        tuple: (body, media type, file name)
+    """
+    if fmt == FORMAT_SPEEDSCOPE:
+        return profile.to_speedscope(), "application/json", f"{profile.profile_id}.speedscope.json"
+    return profile.to_collapsed(), "text/plain", f"{profile.profile_id}.collapsed.txt"
+
+profile_store = ProfileStore(settings.PROFILING_MAX_PROFILES)
+global_sampler = GlobalSampler(settings.PROFILING_GLOBAL_INTERVAL_MS / 1000, settings.PROFILING_GLOBAL_WINDOW_MINUTES)
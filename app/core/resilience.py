@@ -0,0 +1,236 @@
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+from app.core.admission import ConcurrencyLimiter
+from app.core.config import settings
+from app.core.logger import logger
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a dependency whose circuit is open
+    """
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit {name} is open")
+        self.name = name
+        self.retry_after = retry_after
+
+class BulkheadFullError(Exception):
+    """
+    Raised when a dependency's bulkhead has no free slot
+    """
+    def __init__(self, name: str):
+        super().__init__(f"Bulkhead {name} is full")
+        self.name = name
+
+class CircuitBreaker:
+    """
+    Count-based circuit breaker driven by error rate and latency
+
+    Closed: calls go through and the outcome of the last `window_size`
+    calls is tracked. Once at least `minimum_calls` are recorded and the
+    failure rate or the slow-call rate reaches its threshold, the circuit
+    opens. Open: calls fail fast with CircuitOpenError for `open_seconds`.
+    Half-open: up to `half_open_calls` trial calls go through; one failure
+    reopens the circuit, `half_open_calls` successes close it.
+    """
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 30.0,
+        slow_call_rate: float = 0.8,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 3
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.minimum_calls = max(minimum_calls, 1)
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(half_open_calls, 1)
+        self.state = STATE_CLOSED
+        self.opened_at = 0.0
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=max(window_size, 1))
+        self._trials_started = 0
+        self._trials_succeeded = 0
+
+    def before_call(self):
+        """
+        Admit a call or fail fast
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with every trial slot taken
+        """
+        if self.state == STATE_OPEN:
+            remaining = self.opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(self.name, remaining)
+            self._transition(STATE_HALF_OPEN)
+
+        if self.state == STATE_HALF_OPEN:
+            if self._trials_started >= self.half_open_calls:
+                raise CircuitOpenError(self.name, self.open_seconds)
+            self._trials_started += 1
+
+    def record(self, failed: bool, duration: Optional[float]):
+        """
+        Record the outcome of an admitted call; `duration` None skips the latency check
+        """
+        slow = duration is not None and duration >= self.slow_call_seconds
+
+        if self.state == STATE_HALF_OPEN:
+            if failed or slow:
+                self._transition(STATE_OPEN)
+                return
+            self._trials_succeeded += 1
+            if self._trials_succeeded >= self.half_open_calls:
+                self._transition(STATE_CLOSED)
+            return
+
+        if self.state != STATE_CLOSED:
+            return
+
+        self._outcomes.append((failed, slow))
+        calls = len(self._outcomes)
+        if calls < self.minimum_calls:
+            return
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        slow_calls = sum(1 for _, slow in self._outcomes if slow)
+        if failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+            self._transition(STATE_OPEN)
+
+    def release(self):
+        """
+        Give back a half-open trial slot whose call ended without an outcome (e.g. cancelled)
+        """
+        if self.state == STATE_HALF_OPEN and self._trials_started > self._trials_succeeded:
+            self._trials_started -= 1
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        logger.warning(f"Circuit {self.name}: {self.state} -> {state}")
+        self.state = state
+        self._trials_started = 0
+        self._trials_succeeded = 0
+        if state == STATE_OPEN:
+            self.opened_at = time.monotonic()
+        if state == STATE_CLOSED:
+            self._outcomes.clear()
+
+    def snapshot(self) -> Dict[str, object]:
+        """
+        Current state and window statistics
+        """
+        calls = len(self._outcomes)
+        return {
+            "name": self.name,
+            "state": self.state,
+            "calls": calls,
+            "failure_rate": round(sum(1 for failed, _ in self._outcomes if failed) / calls, 3) if calls else 0.0,
+            "slow_call_rate": round(sum(1 for _, slow in self._outcomes if slow) / calls, 3) if calls else 0.0
+        }
+
+class CallTimer:
+    """
+    Latency of one guarded call; `stop` fixes it early, e.g. at the first streamed chunk
+    """
+    def __init__(self):
+        self.started = time.monotonic()
+        self.duration: Optional[float] = None
+
+    def stop(self):
+        if self.duration is None:
+            self.duration = time.monotonic() - self.started
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_bulkheads: Dict[str, ConcurrencyLimiter] = {}
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """
+    Get the process-wide breaker for `name`, creating it from settings
+    """
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(
+            name,
+            failure_rate=settings.CIRCUIT_BREAKER_FAILURE_RATE,
+            slow_call_seconds=settings.CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+            slow_call_rate=settings.CIRCUIT_BREAKER_SLOW_CALL_RATE,
+            window_size=settings.CIRCUIT_BREAKER_WINDOW_SIZE,
+            minimum_calls=settings.CIRCUIT_BREAKER_MINIMUM_CALLS,
+            open_seconds=settings.CIRCUIT_BREAKER_OPEN_SECONDS,
+            half_open_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_CALLS
+        )
+    return breaker
+
+def get_circuit_breakers(prefix: str = "") -> List[CircuitBreaker]:
+    """
+    List existing breakers whose name starts with `prefix`
+    """
+    return [breaker for name, breaker in _breakers.items() if name.startswith(prefix)]
+
+def get_bulkhead(name: str) -> ConcurrencyLimiter:
+    """
+    Get the process-wide bulkhead for `name`, sized from BULKHEAD_LIMITS
+    """
+    bulkhead = _bulkheads.get(name)
+    if bulkhead is None:
+        bulkhead = _bulkheads[name] = ConcurrencyLimiter(
+            name,
+            settings.BULKHEAD_LIMITS.get(name, settings.BULKHEAD_DEFAULT_LIMIT),
+            settings.BULKHEAD_QUEUE_SIZE,
+            settings.BULKHEAD_QUEUE_TIMEOUT_MS / 1000
+        )
+    return bulkhead
+
+@asynccontextmanager
+async def guarded_call(
+    bulkhead: str,
+    breaker: str,
+    is_failure: Callable[[Exception], bool] = lambda error: True
+) -> AsyncIterator[CallTimer]:
+    """
+    Run a block inside a bulkhead slot and under a circuit breaker
+
+    The breaker is checked first so an open circuit never takes a slot.
+    Exceptions for which `is_failure` is false (e.g. bad requests) count
+    as successes; cancellation records nothing.
+
+    Raises:
+        CircuitOpenError: If the circuit is open
+        BulkheadFullError: If no slot frees up within the queue timeout
+    """
+    circuit = get_circuit_breaker(breaker)
+    circuit.before_call()
+
+    limiter = get_bulkhead(bulkhead)
+    if not await limiter.acquire():
+        circuit.release()
+        raise BulkheadFullError(bulkhead)
+
+    timer = CallTimer()
+    recorded = False
+    try:
+        yield timer
+        timer.stop()
+        circuit.record(False, timer.duration)
+        recorded = True
+    except Exception as e:
+        timer.stop()
+        failed = is_failure(e)
+        circuit.record(failed, timer.duration if not failed else None)
+        recorded = True
+        raise
+    finally:
+        if not recorded:
+            circuit.release()
+        limiter.release()
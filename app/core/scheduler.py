@@ -4,7 +4,8 @@ from apscheduler.executors.pool import ThreadPoolExecutor, ProcessPoolExecutor
 from app.core.config import settings
 from app.core.logger import logger
 from app.core.tracing import tracer, trace_job
-from app.modules.ai.ai_cron import register_jobs as register_ai_jobs
+from app.core.modules import register_cron_jobs
+from app.core.idempotency import BACKEND_DATABASE, purge_expired_idempotency_keys
 import functools
 
 # Configure job stores
@@ -38,10 +39,19 @@ def register_scheduled_jobs():
     """
     with tracer.start_as_current_span("register_scheduled_jobs"):
         logger.info("Registering scheduled jobs...")
-        
-        
-        # Register jobs from each module
-        register_ai_jobs(scheduler)
+
+        # Register jobs from each enabled module
+        register_cron_jobs(scheduler)
+
+        # Purge expired shared idempotency keys hourly
+        if settings.IDEMPOTENCY_BACKEND == BACKEND_DATABASE:
+            scheduler.add_job(
+                purge_expired_idempotency_keys,
+                'cron',
+                minute=15,
+                id='purge_expired_idempotency_keys',
+                replace_existing=True
+            )
         
         logger.info("All scheduled jobs registered successfully")
 
@@ -52,6 +62,16 @@ def traced_job(func):
         return trace_job(func, *args, **kwargs)
     return wrapper
 
-# Register jobs when this module is imported
-register_scheduled_jobs()
+def start_scheduler():
+    """
+    Register the scheduled jobs and start the scheduler
+    """
+    register_scheduled_jobs()
+    scheduler.start()
 
+def shutdown_scheduler():
+    """
+    Stop the scheduler if it was started
+    """
+    if scheduler.running:
+        scheduler.shutdown()
@@ -1,11 +1,14 @@
 import functools
 import uuid
 from fastapi import Request, Depends
-from opentelemetry import trace
+from opentelemetry import metrics, trace
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.sdk.resources import SERVICE_NAME, Resource
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
 from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
 from app.core.config import settings
 from app.core.response import ResponseModel
@@ -47,6 +50,30 @@ def get_tracer():
     """
     return initialize_tracer()
 
+# Initialize meter
+def initialize_meter():
+    """
+    Initialize the OpenTelemetry meter, exporting to OTLP_ENDPOINT when configured
+    """
+    if settings.ENABLE_TRACING and settings.OTLP_ENDPOINT:
+        reader = PeriodicExportingMetricReader(OTLPMetricExporter(endpoint=settings.OTLP_ENDPOINT))
+        provider = MeterProvider(
+            resource=Resource(attributes={SERVICE_NAME: settings.PROJECT_NAME}),
+            metric_readers=[reader]
+        )
+        metrics.set_meter_provider(provider)
+
+    # A no-op meter unless a provider was set
+    return metrics.get_meter(__name__)
+
+# Get meter instance
+@lru_cache()
+def get_meter():
+    """
+    Get the meter instance
+    """
+    return initialize_meter()
+
 # Trace a function
 def trace_function(func, span_name=None):
     """
@@ -0,0 +1,286 @@
+import base64
+import glob
+import gzip
+import hashlib
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.logger import logger
+
+CAPTURE_SUFFIX = ".jsonl.gz"
+# Files still being written; renamed to CAPTURE_SUFFIX when they rotate
+PARTIAL_SUFFIX = ".jsonl.gz.part"
+BODY_ENCODING_TEXT = "utf-8"
+BODY_ENCODING_BASE64 = "base64"
+
+_STOP = object()
+
+def redact_header(value: str) -> str:
+    """
+    Stand-in for a secret header value: the same secret always maps to the
+    same stand-in, so replayed traffic keeps its per-client shape
+    """
+    return "redacted:" + hashlib.sha256(value.encode("latin-1")).hexdigest()[:16]
+
+def encode_body(body: bytes) -> Tuple[str, str]:
+    """
+    A body as text when it is UTF-8, else base64, with the encoding used
+    """
+    try:
+        return body.decode("utf-8"), BODY_ENCODING_TEXT
+    except UnicodeDecodeError:
+        return base64.b64encode(body).decode(), BODY_ENCODING_BASE64
+
+def decode_body(record: Dict[str, Any]) -> Optional[bytes]:
+    """
+    A captured request body, or None when it was too large to keep
+    """
+    if record.get("body") is None:
+        return None
+    if record.get("body_encoding") == BODY_ENCODING_BASE64:
+        return base64.b64decode(record["body"])
+    return record["body"].encode("utf-8")
+
+class CaptureWriter:
+    """
+    Write captured requests to rotating gzipped JSONL files on a background thread
+
+    Requests only hand raw records to a bounded queue; encoding, redaction,
+    compression and disk writes all happen on the writer thread. When the
+    queue is full, records are dropped and counted, so a slow disk never
+    slows requests. Files rotate after `max_file_bytes` of uncompressed
+    JSONL and only the newest `max_files` are kept. Each process writes its
+    own files, named by start time and pid.
+    """
+    def __init__(
+        self,
+        directory: str,
+        redact_headers: Sequence[str],
+        max_file_bytes: int = 64 * 1024 * 1024,
+        max_files: int = 50,
+        queue_size: int = 10000
+    ):
+        self.directory = directory
+        self.redact_headers = {name.lower().encode("latin-1") for name in redact_headers}
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.captured = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(queue_size, 1))
+        self._thread: Optional[threading.Thread] = None
+        self._file: Optional[gzip.GzipFile] = None
+        self._path: Optional[str] = None
+        self._written = 0
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """
+        Queue a record without blocking; False when it was dropped
+        """
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def start(self):
+        """
+        Start the writer thread
+        """
+        if self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Write what is queued, close the current file and stop the thread
+        """
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+        if self.dropped:
+            logger.warning(f"Traffic capture dropped {self.dropped} records with a full queue")
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            if record is _STOP:
+                break
+            try:
+                self._write(record)
+            except Exception as e:
+                logger.error(f"Error writing traffic capture: {e}")
+        self._close()
+
+    def _write(self, record: Dict[str, Any]):
+        line = orjson.dumps(self._encode(record)) + b"\n"
+        if self._file is None:
+            self._open()
+        self._file.write(line)
+        self.captured += 1
+        self._written += len(line)
+        if self._written >= self.max_file_bytes:
+            self._close()
+
+    def _encode(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        headers = [
+            [
+                name.decode("latin-1"),
+                redact_header(value.decode("latin-1")) if name.lower() in self.redact_headers else value.decode("latin-1")
+            ]
+            for name, value in record.pop("raw_headers")
+        ]
+        chunks = record.pop("body_chunks")
+        if chunks is not None:
+            record["body"], record["body_encoding"] = encode_body(b"".join(chunks))
+        else:
+            record["body"] = None
+        record["headers"] = headers
+        return record
+
+    def _open(self):
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        self._path = os.path.join(self.directory, f"capture-{stamp}-{os.getpid()}{PARTIAL_SUFFIX}")
+        self._file = gzip.open(self._path, "wb")
+        self._written = 0
+
+    def _close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        os.replace(self._path, self._path[:-len(PARTIAL_SUFFIX)] + CAPTURE_SUFFIX)
+        self._file = None
+        self._prune()
+
+    def _prune(self):
+        files = sorted(glob.glob(os.path.join(self.directory, f"capture-*{CAPTURE_SUFFIX}")))
+        for path in files[:max(len(files) - self.max_files, 0)]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+class TrafficCaptureMiddleware:
+    """
+    Record a sampled fraction of requests for offline replay
+
+    Each request under `paths` is sampled with probability `sample_rate`;
+    unsampled requests pass straight through. For sampled ones the body
+    chunks are kept by reference as they are read (dropped past
+    `max_body_bytes`) and the response is only measured: status, bytes,
+    time to first byte and total time. The record goes to `writer` once
+    the response is sent.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        writer: CaptureWriter,
+        sample_rate: float = 0.01,
+        paths: Optional[Sequence[str]] = None,
+        max_body_bytes: int = 1024 * 1024
+    ):
+        self.app = app
+        self.writer = writer
+        self.sample_rate = sample_rate
+        self.paths = tuple(paths or ())
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or (self.paths and not scope["path"].startswith(self.paths))
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        record: Dict[str, Any] = {
+            "timestamp": time.time(),
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "raw_headers": list(scope.get("headers", [])),
+            "body_size": 0,
+            "status": None,
+            "response_bytes": 0,
+            "ttfb_ms": None,
+            "duration_ms": None
+        }
+        chunks: Optional[List[bytes]] = []
+
+        async def receive_wrapper() -> Message:
+            nonlocal chunks
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                record["body_size"] += len(body)
+                if chunks is not None:
+                    if record["body_size"] > self.max_body_bytes:
+                        chunks = None
+                    elif body:
+                        chunks.append(body)
+            return message
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                record["status"] = message["status"]
+                record["ttfb_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            elif message["type"] == "http.response.body":
+                record["response_bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            record["body_chunks"] = chunks
+            self.writer.submit(record)
+
+def capture_files(paths: Iterable[str]) -> List[str]:
+    """
+    Finished capture files from files and directories, oldest first
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, f"*{CAPTURE_SUFFIX}")))
+        else:
+            files.append(path)
+    return sorted(files)
+
+def read_captures(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Records from capture files, in file order
+    """
+    for path in capture_files(paths):
+        with gzip.open(path, "rb") as file:
+            for line in file:
+                if line.strip():
+                    yield orjson.loads(line)
+
+def create_capture_writer() -> CaptureWriter:
+    """
+    Create a writer configured from settings
+    """
+    return CaptureWriter(
+        directory=settings.TRAFFIC_CAPTURE_DIR,
+        redact_headers=settings.TRAFFIC_CAPTURE_REDACT_HEADERS,
+        max_file_bytes=settings.TRAFFIC_CAPTURE_MAX_FILE_BYTES,
+        max_files=settings.TRAFFIC_CAPTURE_MAX_FILES,
+        queue_size=settings.TRAFFIC_CAPTURE_QUEUE_SIZE
+    )
+
+# The writer of this process; started by the lifespan when capture is enabled
+capture_writer = create_capture_writer()
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from opentelemetry import trace
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import engine
+from app.core.logger import logger
+from app.core.modules import ROLE_API, call_hook, get_hooks
+from app.core.response import ResponseModel
+from app.core.tracing import tracer
+
+WARMUP_PENDING = "pending"
+WARMUP_RUNNING = "running"
+WARMUP_COMPLETE = "complete"
+WARMUP_TIMED_OUT = "timed_out"
+
+STEP_OK = "ok"
+STEP_FAILED = "failed"
+STEP_TIMED_OUT = "timed_out"
+
+class WarmupState:
+    """
+    Progress of this process's warm-up
+
+    The process is ready once warm-up completes or times out; failed steps
+    are logged but don't hold readiness back, since the first real request
+    would only retry the same lazy setup.
+    """
+    def __init__(self):
+        self.status = WARMUP_PENDING
+        self.steps: Dict[str, Dict[str, object]] = {}
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status in (WARMUP_COMPLETE, WARMUP_TIMED_OUT)
+
+warmup_state = WarmupState()
+_warmup_task: Optional[asyncio.Task] = None
+
+def _open_pool_connections(count: int) -> int:
+    # Hold every connection at once so the pool opens distinct ones, then return them all
+    pool_size = getattr(engine.pool, "size", None)
+    if callable(pool_size):
+        count = min(count, pool_size())
+    connections = []
+    try:
+        for _ in range(count):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+async def warm_database_pool():
+    """
+    Open WARMUP_DB_CONNECTIONS pooled connections, capped at the pool size
+    """
+    opened = await run_in_threadpool(_open_pool_connections, settings.WARMUP_DB_CONNECTIONS)
+    logger.info(f"Warm-up opened {opened} database connections")
+
+async def warm_tracing_exporter():
+    """
+    Export a span now so the OTLP exporter connects before the first request
+    """
+    provider = trace.get_tracer_provider()
+    if not settings.ENABLE_TRACING or not settings.OTLP_ENDPOINT or not hasattr(provider, "force_flush"):
+        return
+    with tracer.start_as_current_span("warmup"):
+        pass
+    await run_in_threadpool(provider.force_flush, int(settings.WARMUP_TIMEOUT_SECONDS * 1000))
+
+async def warm_response_serialization():
+    """
+    Build and render one standard response the way routes do
+    """
+    content = jsonable_encoder(ResponseModel(trace_id="warmup").success_response(data={"warmup": True}))
+    JSONResponse(content=content).render(content)
+
+async def _run_step(name: str, step: Callable[[], Awaitable[None]]):
+    start = time.perf_counter()
+    try:
+        await step()
+        warmup_state.steps[name] = {"status": STEP_OK}
+    except asyncio.CancelledError:
+        warmup_state.steps[name] = {"status": STEP_TIMED_OUT}
+        raise
+    except Exception as e:
+        logger.warning(f"Warm-up step {name} failed: {e}")
+        warmup_state.steps[name] = {"status": STEP_FAILED, "error": str(e)}
+    warmup_state.steps[name]["durationMs"] = round((time.perf_counter() - start) * 1000, 1)
+
+def _warmup_steps(roles: Set[str]) -> List[Tuple[str, Callable[[], Awaitable[None]]]]:
+    steps = [
+        ("database", warm_database_pool),
+        ("tracing", warm_tracing_exporter)
+    ]
+    if ROLE_API in roles:
+        steps.append(("serialization", warm_response_serialization))
+    for target in get_hooks("warmup", roles):
+        steps.append((target, lambda target=target: call_hook(target)))
+    return steps
+
+async def run_warmup(roles: Set[str], timeout: float):
+    """
+    Run every warm-up step concurrently, giving up on those still running after `timeout`
+    """
+    warmup_state.status = WARMUP_RUNNING
+    warmup_state.started_at = time.monotonic()
+    with tracer.start_as_current_span("application_warmup") as span:
+        tasks = {
+            name: asyncio.ensure_future(_run_step(name, step))
+            for name, step in _warmup_steps(roles)
+        }
+        _, pending = await asyncio.wait(list(tasks.values()), timeout=timeout if timeout > 0 else None)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        warmup_state.duration = time.monotonic() - warmup_state.started_at
+        warmup_state.status = WARMUP_TIMED_OUT if pending else WARMUP_COMPLETE
+        span.set_attribute("warmup.status", warmup_state.status)
+        span.set_attribute("warmup.duration_ms", round(warmup_state.duration * 1000, 1))
+    unfinished = [name for name, step in warmup_state.steps.items() if step["status"] != STEP_OK]
+    summary = f"; not warmed: {', '.join(unfinished)}" if unfinished else ""
+    logger.info(f"Warm-up {warmup_state.status} in {warmup_state.duration:.2f}s{summary}")
+
+def start_warmup(roles: Set[str]):
+    """
+    Start warm-up in the background; marks the process ready at once when disabled
+    """
+    global _warmup_task
+    if not settings.WARMUP_ENABLED:
+        warmup_state.status = WARMUP_COMPLETE
+        return
+    _warmup_task = asyncio.ensure_future(run_warmup(roles, settings.WARMUP_TIMEOUT_SECONDS))
+
+async def wait_for_warmup():
+    """
+    Wait until warm-up has finished
+    """
+    if _warmup_task is not None:
+        await asyncio.shield(_warmup_task)
+
+async def stop_warmup():
+    """
+    Cancel warm-up if it is still running
+    """
+    global _warmup_task
+    if _warmup_task is not None:
+        _warmup_task.cancel()
+        await asyncio.gather(_warmup_task, return_exceptions=True)
+        _warmup_task = None
@@ -0,0 +1,182 @@
+from fastapi import FastAPI, Request, Depends
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+import uuid
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.lifespan import lifespan
+from app.core.modules import include_routers
+from app.core.tracing import tracer, trace_request
+from app.core.response import ResponseModel, create_response
+from app.core.compression import CompressionMiddleware
+from app.core.cache import cached_route
+from app.core.admission import AdmissionControlMiddleware, create_rate_limiter, create_concurrency_limiters
+from app.core.body_limit import BodyLimitMiddleware
+from app.core.db_instrumentation import QueryStatsMiddleware
+from app.core.deadline import DeadlineMiddleware, record_deadline
+from app.core.idempotency import IdempotencyMiddleware, create_shared_idempotency_store
+from app.core.profiling import ProfilingMiddleware, profile_store
+from app.core.traffic_capture import TrafficCaptureMiddleware, capture_writer
+
+app = FastAPI(
+    title=settings.PROJECT_NAME,
+    description=settings.PROJECT_DESCRIPTION,
+    version=settings.PROJECT_VERSION,
+    lifespan=lifespan
+)
+
+# Shed load before it reaches the routes; health probes are exempt
+if settings.ADMISSION_ENABLED:
+    global_limiter, route_limiters = create_concurrency_limiters()
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        rate_limiter=create_rate_limiter(),
+        global_limiter=global_limiter,
+        route_limiters=route_limiters,
+        exempt_paths=settings.ADMISSION_EXEMPT_PATHS
+    )
+
+# Run AI writes at most once per Idempotency-Key; wraps admission so replays skip the limits
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(
+        IdempotencyMiddleware,
+        paths=settings.IDEMPOTENCY_PATHS,
+        header_name=settings.IDEMPOTENCY_HEADER,
+        ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+        max_memory_bytes=settings.IDEMPOTENCY_MEMORY_BYTES,
+        max_response_bytes=settings.IDEMPOTENCY_MAX_RESPONSE_BYTES,
+        shared_store=create_shared_idempotency_store()
+    )
+
+# Cap request bodies as they stream in; wraps idempotency, which reads whole bodies
+app.add_middleware(
+    BodyLimitMiddleware,
+    default_limit=settings.REQUEST_MAX_BODY_BYTES,
+    route_limits=settings.ROUTE_BODY_LIMITS
+)
+
+# Profile requests on demand; only installed when enabled so it costs nothing otherwise
+if settings.PROFILING_ENABLED and settings.DEBUG_TOKEN:
+    app.add_middleware(
+        ProfilingMiddleware,
+        token=settings.DEBUG_TOKEN,
+        store=profile_store,
+        interval=settings.PROFILING_SAMPLE_INTERVAL_MS / 1000
+    )
+
+# Configure CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=settings.CORS_ORIGINS,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Count each request's database statements; inside the interceptor so totals land on the request span
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    app.add_middleware(QueryStatsMiddleware, debug_headers=settings.DEBUG)
+
+# Response interceptor middleware
+@app.middleware("http")
+async def response_interceptor(request: Request, call_next):
+    # Generate trace ID for the request
+    trace_id = str(uuid.uuid4())
+    request.state.trace_id = trace_id
+    
+    # Add trace context to the request
+    with tracer.start_as_current_span(
+        f"{request.method} {request.url.path}",
+        attributes={
+            "http.method": request.method,
+            "http.url": str(request.url),
+            "trace_id": trace_id
+        }
+    ) as span:
+        try:
+            # Process the request
+            response = await call_next(request)
+            record_deadline(span)
+            
+            # If the response is already a JSONResponse, we need to modify its content
+            if isinstance(response, JSONResponse):
+                content = response.body.decode()
+                
+                # Only intercept JSON responses that aren't already in our format
+                if content and "meta" not in content:
+                    import json
+                    data = json.loads(content)
+                    
+                    # Create standardized response
+                    new_content = create_response(
+                        data=data,
+                        trace_id=trace_id,
+                        is_success=True,
+                        message="Success"
+                    )
+                    
+                    return JSONResponse(
+                        content=new_content,
+                        status_code=response.status_code,
+                        headers=dict(response.headers)
+                    )
+            
+            return response
+        except Exception as e:
+            logger.exception(f"Error processing request: {e}")
+            span.record_exception(e)
+            
+            # Create error response
+            error_response = create_response(
+                data=None,
+                trace_id=trace_id,
+                is_success=False,
+                message="Internal Server Error",
+                error=str(e)
+            )
+            
+            return JSONResponse(
+                content=error_response,
+                status_code=500
+            )
+
+# Bound every request with a deadline and cancel it when the client disconnects
+if settings.REQUEST_DEADLINE_ENABLED:
+    app.add_middleware(
+        DeadlineMiddleware,
+        header_name=settings.REQUEST_TIMEOUT_HEADER,
+        default_timeout=settings.REQUEST_TIMEOUT_SECONDS,
+        max_timeout=settings.REQUEST_TIMEOUT_MAX_SECONDS,
+        route_timeouts=settings.ROUTE_TIMEOUTS
+    )
+
+# Compress responses; added last so it wraps every other middleware
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY
+    )
+
+# Sample requests for offline replay; outermost, so timings and sizes are what clients see
+if settings.TRAFFIC_CAPTURE_ENABLED:
+    app.add_middleware(
+        TrafficCaptureMiddleware,
+        writer=capture_writer,
+        sample_rate=settings.TRAFFIC_CAPTURE_SAMPLE_RATE,
+        paths=settings.TRAFFIC_CAPTURE_PATHS,
+        max_body_bytes=settings.TRAFFIC_CAPTURE_MAX_BODY_BYTES
+    )
+
+# Include the routers of enabled modules
+include_routers(app)
+
+@app.get("/", tags=["Root"])
+@cached_route(ttl=60)
+async def root(response: ResponseModel = Depends(trace_request)):
+    return response.success_response(
+        data=f"Welcome to {settings.PROJECT_NAME} API",
+        message="API is running"
+    )
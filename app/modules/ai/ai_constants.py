@@ -2,6 +2,50 @@
 MODEL_OPENAI_GPT4 = "gpt-4"
 MODEL_OPENAI_GPT35_TURBO = "gpt-3.5-turbo"
 MODEL_GOOGLE_GEMINI_PRO = "gemini-pro"
+MODEL_FAKE_OPENAI = "fake-openai"
+MODEL_FAKE_GEMINI = "fake-gemini"
+
+# Embedding model constants
+MODEL_OPENAI_EMBEDDING = "text-embedding-3-small"
+MODEL_GOOGLE_EMBEDDING = "text-embedding-004"
+MODEL_FAKE_EMBEDDING = "fake-embedding"
+GOOGLE_EMBEDDING_MAX_BATCH = 100
+
+# Provider names, used for circuit breakers and bulkheads
+PROVIDER_OPENAI = "openai"
+PROVIDER_GOOGLE = "google"
+PROVIDER_FAKE = "fake"
+
+# Background job types
+JOB_TYPE_COMPLETION = "ai.completion"
+JOB_TYPE_CHAT = "ai.chat"
+JOB_TYPE_EMBEDDINGS = "ai.embeddings"
+
+# Completion history
+HISTORY_TYPE_COMPLETION = "completion"
+HISTORY_TYPE_CHAT = "chat"
+EXPORT_FORMAT_NDJSON = "ndjson"
+EXPORT_FORMAT_CSV = "csv"
+
+# Completion history retention
+RETENTION_ARCHIVE_NONE = "none"
+RETENTION_ARCHIVE_LOCAL = "local"
+RETENTION_ARCHIVE_S3 = "s3"
+# Progress scope of the default policy, which covers every model without its own
+RETENTION_DEFAULT_SCOPE = "*"
+
+# Usage ledger
+USAGE_INTERVAL_MINUTE = "minute"
+USAGE_INTERVAL_HOUR = "hour"
+USAGE_INTERVAL_DAY = "day"
+# Source of usage outside a request, e.g. background jobs
+USAGE_ROUTE_BACKGROUND = "background"
+USAGE_CLIENT_INTERNAL = "internal"
+
+# Fake provider modes
+FAKE_PROVIDER_OFF = "off"
+FAKE_PROVIDER_MODELS = "models"
+FAKE_PROVIDER_ALL = "all"
 
 # AI request constants
 MAX_TOKENS = 1000
@@ -15,4 +59,23 @@ ERROR_API_KEY_MISSING = "API key is missing"
 ERROR_MODEL_NOT_SUPPORTED = "Model not supported"
 ERROR_REQUEST_FAILED = "Request to AI service failed"
 ERROR_INVALID_PROMPT = "Invalid prompt"
+ERROR_RATE_LIMITED = "AI provider rate limit exceeded"
+ERROR_PROVIDER_TIMEOUT = "AI provider request timed out"
+ERROR_PROVIDER_UNAVAILABLE = "AI provider temporarily unavailable"
+ERROR_TOO_MANY_INPUTS = "Too many inputs in one request"
+ERROR_EMBEDDING_DIMENSIONS = "Embedding dimensions do not match the vector index"
+ERROR_VECTOR_NOT_FOUND = "Vector not found"
+ERROR_INVALID_CURSOR = "Invalid history cursor"
+ERROR_USAGE_BUDGET_EXCEEDED = "Token budget exceeded for this client"
+
 
+# Success messages
+MSG_COMPLETION_OK = "Completion generated successfully"
+MSG_CHAT_COMPLETION_OK = "Chat completion generated successfully"
+MSG_EMBEDDINGS_OK = "Embeddings generated successfully"
+MSG_VECTORS_UPSERTED = "Vectors stored successfully"
+MSG_VECTOR_SEARCH_OK = "Vector search completed successfully"
+MSG_VECTOR_DELETED = "Vector deleted successfully"
+MSG_HISTORY_OK = "Completion history retrieved successfully"
+MSG_USAGE_OK = "Usage retrieved successfully"
+MSG_USAGE_BUDGET_OK = "Usage budget retrieved successfully"
@@ -0,0 +1,250 @@
+import json
+from datetime import datetime
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from .ai_service import generate_completion, generate_chat_completion, stream_chat_completion
+from .ai_history_service import list_history, export_history
+from .ai_usage_service import bind_usage_source, query_usage, get_usage_budget
+from .ai_embedding_service import generate_embeddings, upsert_vectors, search_vectors, delete_vector
+from .ai_models import AIPrompt, AIChatRequest, AIEmbeddingRequest, AIVectorUpsertRequest, AIVectorSearchRequest
+from .ai_constants import (
+    MSG_COMPLETION_OK,
+    MSG_CHAT_COMPLETION_OK,
+    MSG_EMBEDDINGS_OK,
+    MSG_VECTORS_UPSERTED,
+    MSG_VECTOR_SEARCH_OK,
+    MSG_VECTOR_DELETED,
+    MSG_HISTORY_OK,
+    MSG_USAGE_OK,
+    MSG_USAGE_BUDGET_OK,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_NDJSON,
+    USAGE_INTERVAL_MINUTE,
+    USAGE_INTERVAL_HOUR,
+    USAGE_INTERVAL_DAY
+)
+from app.core.config import settings
+from app.core.logger import setup_logging
+from app.core.orjson_route import ORJSONRoute
+from app.core.response import ResponseModel
+from app.core.tracing import trace_request
+
+logger = setup_logging()
+router = APIRouter(route_class=ORJSONRoute)
+
+@router.post("/completions", dependencies=[Depends(bind_usage_source)])
+async def create_completion(prompt: AIPrompt, response: ResponseModel = Depends(trace_request)):
+    """
+    Generate a text completion
+
+    Returns:
+        dict: AI response
+    """
+    logger.info(f"Completion requested for {prompt.model} - Trace ID: {response.trace_id}")
+    result = await generate_completion(prompt)
+
+    return response.success_response(
+        data=result.model_dump(),
+        message=MSG_COMPLETION_OK
+    )
+
+@router.post("/chat", dependencies=[Depends(bind_usage_source)])
+async def create_chat_completion(request: AIChatRequest, response: ResponseModel = Depends(trace_request)):
+    """
+    Generate a chat completion
+
+    Returns:
+        dict: AI chat response
+    """
+    logger.info(f"Chat completion requested for {request.model} - Trace ID: {response.trace_id}")
+    result = await generate_chat_completion(request)
+
+    return response.success_response(
+        data=result.model_dump(),
+        message=MSG_CHAT_COMPLETION_OK
+    )
+
+async def _sse_events(first_delta: str, deltas: AsyncIterator[str], trace_id: str) -> AsyncIterator[str]:
+    try:
+        yield f"data: {json.dumps({'delta': first_delta})}\n\n"
+        async for delta in deltas:
+            yield f"data: {json.dumps({'delta': delta})}\n\n"
+    except HTTPException as e:
+        logger.error(f"Chat stream failed - Trace ID: {trace_id}: {e.detail}")
+        yield f"event: error\ndata: {json.dumps({'error': e.detail, 'traceId': trace_id})}\n\n"
+        return
+    yield f"event: done\ndata: {json.dumps({'traceId': trace_id})}\n\n"
+
+@router.post("/chat/stream", dependencies=[Depends(bind_usage_source)])
+async def stream_chat(request: AIChatRequest, response: ResponseModel = Depends(trace_request)):
+    """
+    Stream a chat completion as server-sent events
+
+    Returns:
+        StreamingResponse: `data: {"delta": ...}` events followed by a `done` event
+    """
+    logger.info(f"Chat stream requested for {request.model} - Trace ID: {response.trace_id}")
+    deltas = stream_chat_completion(request)
+
+    # Pull the first delta before responding so provider errors (e.g. 429) keep their status code
+    try:
+        first_delta = await deltas.__anext__()
+    except StopAsyncIteration:
+        first_delta = ""
+
+    return StreamingResponse(
+        _sse_events(first_delta, deltas, response.trace_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@router.post("/embeddings", dependencies=[Depends(bind_usage_source)])
+async def create_embeddings(request: AIEmbeddingRequest, response: ResponseModel = Depends(trace_request)):
+    """
+    Generate embeddings for a list of inputs
+
+    Returns:
+        dict: One embedding per input, in order
+    """
+    logger.info(f"Embeddings requested for {len(request.inputs)} inputs with {request.model} - Trace ID: {response.trace_id}")
+    result = await generate_embeddings(request)
+
+    return response.success_response(
+        data=result.model_dump(),
+        message=MSG_EMBEDDINGS_OK
+    )
+
+@router.post("/vectors", dependencies=[Depends(bind_usage_source)])
+async def create_vectors(request: AIVectorUpsertRequest, response: ResponseModel = Depends(trace_request)):
+    """
+    Embed texts and store them in the vector index, replacing existing IDs
+
+    Returns:
+        dict: Number of vectors stored
+    """
+    logger.info(f"Vector upsert of {len(request.items)} items with {request.model} - Trace ID: {response.trace_id}")
+    stored = await upsert_vectors(request)
+
+    return response.success_response(
+        data={"stored": stored},
+        message=MSG_VECTORS_UPSERTED
+    )
+
+@router.post("/vectors/search", dependencies=[Depends(bind_usage_source)])
+async def search_vector_index(request: AIVectorSearchRequest, response: ResponseModel = Depends(trace_request)):
+    """
+    Find the stored texts most similar to a query
+
+    Returns:
+        dict: Matches with cosine similarity scores, best first
+    """
+    logger.info(f"Vector search with {request.model} - Trace ID: {response.trace_id}")
+    matches = await search_vectors(request)
+
+    return response.success_response(
+        data=[match.model_dump() for match in matches],
+        message=MSG_VECTOR_SEARCH_OK
+    )
+
+@router.delete("/vectors/{model}/{vector_id}")
+async def remove_vector(model: str, vector_id: str, response: ResponseModel = Depends(trace_request)):
+    """
+    Delete a stored vector
+
+    Returns:
+        dict: Deleted vector ID
+    """
+    logger.info(f"Vector delete {vector_id} from {model} - Trace ID: {response.trace_id}")
+    await delete_vector(model, vector_id)
+
+    return response.success_response(
+        data={"id": vector_id},
+        message=MSG_VECTOR_DELETED
+    )
+
+@router.get("/history")
+async def get_history(
+    model: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=settings.AI_HISTORY_MAX_PAGE_SIZE),
+    response: ResponseModel = Depends(trace_request)
+):
+    """
+    List stored completions newest first, optionally for one model and a [start, end) range
+
+    Returns:
+        dict: Completions and the cursor of the next page, null on the last page
+    """
+    logger.info(f"Completion history requested - Trace ID: {response.trace_id}")
+    page = await list_history(model, start, end, cursor, limit)
+
+    return response.success_response(
+        data=page.model_dump(),
+        message=MSG_HISTORY_OK
+    )
+
+@router.get("/history/export")
+async def get_history_export(
+    format: str = Query(EXPORT_FORMAT_NDJSON, pattern=f"^({EXPORT_FORMAT_NDJSON}|{EXPORT_FORMAT_CSV})$"),
+    model: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    response: ResponseModel = Depends(trace_request)
+):
+    """
+    Stream stored completions oldest first as NDJSON or CSV
+
+    Returns:
+        StreamingResponse: One completion per line
+    """
+    logger.info(f"Completion history export as {format} - Trace ID: {response.trace_id}")
+    media_type = "text/csv" if format == EXPORT_FORMAT_CSV else "application/x-ndjson"
+
+    return StreamingResponse(
+        export_history(format, model, start, end),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="completion-history.{format}"'}
+    )
+
+@router.get("/usage")
+async def get_usage(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    interval: str = Query(
+        USAGE_INTERVAL_HOUR,
+        pattern=f"^({USAGE_INTERVAL_MINUTE}|{USAGE_INTERVAL_HOUR}|{USAGE_INTERVAL_DAY})$"
+    ),
+    model: Optional[str] = None,
+    route: Optional[str] = None,
+    client: Optional[str] = None,
+    response: ResponseModel = Depends(trace_request)
+):
+    """
+    Token usage per interval, model, route and client over [start, end), the last 24 hours by default
+
+    Returns:
+        dict: Usage rollups and their totals
+    """
+    logger.info(f"Usage requested - Trace ID: {response.trace_id}")
+    report = await query_usage(start, end, interval, model, route, client)
+
+    return response.success_response(
+        data=report.model_dump(),
+        message=MSG_USAGE_OK
+    )
+
+@router.get("/usage/budget")
+async def get_budget(request: Request, response: ResponseModel = Depends(trace_request)):
+    """
+    The calling client's token budget and usage in the current window
+
+    Returns:
+        dict: Budget, tokens used and remaining, and when the window resets
+    """
+    return response.success_response(
+        data=get_usage_budget(request).model_dump(),
+        message=MSG_USAGE_BUDGET_OK
+    )
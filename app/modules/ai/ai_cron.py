@@ -1,22 +1,22 @@
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
 from app.core.logger import logger
+from app.core.tracing import trace_job
+from .ai_retention import apply_retention
 
 def clean_old_completions():
     """
-    Clean old AI completions from the database
+    Archive and delete completion history past its retention
     """
     logger.info("Running scheduled job: clean_old_completions")
-    db = SessionLocal()
     try:
-        # Implementation would depend on how completions are stored
-        # This is a placeholder for the actual implementation
-        logger.info("Old completions cleaned successfully")
+        stats = trace_job(apply_retention)
+        state = "done" if stats.completed else "paused until the next run"
+        logger.info(
+            f"Old completions cleaned ({state}): {stats.deleted_rows} deleted, "
+            f"{stats.archived_rows} archived in {stats.archive_files} files, {stats.seconds}s"
+        )
     except Exception as e:
         logger.error(f"Error cleaning old completions: {e}")
-    finally:
-        db.close()
 
 def update_model_cache():
     """
@@ -34,11 +34,10 @@ def register_jobs(scheduler: BackgroundScheduler):
     """
     Register AI module cron jobs
     """
-    # Clean old completions monthly
+    # Clean old completions daily, in small batches
     scheduler.add_job(
         clean_old_completions,
         'cron',
-        day=1,
         hour=2,
         minute=0,
         id='clean_old_completions',
@@ -0,0 +1,288 @@
+import asyncio
+import contextvars
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.logger import setup_logging
+from app.core.tracing import get_tracer, trace_function
+from .ai_constants import (
+    MODEL_OPENAI_EMBEDDING,
+    MODEL_GOOGLE_EMBEDDING,
+    MODEL_FAKE_EMBEDDING,
+    GOOGLE_EMBEDDING_MAX_BATCH,
+    PROVIDER_OPENAI,
+    PROVIDER_GOOGLE,
+    PROVIDER_FAKE,
+    ERROR_MODEL_NOT_SUPPORTED,
+    ERROR_TOO_MANY_INPUTS,
+    ERROR_EMBEDDING_DIMENSIONS,
+    ERROR_VECTOR_NOT_FOUND
+)
+from .ai_models import (
+    AIEmbeddingRequest,
+    AIEmbeddingResponse,
+    AIVectorUpsertRequest,
+    AIVectorSearchRequest,
+    AIVectorMatch
+)
+from .ai_fake_provider import is_fake_model, generate_fake_embeddings
+from .ai_service import (
+    get_openai_client,
+    get_google_ai_client,
+    provider_call,
+    provider_http_exception,
+    provider_timeout
+)
+from .ai_usage_service import estimate_tokens, record_usage
+from .ai_vector_index import get_vector_index
+
+logger = setup_logging()
+tracer = get_tracer()
+
+EMBEDDING_PROVIDERS = {
+    MODEL_OPENAI_EMBEDDING: PROVIDER_OPENAI,
+    MODEL_GOOGLE_EMBEDDING: PROVIDER_GOOGLE,
+    MODEL_FAKE_EMBEDDING: PROVIDER_FAKE
+}
+
+def get_embedding_provider(model: str) -> str:
+    """
+    Name of the provider serving an embedding model
+    """
+    if model not in EMBEDDING_PROVIDERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MODEL_NOT_SUPPORTED
+        )
+    return PROVIDER_FAKE if is_fake_model(model) else EMBEDDING_PROVIDERS[model]
+
+def _apportion(total: int, texts: Sequence[str]) -> List[int]:
+    # Split a batch's token count across its inputs by length
+    lengths = [max(len(text), 1) for text in texts]
+    scale = total / sum(lengths)
+    return [int(round(length * scale)) for length in lengths]
+
+async def _embed_upstream(provider: str, model: str, texts: List[str]) -> Tuple[List[List[float]], List[int]]:
+    with tracer.start_as_current_span(
+        "embed_upstream",
+        attributes={"ai.provider": provider, "ai.model": model, "ai.inputs": len(texts)}
+    ):
+        if provider == PROVIDER_FAKE:
+            embeddings, tokens = await generate_fake_embeddings(model, texts)
+        elif provider == PROVIDER_OPENAI:
+            response = await get_openai_client().embeddings.create(
+                model=model,
+                input=texts,
+                dimensions=settings.AI_EMBEDDING_DIMENSIONS,
+                timeout=provider_timeout()
+            )
+            embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            tokens = response.usage.prompt_tokens
+        else:
+            result = await get_google_ai_client().embed_content_async(
+                model=f"models/{model}",
+                content=texts,
+                output_dimensionality=settings.AI_EMBEDDING_DIMENSIONS,
+                request_options={"timeout": provider_timeout()}
+            )
+            embeddings = result["embedding"]
+            # Gemini does not report usage for embeddings; approximate it
+            tokens = sum(max(estimate_tokens(text), 1) for text in texts)
+
+        return embeddings, _apportion(tokens, texts)
+
+class EmbeddingBatcher:
+    """
+    Pack inputs from concurrent requests into shared upstream calls
+
+    Inputs queue for at most `max_wait` seconds, or until `max_batch` are
+    pending, then go upstream as one batch under the provider's bulkhead and
+    circuit breaker. A batch is not owned by any one request, so it runs
+    outside the callers' deadlines and is not cancelled if one disconnects.
+    """
+    def __init__(self, provider: str, model: str, max_batch: int, max_wait: float):
+        self.provider = provider
+        self.model = model
+        self.max_batch = max(max_batch, 1)
+        self.max_wait = max_wait
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def embed(self, texts: Sequence[str]) -> Tuple[List[List[float]], int]:
+        """
+        Embed texts, sharing upstream calls with concurrent callers
+
+        Returns:
+            tuple: (embeddings, prompt tokens)
+        """
+        loop = asyncio.get_event_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.append((text, future))
+            futures.append(future)
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+        if self._pending and self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        results = await asyncio.gather(*futures)
+        return [vector for vector, _ in results], sum(tokens for _, tokens in results)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            # A fresh context keeps the first caller's deadline off the shared batch
+            contextvars.Context().run(asyncio.ensure_future, self._run(batch))
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        texts = [text for text, _ in batch]
+        try:
+            async with provider_call(self.model, self.provider):
+                embeddings, tokens = await _embed_upstream(self.provider, self.model, texts)
+            for (_, future), vector, count in zip(batch, embeddings, tokens):
+                if not future.done():
+                    future.set_result((vector, count))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+_batchers: Dict[Tuple[str, str], EmbeddingBatcher] = {}
+
+def get_embedding_batcher(model: str) -> EmbeddingBatcher:
+    """
+    Get the process-wide batcher for an embedding model
+    """
+    provider = get_embedding_provider(model)
+    batcher = _batchers.get((provider, model))
+    if batcher is None:
+        max_batch = settings.AI_EMBEDDING_BATCH_SIZE
+        if provider == PROVIDER_GOOGLE:
+            max_batch = min(max_batch, GOOGLE_EMBEDDING_MAX_BATCH)
+        batcher = _batchers[(provider, model)] = EmbeddingBatcher(
+            provider,
+            model,
+            max_batch,
+            settings.AI_EMBEDDING_BATCH_WAIT_MS / 1000
+        )
+    return batcher
+
+async def embed_texts(model: str, texts: Sequence[str]) -> Tuple[List[List[float]], int]:
+    """
+    Embed texts with a supported embedding model
+
+    Returns:
+        tuple: (embeddings, prompt tokens)
+    """
+    if len(texts) > settings.AI_EMBEDDING_MAX_INPUTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_TOO_MANY_INPUTS
+        )
+
+    batcher = get_embedding_batcher(model)
+    try:
+        embeddings, tokens = await batcher.embed(texts)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating embeddings: {e}")
+        raise provider_http_exception(e)
+
+    if any(len(vector) != settings.AI_EMBEDDING_DIMENSIONS for vector in embeddings):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ERROR_EMBEDDING_DIMENSIONS
+        )
+    record_usage(model, {"prompt_tokens": tokens})
+    return embeddings, tokens
+
+@trace_function
+async def generate_embeddings(request: AIEmbeddingRequest) -> AIEmbeddingResponse:
+    """
+    Generate embeddings for a list of inputs
+
+    Args:
+        request: AI embedding request
+
+    Returns:
+        AIEmbeddingResponse: One embedding per input, in order
+    """
+    with tracer.start_as_current_span(
+        "generate_embeddings",
+        attributes={"ai.model": request.model, "ai.inputs": len(request.inputs)}
+    ):
+        embeddings, tokens = await embed_texts(request.model, request.inputs)
+        return AIEmbeddingResponse(
+            embeddings=embeddings,
+            model=request.model,
+            usage={"prompt_tokens": tokens, "total_tokens": tokens}
+        )
+
+@trace_function
+async def upsert_vectors(request: AIVectorUpsertRequest) -> int:
+    """
+    Embed items and store them in the model's vector index, replacing existing IDs
+
+    Args:
+        request: AI vector upsert request
+
+    Returns:
+        int: Number of vectors stored
+    """
+    with tracer.start_as_current_span(
+        "upsert_vectors",
+        attributes={"ai.model": request.model, "ai.items": len(request.items)}
+    ):
+        embeddings, _ = await embed_texts(request.model, [item.text for item in request.items])
+        index = get_vector_index(request.model)
+        await run_in_threadpool(
+            index.add,
+            [item.id for item in request.items],
+            np.asarray(embeddings, dtype=np.float32),
+            [item.metadata for item in request.items]
+        )
+        return len(request.items)
+
+@trace_function
+async def search_vectors(request: AIVectorSearchRequest) -> List[AIVectorMatch]:
+    """
+    Find the stored vectors most similar to a query
+
+    Args:
+        request: AI vector search request
+
+    Returns:
+        list: Matches, best first
+    """
+    with tracer.start_as_current_span(
+        "search_vectors",
+        attributes={"ai.model": request.model, "ai.top_k": request.top_k}
+    ) as span:
+        embeddings, _ = await embed_texts(request.model, [request.query])
+        index = get_vector_index(request.model)
+        matches = await run_in_threadpool(index.search, np.asarray(embeddings[0], dtype=np.float32), request.top_k)
+        span.set_attribute("vector_index.size", len(index))
+        return [AIVectorMatch(id=vector_id, score=score, metadata=metadata) for vector_id, score, metadata in matches]
+
+@trace_function
+async def delete_vector(model: str, vector_id: str):
+    """
+    Delete a stored vector
+
+    Raises:
+        HTTPException: 404 if the ID is not in the model's index
+    """
+    get_embedding_provider(model)
+    deleted = await run_in_threadpool(get_vector_index(model).delete, [vector_id])
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_VECTOR_NOT_FOUND
+        )
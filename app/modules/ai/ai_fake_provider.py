@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import random
+import time
+from typing import AsyncIterator, Dict, Any, List, Sequence, Tuple
+import numpy as np
+from app.core.config import settings
+from app.core.logger import setup_logging
+from app.core.tracing import get_tracer
+from .ai_constants import (
+    MODEL_OPENAI_GPT4,
+    MODEL_OPENAI_GPT35_TURBO,
+    MODEL_GOOGLE_GEMINI_PRO,
+    MODEL_FAKE_OPENAI,
+    MODEL_FAKE_GEMINI,
+    MODEL_FAKE_EMBEDDING,
+    MODEL_OPENAI_EMBEDDING,
+    MODEL_GOOGLE_EMBEDDING,
+    FAKE_PROVIDER_MODELS,
+    FAKE_PROVIDER_ALL,
+    ERROR_RATE_LIMITED
+)
+from .ai_models import AIPrompt, AIResponse, AIChatRequest, AIChatResponse, AIMessage
+
+logger = setup_logging()
+tracer = get_tracer()
+
+FAKE_MODELS = (MODEL_FAKE_OPENAI, MODEL_FAKE_GEMINI, MODEL_FAKE_EMBEDDING)
+GEMINI_FLAVORED_MODELS = (MODEL_FAKE_GEMINI, MODEL_GOOGLE_GEMINI_PRO)
+
+VOCABULARY = (
+    "the", "request", "latency", "model", "token", "stream", "pool", "worker",
+    "cache", "budget", "provider", "response", "queue", "retry", "window", "tail",
+    "throughput", "connection", "deadline", "payload", "backend", "signal", "load", "shard"
+)
+
+# Fault injection draws from one process-wide generator so a seeded run
+# produces the same sequence of failures
+_fault_random = random.Random(settings.AI_FAKE_SEED)
+
+class FakeProviderError(Exception):
+    """
+    Error raised by the fake provider to emulate an upstream failure
+    """
+    status_code = 500
+
+class FakeRateLimitError(FakeProviderError):
+    """
+    Error raised by the fake provider to emulate an upstream 429
+    """
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def is_fake_model(model: str) -> bool:
+    """
+    Check whether a model is served by the fake provider
+    """
+    if settings.AI_FAKE_PROVIDER == FAKE_PROVIDER_ALL:
+        return model in FAKE_MODELS or model in (
+            MODEL_OPENAI_GPT4,
+            MODEL_OPENAI_GPT35_TURBO,
+            MODEL_GOOGLE_GEMINI_PRO,
+            MODEL_OPENAI_EMBEDDING,
+            MODEL_GOOGLE_EMBEDDING
+        )
+    if settings.AI_FAKE_PROVIDER == FAKE_PROVIDER_MODELS:
+        return model in FAKE_MODELS
+    return False
+
+def _generate_tokens(model: str, prompt: str, max_tokens: int) -> List[str]:
+    count = max(min(settings.AI_FAKE_OUTPUT_TOKENS, max_tokens or settings.AI_FAKE_OUTPUT_TOKENS), 1)
+    digest = hashlib.sha256(f"{settings.AI_FAKE_SEED}:{model}:{prompt}".encode()).digest()
+    rng = random.Random(digest)
+    words = [rng.choice(VOCABULARY) for _ in range(count)]
+    return [words[0]] + [f" {word}" for word in words[1:]]
+
+def _count_tokens(text: str) -> int:
+    return max(len(text) // 4, 1)
+
+def _inject_faults():
+    if settings.AI_FAKE_RATE_LIMIT_RATE and _fault_random.random() < settings.AI_FAKE_RATE_LIMIT_RATE:
+        raise FakeRateLimitError(ERROR_RATE_LIMITED, settings.AI_FAKE_RETRY_AFTER)
+    if settings.AI_FAKE_ERROR_RATE and _fault_random.random() < settings.AI_FAKE_ERROR_RATE:
+        raise FakeProviderError("Fake provider injected error")
+
+def _token_delay() -> float:
+    return 1.0 / settings.AI_FAKE_TOKENS_PER_SECOND if settings.AI_FAKE_TOKENS_PER_SECOND > 0 else 0.0
+
+async def _wait_for_generation(token_count: int):
+    delay = settings.AI_FAKE_TTFT_MS / 1000 + token_count * _token_delay()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+def _raw_response(model: str, text: str, usage: Dict[str, int], chat: bool) -> Dict[str, Any]:
+    if model in GEMINI_FLAVORED_MODELS:
+        return {
+            "text": text,
+            "usage_metadata": {
+                "prompt_token_count": usage["prompt_tokens"],
+                "candidates_token_count": usage["completion_tokens"],
+                "total_token_count": usage["total_tokens"]
+            }
+        }
+
+    choice = {"index": 0, "finish_reason": "stop", "logprobs": None}
+    if chat:
+        choice["message"] = {"role": "assistant", "content": text}
+    else:
+        choice["text"] = text
+    return {
+        "id": f"fake-{hashlib.md5(text.encode()).hexdigest()[:24]}",
+        "object": "chat.completion" if chat else "text_completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [choice],
+        "usage": usage
+    }
+
+def _usage(prompt_text: str, tokens: List[str]) -> Dict[str, int]:
+    prompt_tokens = _count_tokens(prompt_text)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(tokens),
+        "total_tokens": prompt_tokens + len(tokens)
+    }
+
+def _chat_prompt(request: AIChatRequest) -> str:
+    return "\n".join(f"{msg['role']}: {msg['content']}" for msg in request.messages)
+
+async def generate_fake_completion(prompt: AIPrompt) -> AIResponse:
+    """
+    Emulate a text completion with configured latency and faults
+
+    Args:
+        prompt: AI prompt
+
+    Returns:
+        AIResponse: AI response
+    """
+    with tracer.start_as_current_span("generate_fake_completion", attributes={"ai.model": prompt.model}):
+        _inject_faults()
+        tokens = _generate_tokens(prompt.model, prompt.text, prompt.max_tokens)
+        await _wait_for_generation(len(tokens))
+
+        text = "".join(tokens)
+        usage = _usage(prompt.text, tokens)
+        return AIResponse(
+            text=text,
+            model=prompt.model,
+            usage=usage,
+            raw_response=_raw_response(prompt.model, text, usage, chat=False)
+        )
+
+async def generate_fake_chat_completion(request: AIChatRequest) -> AIChatResponse:
+    """
+    Emulate a chat completion with configured latency and faults
+
+    Args:
+        request: AI chat request
+
+    Returns:
+        AIChatResponse: AI chat response
+    """
+    with tracer.start_as_current_span("generate_fake_chat_completion", attributes={"ai.model": request.model}):
+        _inject_faults()
+        prompt_text = _chat_prompt(request)
+        tokens = _generate_tokens(request.model, prompt_text, request.max_tokens)
+        await _wait_for_generation(len(tokens))
+
+        text = "".join(tokens)
+        usage = _usage(prompt_text, tokens)
+        return AIChatResponse(
+            message=AIMessage(role="assistant", content=text),
+            model=request.model,
+            usage=usage,
+            raw_response=_raw_response(request.model, text, usage, chat=True)
+        )
+
+async def stream_fake_chat_completion(request: AIChatRequest, usage: Dict[str, int]) -> AsyncIterator[str]:
+    """
+    Emulate a streamed chat completion, yielding one token at a time
+
+    The first token arrives after AI_FAKE_TTFT_MS, the rest at
+    AI_FAKE_TOKENS_PER_SECOND.
+
+    Args:
+        request: AI chat request
+        usage: Filled with the token usage once the stream ends
+
+    Yields:
+        str: Text deltas
+    """
+    _inject_faults()
+    prompt_text = _chat_prompt(request)
+    tokens = _generate_tokens(request.model, prompt_text, request.max_tokens)
+    delay = _token_delay()
+
+    if settings.AI_FAKE_TTFT_MS > 0:
+        await asyncio.sleep(settings.AI_FAKE_TTFT_MS / 1000)
+    for index, token in enumerate(tokens):
+        if index and delay:
+            await asyncio.sleep(delay)
+        yield token
+    usage.update(_usage(prompt_text, tokens))
+
+async def generate_fake_embeddings(model: str, texts: Sequence[str]) -> Tuple[List[List[float]], int]:
+    """
+    Emulate one batched embedding call with configured latency and faults
+
+    Each text maps to a deterministic unit vector of AI_EMBEDDING_DIMENSIONS.
+
+    Args:
+        model: Embedding model
+        texts: Inputs to embed
+
+    Returns:
+        tuple: (embeddings, prompt tokens)
+    """
+    with tracer.start_as_current_span("generate_fake_embeddings", attributes={"ai.model": model, "ai.inputs": len(texts)}):
+        _inject_faults()
+        if settings.AI_FAKE_TTFT_MS > 0:
+            await asyncio.sleep(settings.AI_FAKE_TTFT_MS / 1000)
+
+        embeddings = []
+        for text in texts:
+            digest = hashlib.sha256(f"{settings.AI_FAKE_SEED}:{model}:{text}".encode()).digest()
+            vector = np.random.default_rng(int.from_bytes(digest[:8], "little")).standard_normal(settings.AI_EMBEDDING_DIMENSIONS)
+            embeddings.append((vector / np.linalg.norm(vector)).tolist())
+        return embeddings, sum(_count_tokens(text) for text in texts)
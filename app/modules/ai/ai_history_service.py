@@ -0,0 +1,222 @@
+import base64
+import csv
+import io
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy import insert, select, tuple_
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.db_instrumentation import query_scope
+from app.core.logger import setup_logging
+from .ai_constants import EXPORT_FORMAT_CSV, ERROR_INVALID_CURSOR
+from .ai_models import AICompletionHistory, AICompletionHistoryPage
+from .ai_tables import AICompletion
+
+logger = setup_logging()
+
+HISTORY_COLUMNS = (
+    AICompletion.id,
+    AICompletion.type,
+    AICompletion.model,
+    AICompletion.prompt,
+    AICompletion.response,
+    AICompletion.prompt_tokens,
+    AICompletion.completion_tokens,
+    AICompletion.created_at
+)
+CSV_HEADER = ["id", "type", "model", "prompt", "response", "prompt_tokens", "completion_tokens", "created_at"]
+
+Cursor = Tuple[datetime, int]
+
+def _utcnow() -> datetime:
+    # Naive UTC: SQLite drops timezone info, so store every timestamp the same way
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _isoformat(value: datetime) -> str:
+    return value.replace(tzinfo=timezone.utc).isoformat()
+
+def _insert_completion(values: Dict[str, object]):
+    with SessionLocal() as db:
+        db.execute(insert(AICompletion).values(**values))
+        db.commit()
+
+async def record_completion(
+    completion_type: str,
+    model: str,
+    prompt: str,
+    response: str,
+    usage: Optional[Dict[str, int]] = None
+):
+    """
+    Store a completion in the history; failures are logged, never raised to the caller
+    """
+    if not settings.AI_HISTORY_ENABLED:
+        return
+    usage = usage or {}
+    try:
+        await run_in_threadpool(_insert_completion, {
+            "type": completion_type,
+            "model": model,
+            "prompt": prompt,
+            "response": response,
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "created_at": _utcnow()
+        })
+    except Exception as e:
+        logger.error(f"Error storing completion history: {e}")
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Opaque cursor pointing just past a row
+    """
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    Decode a cursor from encode_cursor
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_INVALID_CURSOR
+        )
+
+def _keyset_query(
+    model: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    after: Optional[Cursor],
+    limit: int,
+    descending: bool
+):
+    query = select(*HISTORY_COLUMNS)
+    if model:
+        query = query.where(AICompletion.model == model)
+    if start is not None:
+        query = query.where(AICompletion.created_at >= start)
+    if end is not None:
+        query = query.where(AICompletion.created_at < end)
+
+    if after is not None:
+        # A row-value comparison is one range on the (created_at, id) index in both
+        # SQLite and Postgres; the equivalent OR makes SQLite scan from the start
+        key = tuple_(AICompletion.created_at, AICompletion.id)
+        query = query.where(key < tuple_(*after) if descending else key > tuple_(*after))
+
+    if descending:
+        return query.order_by(AICompletion.created_at.desc(), AICompletion.id.desc()).limit(limit)
+    return query.order_by(AICompletion.created_at, AICompletion.id).limit(limit)
+
+def fetch_history_rows(
+    model: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[Cursor] = None,
+    limit: int = 50,
+    descending: bool = True
+) -> List[tuple]:
+    """
+    Fetch up to `limit` history rows following `after` in (created_at, id) order
+    """
+    with SessionLocal() as db:
+        return db.execute(_keyset_query(model, _naive_utc(start), _naive_utc(end), after, limit, descending)).all()
+
+def _to_history(row) -> AICompletionHistory:
+    return AICompletionHistory(
+        id=row.id,
+        type=row.type,
+        model=row.model,
+        prompt=row.prompt,
+        response=row.response,
+        prompt_tokens=row.prompt_tokens,
+        completion_tokens=row.completion_tokens,
+        created_at=_isoformat(row.created_at)
+    )
+
+async def list_history(
+    model: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    cursor: Optional[str],
+    limit: int
+) -> AICompletionHistoryPage:
+    """
+    One page of history, newest first
+
+    Pages are read by keyset on (created_at, id), never OFFSET, so every
+    page costs the same however deep it is. Rows inserted after the first
+    page never shift later pages.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    # One row past the page tells whether there is a next page
+    rows = await run_in_threadpool(fetch_history_rows, model, start, end, after, limit + 1)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return AICompletionHistoryPage(items=[_to_history(row) for row in rows], next_cursor=next_cursor)
+
+def serialize_history_rows(rows: List[tuple], export_format: str, header: bool = False) -> bytes:
+    """
+    Encode history rows as NDJSON or CSV lines, as served by the export
+    """
+    if export_format == EXPORT_FORMAT_CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(CSV_HEADER)
+        for row in rows:
+            writer.writerow([*row[:-1], _isoformat(row.created_at)])
+        return buffer.getvalue().encode()
+    # OPT_NAIVE_UTC writes the stored naive UTC timestamps with their +00:00 offset
+    return b"".join(orjson.dumps(row._asdict(), option=orjson.OPT_NAIVE_UTC) + b"\n" for row in rows)
+
+def _fetch_export_chunk(
+    model: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    after: Optional[Cursor]
+) -> List[tuple]:
+    # The same chunk query repeats by design; don't report it as N+1
+    with query_scope(n_plus_one_threshold=0):
+        return fetch_history_rows(model, start, end, after, settings.AI_HISTORY_EXPORT_CHUNK_SIZE, descending=False)
+
+async def export_history(
+    export_format: str,
+    model: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime]
+) -> AsyncIterator[bytes]:
+    """
+    Stream matching history oldest first as NDJSON or CSV
+
+    Rows are read in AI_HISTORY_EXPORT_CHUNK_SIZE keyset chunks, each its
+    own short query, so memory stays flat and no transaction or connection
+    is held open between chunks while the client reads.
+    """
+    after: Optional[Cursor] = None
+    first = True
+    while True:
+        rows = await run_in_threadpool(_fetch_export_chunk, model, start, end, after)
+        if rows or first:
+            yield await run_in_threadpool(serialize_history_rows, rows, export_format, first)
+        if len(rows) < settings.AI_HISTORY_EXPORT_CHUNK_SIZE:
+            return
+        first = False
+        after = (rows[-1].created_at, rows[-1].id)
@@ -0,0 +1,34 @@
+from typing import Any, Callable, Dict
+from app.core.logger import logger
+from .ai_constants import JOB_TYPE_COMPLETION, JOB_TYPE_CHAT, JOB_TYPE_EMBEDDINGS
+from .ai_models import AIPrompt, AIChatRequest, AIEmbeddingRequest
+from .ai_service import generate_completion, generate_chat_completion
+from .ai_embedding_service import generate_embeddings
+
+async def run_completion_job(prompt: AIPrompt) -> Dict[str, Any]:
+    """
+    Generate a text completion as a background job
+    """
+    return (await generate_completion(prompt)).model_dump()
+
+async def run_chat_job(request: AIChatRequest) -> Dict[str, Any]:
+    """
+    Generate a chat completion as a background job
+    """
+    return (await generate_chat_completion(request)).model_dump()
+
+async def run_embeddings_job(request: AIEmbeddingRequest) -> Dict[str, Any]:
+    """
+    Generate embeddings as a background job
+    """
+    return (await generate_embeddings(request)).model_dump()
+
+def register_job_handlers(register: Callable):
+    """
+    Register AI module background job handlers
+    """
+    register(JOB_TYPE_COMPLETION, AIPrompt, run_completion_job)
+    register(JOB_TYPE_CHAT, AIChatRequest, run_chat_job)
+    register(JOB_TYPE_EMBEDDINGS, AIEmbeddingRequest, run_embeddings_job)
+
+    logger.info("AI module job handlers registered successfully")
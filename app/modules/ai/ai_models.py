@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any, Union
+from typing_extensions import TypedDict
+from app.core.config import settings
 
 class AIPrompt(BaseModel):
     """
@@ -27,11 +29,54 @@ class AICompletionHistory(BaseModel):
     AI completion history model
     """
     id: int
+    type: str
     prompt: str
     response: str
     model: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
     created_at: str
 
+class AICompletionHistoryPage(BaseModel):
+    """
+    One page of completion history; pass `next_cursor` back to get the next page
+    """
+    items: List[AICompletionHistory]
+    next_cursor: Optional[str] = None
+
+class AIUsageRollupItem(BaseModel):
+    """
+    Token usage of one model, route and client in one interval
+    """
+    bucket: str
+    model: str
+    route: str
+    client: str
+    requests: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+
+class AIUsageReport(BaseModel):
+    """
+    Token usage over [start, end) per interval, with totals
+    """
+    interval: str
+    start: str
+    end: str
+    items: List[AIUsageRollupItem]
+    totals: Dict[str, int]
+
+class AIUsageBudget(BaseModel):
+    """
+    A client's token budget in the current window; null budget means unlimited
+    """
+    client: str
+    budget: Optional[int] = None
+    used: int
+    remaining: Optional[int] = None
+    window_resets_at: str
+
 class AIMessage(BaseModel):
     """
     AI chat message model
@@ -39,11 +84,21 @@ class AIMessage(BaseModel):
     role: str
     content: str
 
+class AIChatMessage(TypedDict):
+    """
+    AI chat request message
+
+    Validated into a plain dict rather than a model instance, so long
+    histories cost one object per turn and reach provider SDKs as-is.
+    """
+    role: str
+    content: str
+
 class AIChatRequest(BaseModel):
     """
     AI chat request model
     """
-    messages: List[AIMessage]
+    messages: List[AIChatMessage] = Field(..., max_length=settings.AI_CHAT_MAX_MESSAGES)
     model: str
     max_tokens: Optional[int] = 1000
     temperature: Optional[float] = 0.7
@@ -60,3 +115,49 @@ class AIChatResponse(BaseModel):
     usage: Dict[str, int]
     raw_response: Optional[Dict[str, Any]] = None
 
+
+class AIEmbeddingRequest(BaseModel):
+    """
+    AI embedding request model
+    """
+    inputs: List[str] = Field(..., min_length=1)
+    model: str
+
+class AIEmbeddingResponse(BaseModel):
+    """
+    AI embedding response model
+    """
+    embeddings: List[List[float]]
+    model: str
+    usage: Dict[str, int]
+
+class AIVectorItem(BaseModel):
+    """
+    Text to embed and store under an ID
+    """
+    id: str = Field(..., min_length=1)
+    text: str
+    metadata: Optional[Dict[str, Any]] = None
+
+class AIVectorUpsertRequest(BaseModel):
+    """
+    AI vector upsert request model
+    """
+    items: List[AIVectorItem] = Field(..., min_length=1)
+    model: str
+
+class AIVectorSearchRequest(BaseModel):
+    """
+    AI vector search request model
+    """
+    query: str
+    model: str
+    top_k: int = Field(10, ge=1, le=1000)
+
+class AIVectorMatch(BaseModel):
+    """
+    AI vector search match model
+    """
+    id: str
+    score: float
+    metadata: Optional[Dict[str, Any]] = None
@@ -0,0 +1,35 @@
+from app.core.modules import ModuleSpec, RouterSpec, ROLE_API, ROLE_WORKER
+
+module = ModuleSpec(
+    name="ai",
+    routers=[RouterSpec("app.modules.ai.ai_controller:router", prefix="/api/ai", tags=["AI"])],
+    cron="app.modules.ai.ai_cron:register_jobs",
+    job_handlers="app.modules.ai.ai_jobs:register_job_handlers",
+    tables=["app.modules.ai.ai_tables"],
+    startup={
+        ROLE_API: [
+            "app.modules.ai.ai_usage_service:start_usage_ledger",
+            "app.modules.ai.ai_vector_index:start_vector_compaction"
+        ],
+        ROLE_WORKER: ["app.modules.ai.ai_usage_service:start_usage_ledger"]
+    },
+    shutdown={
+        ROLE_API: [
+            "app.modules.ai.ai_usage_service:stop_usage_ledger",
+            "app.modules.ai.ai_vector_index:stop_vector_compaction"
+        ],
+        ROLE_WORKER: ["app.modules.ai.ai_usage_service:stop_usage_ledger"]
+    },
+    warmup={
+        ROLE_API: [
+            "app.modules.ai.ai_warmup:warm_up_openai",
+            "app.modules.ai.ai_warmup:warm_up_google",
+            "app.modules.ai.ai_warmup:warm_up_serialization"
+        ],
+        ROLE_WORKER: [
+            "app.modules.ai.ai_warmup:warm_up_openai",
+            "app.modules.ai.ai_warmup:warm_up_google"
+        ]
+    },
+    dependencies=["openai", "google.generativeai", "numpy"]
+)
@@ -0,0 +1,283 @@
+import gzip
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from opentelemetry import trace
+from sqlalchemy import delete, select, tuple_
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logger import logger
+from .ai_constants import (
+    EXPORT_FORMAT_NDJSON,
+    RETENTION_ARCHIVE_LOCAL,
+    RETENTION_ARCHIVE_NONE,
+    RETENTION_ARCHIVE_S3,
+    RETENTION_DEFAULT_SCOPE
+)
+from .ai_history_service import HISTORY_COLUMNS, serialize_history_rows
+from .ai_tables import AICompletion, AIRetentionProgress
+
+Key = Tuple[datetime, int]
+
+_run_lock = threading.Lock()
+_UNSAFE_PATH_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+@dataclass
+class RetentionStats:
+    """
+    Totals for one retention run, reported on the job span
+    """
+    scopes: int = 0
+    resumed_scopes: int = 0
+    deleted_rows: int = 0
+    archived_rows: int = 0
+    archive_files: int = 0
+    archive_bytes: int = 0
+    batches: int = 0
+    completed: bool = True
+    seconds: float = 0.0
+    scope_stats: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def retention_policies() -> Dict[str, int]:
+    """
+    Days to keep per scope: each model in AI_RETENTION_POLICIES, plus the default for all other models
+    """
+    policies = dict(settings.AI_RETENTION_POLICIES)
+    policies[RETENTION_DEFAULT_SCOPE] = settings.AI_RETENTION_DAYS
+    return policies
+
+def _expired(scope: str, cutoff: datetime, through: Optional[Key] = None) -> list:
+    conditions = [AICompletion.created_at < cutoff]
+    if scope != RETENTION_DEFAULT_SCOPE:
+        conditions.append(AICompletion.model == scope)
+    elif settings.AI_RETENTION_POLICIES:
+        conditions.append(AICompletion.model.notin_(list(settings.AI_RETENTION_POLICIES)))
+    if through is not None:
+        conditions.append(tuple_(AICompletion.created_at, AICompletion.id) <= tuple_(*through))
+    return conditions
+
+def _start_scope(scope: str, days: int) -> Tuple[AIRetentionProgress, bool]:
+    """
+    Load the scope's unfinished run to resume it, or start a new one
+    """
+    now = _utcnow()
+    with SessionLocal(expire_on_commit=False) as db:
+        progress = db.get(AIRetentionProgress, scope)
+        if progress is not None and progress.finished_at is None:
+            return progress, True
+        if progress is None:
+            progress = AIRetentionProgress(scope=scope)
+            db.add(progress)
+        progress.cutoff = now - timedelta(days=days)
+        progress.archived_created_at = None
+        progress.archived_id = None
+        progress.archived = 0
+        progress.deleted = 0
+        progress.started_at = now
+        progress.updated_at = now
+        progress.finished_at = None
+        db.commit()
+        return progress, False
+
+def _finish_scope(progress: AIRetentionProgress):
+    with SessionLocal() as db:
+        row = db.get(AIRetentionProgress, progress.scope)
+        row.finished_at = row.updated_at = _utcnow()
+        db.commit()
+
+def _delete_batch(progress: AIRetentionProgress, through: Optional[Key]) -> int:
+    """
+    Delete the oldest expired rows, at most AI_RETENTION_BATCH_SIZE, in one short transaction
+
+    The ids come from the (created_at, id) indexes and the delete is by
+    primary key, so each batch only locks the rows it removes.
+    """
+    with SessionLocal() as db:
+        ids = db.execute(
+            select(AICompletion.id)
+            .where(*_expired(progress.scope, progress.cutoff, through))
+            .order_by(AICompletion.created_at, AICompletion.id)
+            .limit(settings.AI_RETENTION_BATCH_SIZE)
+        ).scalars().all()
+        if not ids:
+            return 0
+        db.execute(delete(AICompletion).where(AICompletion.id.in_(ids)))
+        row = db.get(AIRetentionProgress, progress.scope)
+        row.deleted += len(ids)
+        row.updated_at = _utcnow()
+        # The count commits with the delete, so it survives an interrupted run exactly
+        db.commit()
+        return len(ids)
+
+def _archive_name(progress: AIRetentionProgress, first: Key, last: Key) -> str:
+    scope = "default" if progress.scope == RETENTION_DEFAULT_SCOPE else _UNSAFE_PATH_CHARS.sub("_", progress.scope)
+    return f"{scope}/{progress.cutoff:%Y%m%d}/{first[1]}-{last[1]}.jsonl.gz"
+
+def _store_archive(path: str, name: str):
+    if settings.AI_RETENTION_ARCHIVE == RETENTION_ARCHIVE_S3:
+        from app.modules.storage.storage_service import get_s3_client
+
+        key = f"{settings.AI_RETENTION_ARCHIVE_PATH.strip('/')}/{name}"
+        get_s3_client().upload_file(path, settings.S3_BUCKET_NAME, key)
+        os.unlink(path)
+        return
+    target = os.path.join(settings.AI_RETENTION_ARCHIVE_PATH, name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Same directory tree as the target, so the rename is atomic
+    os.replace(path, target)
+
+def _archive_file(progress: AIRetentionProgress) -> Tuple[int, int]:
+    """
+    Write the next AI_RETENTION_ARCHIVE_FILE_ROWS expired rows to one gzipped JSONL archive
+
+    Rows are read in keyset batches and streamed through gzip into a temp
+    file, so memory does not grow with the file. The file is named after its
+    first and last ids, so redoing it after a crash overwrites the same file.
+
+    Returns:
+        Tuple[int, int]: Rows archived and compressed bytes written, (0, 0) when nothing is left
+    """
+    temp_dir = settings.AI_RETENTION_ARCHIVE_PATH if settings.AI_RETENTION_ARCHIVE == RETENTION_ARCHIVE_LOCAL else None
+    if temp_dir:
+        os.makedirs(temp_dir, exist_ok=True)
+    handle, path = tempfile.mkstemp(suffix=".jsonl.gz.part", dir=temp_dir)
+
+    first: Optional[Key] = None
+    last: Optional[Key] = None
+    rows_written = 0
+    try:
+        with os.fdopen(handle, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+                while rows_written < settings.AI_RETENTION_ARCHIVE_FILE_ROWS:
+                    query = select(*HISTORY_COLUMNS).where(*_expired(progress.scope, progress.cutoff))
+                    if last is not None:
+                        query = query.where(tuple_(AICompletion.created_at, AICompletion.id) > tuple_(*last))
+                    limit = min(settings.AI_RETENTION_BATCH_SIZE, settings.AI_RETENTION_ARCHIVE_FILE_ROWS - rows_written)
+                    with SessionLocal() as db:
+                        rows = db.execute(query.order_by(AICompletion.created_at, AICompletion.id).limit(limit)).all()
+                    if not rows:
+                        break
+                    archive.write(serialize_history_rows(rows, EXPORT_FORMAT_NDJSON))
+                    first = first or (rows[0].created_at, rows[0].id)
+                    last = (rows[-1].created_at, rows[-1].id)
+                    rows_written += len(rows)
+            # Durable before its rows can be deleted
+            raw.flush()
+            os.fsync(raw.fileno())
+        if not rows_written:
+            os.unlink(path)
+            return 0, 0
+        size = os.path.getsize(path)
+        _store_archive(path, _archive_name(progress, first, last))
+    except BaseException:
+        if os.path.exists(path):
+            os.unlink(path)
+        raise
+
+    # Only now that the file is durable may its rows be deleted
+    with SessionLocal() as db:
+        row = db.get(AIRetentionProgress, progress.scope)
+        row.archived_created_at, row.archived_id = last
+        row.archived += rows_written
+        row.updated_at = _utcnow()
+        db.commit()
+    progress.archived_created_at, progress.archived_id = last
+    return rows_written, size
+
+def _delete_batch_pending(progress: AIRetentionProgress, through: Key) -> bool:
+    with SessionLocal() as db:
+        return db.execute(
+            select(AICompletion.id).where(*_expired(progress.scope, progress.cutoff, through)).limit(1)
+        ).first() is not None
+
+def _purge_scope(progress: AIRetentionProgress, stats: RetentionStats, deadline: Optional[float]) -> bool:
+    """
+    Archive (if enabled) and delete a scope's expired rows until none are left or the deadline passes
+
+    Returns:
+        bool: True when the scope finished
+    """
+    archive = settings.AI_RETENTION_ARCHIVE != RETENTION_ARCHIVE_NONE
+    scope_stats = stats.scope_stats.setdefault(progress.scope, {"deleted": 0, "archived": 0})
+    while deadline is None or time.monotonic() < deadline:
+        through = None
+        if archive:
+            through = None if progress.archived_id is None else (progress.archived_created_at, progress.archived_id)
+            # Nothing archived yet, or everything archived already deleted: archive the next file
+            if through is None or not _delete_batch_pending(progress, through):
+                archived, size = _archive_file(progress)
+                if not archived:
+                    return True
+                stats.archived_rows += archived
+                stats.archive_files += 1
+                stats.archive_bytes += size
+                scope_stats["archived"] += archived
+                continue
+
+        deleted = _delete_batch(progress, through)
+        if not deleted:
+            return True
+        stats.batches += 1
+        stats.deleted_rows += deleted
+        scope_stats["deleted"] += deleted
+        # Let live traffic have the database between batches
+        time.sleep(settings.AI_RETENTION_BATCH_PAUSE_SECONDS)
+    return False
+
+def apply_retention() -> RetentionStats:
+    """
+    Delete completion history past its retention, archiving it first when AI_RETENTION_ARCHIVE is set
+
+    Each policy scope is purged oldest first in AI_RETENTION_BATCH_SIZE
+    transactions. Progress is stored per scope, so a run cut short by a crash
+    or AI_RETENTION_MAX_RUN_SECONDS is picked up by the next one. Totals are
+    set on the current span.
+    """
+    stats = RetentionStats()
+    if not _run_lock.acquire(blocking=False):
+        logger.warning("Completion retention already running, skipped")
+        return stats
+
+    begin = time.monotonic()
+    deadline = begin + settings.AI_RETENTION_MAX_RUN_SECONDS if settings.AI_RETENTION_MAX_RUN_SECONDS > 0 else None
+    span = trace.get_current_span()
+    try:
+        for scope, days in retention_policies().items():
+            if days <= 0:
+                continue
+            progress, resumed = _start_scope(scope, days)
+            stats.scopes += 1
+            stats.resumed_scopes += int(resumed)
+            if not _purge_scope(progress, stats, deadline):
+                stats.completed = False
+                break
+            _finish_scope(progress)
+            span.add_event("retention.scope", {
+                "retention.scope": scope,
+                "retention.cutoff": progress.cutoff.isoformat(),
+                "retention.resumed": resumed,
+                **{f"retention.{name}_rows": count for name, count in stats.scope_stats.get(scope, {}).items()}
+            })
+    finally:
+        _run_lock.release()
+        stats.seconds = round(time.monotonic() - begin, 3)
+        span.set_attributes({
+            "retention.scopes": stats.scopes,
+            "retention.resumed_scopes": stats.resumed_scopes,
+            "retention.deleted_rows": stats.deleted_rows,
+            "retention.archived_rows": stats.archived_rows,
+            "retention.archive_files": stats.archive_files,
+            "retention.archive_bytes": stats.archive_bytes,
+            "retention.batches": stats.batches,
+            "retention.completed": stats.completed,
+            "retention.seconds": stats.seconds
+        })
+    return stats
@@ -1,8 +1,13 @@
+import math
 import openai
 import google.generativeai as genai
-from typing import Dict, Any, List
+from google.api_core import exceptions as google_exceptions
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from fastapi import HTTPException, status
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, get_timeout, is_expired, record_deadline
+from app.core.resilience import BulkheadFullError, CircuitOpenError, guarded_call
 from app.core.logger import setup_logging
 from app.core.tracing import get_tracer, trace_function
 from .ai_constants import (
@@ -11,17 +16,38 @@ from .ai_constants import (
     MODEL_GOOGLE_GEMINI_PRO,
     ERROR_API_KEY_MISSING,
     ERROR_MODEL_NOT_SUPPORTED,
-    ERROR_REQUEST_FAILED
+    ERROR_REQUEST_FAILED,
+    ERROR_RATE_LIMITED,
+    ERROR_PROVIDER_TIMEOUT,
+    ERROR_PROVIDER_UNAVAILABLE,
+    PROVIDER_OPENAI,
+    PROVIDER_GOOGLE,
+    PROVIDER_FAKE,
+    HISTORY_TYPE_COMPLETION,
+    HISTORY_TYPE_CHAT
+)
+from .ai_models import AIPrompt, AIResponse, AIChatRequest, AIChatResponse, AIChatMessage, AIMessage
+from .ai_history_service import record_completion
+from .ai_usage_service import estimate_tokens, record_usage
+from .ai_fake_provider import (
+    FakeRateLimitError,
+    is_fake_model,
+    generate_fake_completion,
+    generate_fake_chat_completion,
+    stream_fake_chat_completion
 )
-from .ai_models import AIPrompt, AIResponse, AIChatRequest, AIChatResponse, AIMessage
 
 logger = setup_logging()
 tracer = get_tracer()
 
+@lru_cache()
+def _create_openai_client(api_key: str) -> openai.AsyncOpenAI:
+    return openai.AsyncOpenAI(api_key=api_key)
+
 @trace_function
 def get_openai_client():
     """
-    Get OpenAI client
+    Get the shared async OpenAI client
     """
     if not settings.OPENAI_API_KEY:
         raise HTTPException(
@@ -29,7 +55,7 @@ def get_openai_client():
             detail=ERROR_API_KEY_MISSING
         )
     
-    return openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+    return _create_openai_client(settings.OPENAI_API_KEY)
 
 @trace_function
 def get_google_ai_client():
@@ -45,6 +71,90 @@ def get_google_ai_client():
     genai.configure(api_key=settings.GOOGLE_API_KEY)
     return genai
 
+def provider_timeout() -> float:
+    """
+    Timeout for one provider call: the request's remaining budget, capped by AI_REQUEST_TIMEOUT_SECONDS
+    """
+    return get_timeout(settings.AI_REQUEST_TIMEOUT_SECONDS)
+
+def provider_http_exception(error: Exception) -> HTTPException:
+    """
+    Map a provider error to an HTTPException: rate limits become 429 with
+    Retry-After, open circuits and full bulkheads 503, timeouts 504
+    """
+    if isinstance(error, (CircuitOpenError, BulkheadFullError)):
+        retry_after = error.retry_after if isinstance(error, CircuitOpenError) else 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=ERROR_PROVIDER_UNAVAILABLE,
+            headers={"Retry-After": str(max(int(math.ceil(retry_after)), 1))}
+        )
+
+    if isinstance(error, (DeadlineExceeded, openai.APITimeoutError, google_exceptions.DeadlineExceeded)):
+        return HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=ERROR_PROVIDER_TIMEOUT
+        )
+
+    retry_after = None
+    if isinstance(error, FakeRateLimitError):
+        retry_after = error.retry_after
+    elif isinstance(error, openai.RateLimitError):
+        retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+    elif not isinstance(error, google_exceptions.ResourceExhausted):
+        return HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"{ERROR_REQUEST_FAILED}: {str(error)}"
+        )
+
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=ERROR_RATE_LIMITED,
+        headers={"Retry-After": str(retry_after)} if retry_after is not None else None
+    )
+
+def get_provider(model: str) -> str:
+    """
+    Name of the provider serving a model
+    """
+    if is_fake_model(model):
+        return PROVIDER_FAKE
+    if model in [MODEL_OPENAI_GPT4, MODEL_OPENAI_GPT35_TURBO]:
+        return PROVIDER_OPENAI
+    if model == MODEL_GOOGLE_GEMINI_PRO:
+        return PROVIDER_GOOGLE
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=ERROR_MODEL_NOT_SUPPORTED
+    )
+
+def is_provider_failure(error: Exception) -> bool:
+    """
+    Check whether an error says something about provider health
+
+    Client errors (bad requests, unknown models) and timeouts caused by the
+    caller's own deadline running out don't count against the provider.
+    """
+    if isinstance(error, HTTPException):
+        return error.status_code >= 500
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (openai.APITimeoutError, google_exceptions.DeadlineExceeded)):
+        return not is_expired()
+    status_code = getattr(error, "status_code", None)
+    if isinstance(error, google_exceptions.GoogleAPICallError):
+        status_code = error.code
+    if isinstance(status_code, int):
+        return status_code >= 500 or status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    return True
+
+def provider_call(model: str, provider: Optional[str] = None):
+    """
+    Guard one provider call with the provider's bulkhead and the model's circuit breaker
+    """
+    provider = provider or get_provider(model)
+    return guarded_call(provider, f"{provider}:{model}", is_provider_failure)
+
 @trace_function
 async def generate_completion(prompt: AIPrompt) -> AIResponse:
     """
@@ -65,21 +175,22 @@ async def generate_completion(prompt: AIPrompt) -> AIResponse:
         }
     ):
         try:
-            if prompt.model in [MODEL_OPENAI_GPT4, MODEL_OPENAI_GPT35_TURBO]:
-                return await generate_openai_completion(prompt)
-            elif prompt.model == MODEL_GOOGLE_GEMINI_PRO:
-                return await generate_google_completion(prompt)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=ERROR_MODEL_NOT_SUPPORTED
-                )
+            generate = {
+                PROVIDER_FAKE: generate_fake_completion,
+                PROVIDER_OPENAI: generate_openai_completion,
+                PROVIDER_GOOGLE: generate_google_completion
+            }[get_provider(prompt.model)]
+
+            async with provider_call(prompt.model):
+                result = await generate(prompt)
+            record_usage(prompt.model, result.usage)
+            await record_completion(HISTORY_TYPE_COMPLETION, prompt.model, prompt.text, result.text, result.usage)
+            return result
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error generating completion: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"{ERROR_REQUEST_FAILED}: {str(e)}"
-            )
+            raise provider_http_exception(e)
 
 @trace_function
 async def generate_openai_completion(prompt: AIPrompt) -> AIResponse:
@@ -92,18 +203,20 @@ async def generate_openai_completion(prompt: AIPrompt) -> AIResponse:
     Returns:
         AIResponse: AI response
     """
-    with tracer.start_as_current_span("generate_openai_completion"):
+    with tracer.start_as_current_span("generate_openai_completion") as span:
+        record_deadline(span)
         client = get_openai_client()
         
         try:
-            response = client.completions.create(
+            response = await client.completions.create(
                 model=prompt.model,
                 prompt=prompt.text,
                 max_tokens=prompt.max_tokens,
                 temperature=prompt.temperature,
                 top_p=prompt.top_p,
                 frequency_penalty=prompt.frequency_penalty,
-                presence_penalty=prompt.presence_penalty
+                presence_penalty=prompt.presence_penalty,
+                timeout=provider_timeout()
             )
             
             return AIResponse(
@@ -131,26 +244,21 @@ async def generate_google_completion(prompt: AIPrompt) -> AIResponse:
     Returns:
         AIResponse: AI response
     """
-    with tracer.start_as_current_span("generate_google_completion"):
+    with tracer.start_as_current_span("generate_google_completion") as span:
+        record_deadline(span)
         client = get_google_ai_client()
         
         try:
             model = client.GenerativeModel(MODEL_GOOGLE_GEMINI_PRO)
-            response = model.generate_content(prompt.text)
-            
-            # Google AI doesn't provide token usage in the same way as OpenAI
-            # This is an approximation
-            estimated_prompt_tokens = len(prompt.text.split()) * 1.3
-            estimated_completion_tokens = len(response.text.split()) * 1.3
+            response = await model.generate_content_async(
+                prompt.text,
+                request_options={"timeout": provider_timeout()}
+            )
             
             return AIResponse(
                 text=response.text,
                 model=prompt.model,
-                usage={
-                    "prompt_tokens": int(estimated_prompt_tokens),
-                    "completion_tokens": int(estimated_completion_tokens),
-                    "total_tokens": int(estimated_prompt_tokens + estimated_completion_tokens)
-                },
+                usage=google_usage(response, prompt.text, response.text),
                 raw_response={"text": response.text}
             )
         except Exception as e:
@@ -178,21 +286,24 @@ async def generate_chat_completion(request: AIChatRequest) -> AIChatResponse:
         }
     ):
         try:
-            if request.model in [MODEL_OPENAI_GPT4, MODEL_OPENAI_GPT35_TURBO]:
-                return await generate_openai_chat_completion(request)
-            elif request.model == MODEL_GOOGLE_GEMINI_PRO:
-                return await generate_google_chat_completion(request)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=ERROR_MODEL_NOT_SUPPORTED
-                )
+            generate = {
+                PROVIDER_FAKE: generate_fake_chat_completion,
+                PROVIDER_OPENAI: generate_openai_chat_completion,
+                PROVIDER_GOOGLE: generate_google_chat_completion
+            }[get_provider(request.model)]
+
+            async with provider_call(request.model):
+                result = await generate(request)
+            record_usage(request.model, result.usage)
+            await record_completion(
+                HISTORY_TYPE_CHAT, request.model, last_user_message(request.messages), result.message.content, result.usage
+            )
+            return result
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error generating chat completion: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"{ERROR_REQUEST_FAILED}: {str(e)}"
-            )
+            raise provider_http_exception(e)
 
 @trace_function
 async def generate_openai_chat_completion(request: AIChatRequest) -> AIChatResponse:
@@ -205,21 +316,20 @@ async def generate_openai_chat_completion(request: AIChatRequest) -> AIChatRespo
     Returns:
         AIChatResponse: AI chat response
     """
-    with tracer.start_as_current_span("generate_openai_chat_completion"):
+    with tracer.start_as_current_span("generate_openai_chat_completion") as span:
+        record_deadline(span)
         client = get_openai_client()
         
         try:
-            # Convert messages to OpenAI format
-            messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
-            
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model=request.model,
-                messages=messages,
+                messages=request.messages,
                 max_tokens=request.max_tokens,
                 temperature=request.temperature,
                 top_p=request.top_p,
                 frequency_penalty=request.frequency_penalty,
-                presence_penalty=request.presence_penalty
+                presence_penalty=request.presence_penalty,
+                timeout=provider_timeout()
             )
             
             return AIChatResponse(
@@ -239,6 +349,47 @@ async def generate_openai_chat_completion(request: AIChatRequest) -> AIChatRespo
             logger.error(f"OpenAI API error: {e}")
             raise
 
+def last_user_message(messages: List[AIChatMessage]) -> str:
+    """
+    Content of the last user message, stored as the prompt of a chat
+    """
+    return next((msg["content"] for msg in reversed(messages) if msg["role"] == "user"), "")
+
+def chat_prompt_text(messages: List[AIChatMessage]) -> str:
+    """
+    All message contents as one text, for estimating prompt tokens
+    """
+    return "\n".join(msg["content"] for msg in messages)
+
+def google_usage(response: Any, prompt_text: str, completion_text: str) -> Dict[str, int]:
+    """
+    Token usage from a Gemini response's usage_metadata, estimated from the text for counts it lacks
+    """
+    metadata = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(metadata, "prompt_token_count", 0) or estimate_tokens(prompt_text)
+    completion_tokens = getattr(metadata, "candidates_token_count", 0) or estimate_tokens(completion_text)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens
+    }
+
+def google_chat_input(messages: List[AIChatMessage]) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Split chat messages into Gemini history and the last user message
+
+    System messages have no Gemini role and are dropped.
+    """
+    last_user_index = max((i for i, msg in enumerate(messages) if msg["role"] == "user"), default=None)
+    if last_user_index is None:
+        return [], ""
+    history = [
+        {"role": "user" if msg["role"] == "user" else "model", "parts": [msg["content"]]}
+        for msg in messages[:last_user_index]
+        if msg["role"] in ("user", "assistant")
+    ]
+    return history, messages[last_user_index]["content"]
+
 @trace_function
 async def generate_google_chat_completion(request: AIChatRequest) -> AIChatResponse:
     """
@@ -250,27 +401,17 @@ async def generate_google_chat_completion(request: AIChatRequest) -> AIChatRespo
     Returns:
         AIChatResponse: AI chat response
     """
-    with tracer.start_as_current_span("generate_google_chat_completion"):
+    with tracer.start_as_current_span("generate_google_chat_completion") as span:
+        record_deadline(span)
         client = get_google_ai_client()
         
         try:
             model = client.GenerativeModel(MODEL_GOOGLE_GEMINI_PRO)
             
-            # Convert messages to Google AI format
-            chat = model.start_chat()
-            
-            for msg in request.messages:
-                if msg.role == "user":
-                    chat.send_message(msg.content)
-            
-            # Send the last user message to get a response
-            last_user_msg = next((msg.content for msg in reversed(request.messages) if msg.role == "user"), "")
-            response = chat.send_message(last_user_msg)
-            
-            # Google AI doesn't provide token usage in the same way as OpenAI
-            # This is an approximation
-            estimated_prompt_tokens = sum(len(msg.content.split()) for msg in request.messages) * 1.3
-            estimated_completion_tokens = len(response.text.split()) * 1.3
+            # Earlier turns go in as history, so the whole chat is one provider call
+            history, last_user_msg = google_chat_input(request.messages)
+            chat = model.start_chat(history=history)
+            response = await chat.send_message_async(last_user_msg, request_options={"timeout": provider_timeout()})
             
             return AIChatResponse(
                 message=AIMessage(
@@ -278,14 +419,120 @@ async def generate_google_chat_completion(request: AIChatRequest) -> AIChatRespo
                     content=response.text
                 ),
                 model=request.model,
-                usage={
-                    "prompt_tokens": int(estimated_prompt_tokens),
-                    "completion_tokens": int(estimated_completion_tokens),
-                    "total_tokens": int(estimated_prompt_tokens + estimated_completion_tokens)
-                },
+                usage=google_usage(response, chat_prompt_text(request.messages), response.text),
                 raw_response={"text": response.text}
             )
         except Exception as e:
             logger.error(f"Google AI API error: {e}")
             raise
 
+
+async def stream_chat_completion(request: AIChatRequest) -> AsyncIterator[str]:
+    """
+    Stream a chat completion as text deltas
+
+    Args:
+        request: AI chat request
+
+    Yields:
+        str: Text deltas
+    """
+    stream = {
+        PROVIDER_FAKE: stream_fake_chat_completion,
+        PROVIDER_OPENAI: stream_openai_chat_completion,
+        PROVIDER_GOOGLE: stream_google_chat_completion
+    }[get_provider(request.model)]
+
+    try:
+        # The bulkhead slot is held for the whole stream; latency is time to first delta
+        deltas = []
+        usage: Dict[str, int] = {}
+        async with provider_call(request.model) as timer:
+            async for delta in stream(request, usage):
+                timer.stop()
+                deltas.append(delta)
+                yield delta
+        # Only streams that ran to completion are stored
+        text = "".join(deltas)
+        if not usage:
+            prompt_tokens, completion_tokens = estimate_tokens(chat_prompt_text(request.messages)), estimate_tokens(text)
+            usage.update(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens
+            )
+        record_usage(request.model, usage)
+        await record_completion(HISTORY_TYPE_CHAT, request.model, last_user_message(request.messages), text, usage)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming chat completion: {e}")
+        raise provider_http_exception(e)
+
+async def stream_openai_chat_completion(request: AIChatRequest, usage: Dict[str, int]) -> AsyncIterator[str]:
+    """
+    Stream a chat completion from OpenAI models
+
+    Args:
+        request: AI chat request
+        usage: Filled with the token usage reported at the end of the stream
+
+    Yields:
+        str: Text deltas
+    """
+    client = get_openai_client()
+
+    stream = await client.chat.completions.create(
+        model=request.model,
+        messages=request.messages,
+        max_tokens=request.max_tokens,
+        temperature=request.temperature,
+        top_p=request.top_p,
+        frequency_penalty=request.frequency_penalty,
+        presence_penalty=request.presence_penalty,
+        stream=True,
+        # The last chunk then carries the usage of the whole stream
+        stream_options={"include_usage": True},
+        timeout=provider_timeout()
+    )
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if chunk.usage:
+                usage.update(
+                    prompt_tokens=chunk.usage.prompt_tokens,
+                    completion_tokens=chunk.usage.completion_tokens,
+                    total_tokens=chunk.usage.total_tokens
+                )
+    finally:
+        # Closing the connection tells the provider to stop generating
+        await stream.close()
+
+async def stream_google_chat_completion(request: AIChatRequest, usage: Dict[str, int]) -> AsyncIterator[str]:
+    """
+    Stream a chat completion from Google AI models
+
+    Args:
+        request: AI chat request
+        usage: Filled with the token usage reported at the end of the stream
+
+    Yields:
+        str: Text deltas
+    """
+    client = get_google_ai_client()
+    model = client.GenerativeModel(MODEL_GOOGLE_GEMINI_PRO)
+
+    history, last_user_msg = google_chat_input(request.messages)
+    chat = model.start_chat(history=history)
+    response = await chat.send_message_async(
+        last_user_msg,
+        stream=True,
+        request_options={"timeout": provider_timeout()}
+    )
+    deltas = []
+    async for chunk in response:
+        if chunk.text:
+            deltas.append(chunk.text)
+            yield chunk.text
+    usage.update(google_usage(response, chat_prompt_text(request.messages), "".join(deltas)))
@@ -0,0 +1,73 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, Text
+from app.core.database import Base
+
+class AICompletion(Base):
+    """
+    Stored completion or chat completion
+
+    Listing and export page by keyset on (created_at, id), newest first or
+    oldest first, so both indexes end in those columns: one for unfiltered
+    scans and date ranges, one for scans of a single model.
+    """
+    __tablename__ = "ai_completion_history"
+
+    # SQLite only autoincrements INTEGER primary keys
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    type = Column(String(16), nullable=False)
+    model = Column(String(64), nullable=False)
+    prompt = Column(Text, nullable=False)
+    response = Column(Text, nullable=False)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_ai_completion_history_created_at_id", "created_at", "id"),
+        Index("ix_ai_completion_history_model_created_at_id", "model", "created_at", "id"),
+    )
+
+class AIUsageRollup(Base):
+    """
+    Token usage of one model, route and client in one minute
+
+    Processes add to these rows as they flush their in-memory ledgers, so
+    one row stands for every request in its minute. The (client, bucket)
+    index serves budget totals and per-client queries; time ranges use the
+    primary key.
+    """
+    __tablename__ = "ai_usage_rollup"
+
+    bucket = Column(DateTime, primary_key=True)
+    model = Column(String(64), primary_key=True)
+    route = Column(String(128), primary_key=True)
+    client = Column(String(64), primary_key=True)
+    requests = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(BigInteger, nullable=False, default=0)
+    completion_tokens = Column(BigInteger, nullable=False, default=0)
+    total_tokens = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_ai_usage_rollup_client_bucket", "client", "bucket"),
+    )
+
+class AIRetentionProgress(Base):
+    """
+    Progress of the retention run for one policy scope (a model, or * for the default)
+
+    `cutoff` is fixed when a run starts, so a run resumed after a crash or
+    a time limit deletes the same rows it set out to. `archived_*` is the
+    last (created_at, id) written to a durable archive file; rows up to it
+    are deleted before anything new is archived, so nothing is archived twice
+    or deleted unarchived. `finished_at` stays null until the scope is done.
+    """
+    __tablename__ = "ai_retention_progress"
+
+    scope = Column(String(64), primary_key=True)
+    cutoff = Column(DateTime, nullable=False)
+    archived_created_at = Column(DateTime, nullable=True)
+    archived_id = Column(BigInteger, nullable=True)
+    archived = Column(Integer, nullable=False, default=0)
+    deleted = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
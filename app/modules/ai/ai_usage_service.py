@@ -0,0 +1,359 @@
+import asyncio
+import math
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from starlette.concurrency import run_in_threadpool
+from app.core.admission import get_client_key
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logger import setup_logging
+from .ai_constants import (
+    ERROR_USAGE_BUDGET_EXCEEDED,
+    USAGE_INTERVAL_DAY,
+    USAGE_INTERVAL_HOUR,
+    USAGE_ROUTE_BACKGROUND,
+    USAGE_CLIENT_INTERNAL
+)
+from .ai_models import AIUsageBudget, AIUsageReport, AIUsageRollupItem
+from .ai_tables import AIUsageRollup
+
+logger = setup_logging()
+
+# (minute bucket, model, route, client)
+RollupKey = Tuple[datetime, str, str, str]
+COUNTERS = ("requests", "prompt_tokens", "completion_tokens", "total_tokens")
+
+# Route and client of the request being served, bound by the bind_usage_source dependency
+_usage_source: ContextVar[Optional[Tuple[str, str]]] = ContextVar("usage_source", default=None)
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _isoformat(value: datetime) -> str:
+    return value.replace(tzinfo=timezone.utc).isoformat()
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate token count of text, about four characters per token, for providers that report none
+    """
+    return max(int(math.ceil(len(text) / 4)), 1) if text else 0
+
+def budget_window_start(now: datetime) -> datetime:
+    """
+    Start of the fixed AI_USAGE_BUDGET_WINDOW_HOURS window containing `now`, aligned to the epoch in UTC
+    """
+    window = timedelta(hours=settings.AI_USAGE_BUDGET_WINDOW_HOURS)
+    return datetime(1970, 1, 1) + ((now - datetime(1970, 1, 1)) // window) * window
+
+def client_budget(client: str) -> int:
+    """
+    Tokens a client may use per budget window; 0 means unlimited
+    """
+    return settings.AI_USAGE_BUDGETS.get(client, settings.AI_USAGE_DEFAULT_BUDGET)
+
+class UsageLedger:
+    """
+    Token usage buffered in memory as per-minute rollups
+
+    Each completion adds to the counters of its (minute, model, route,
+    client) rollup instead of writing a row, and `flush` upserts the
+    rollups into ai_usage_rollup, adding to rows other processes wrote.
+    A failed flush puts its rollups back to retry on the next one.
+
+    Budgets are enforced from memory: the client's tokens in the current
+    window as of the last sync with the database, which includes every
+    process's flushed usage, plus this process's usage not synced yet.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[RollupKey, List[int]] = {}
+        self._window_start = budget_window_start(_utcnow())
+        self._synced: Dict[str, int] = {}
+        self._flushing: Dict[str, int] = {}
+        self._unsynced: Dict[str, int] = {}
+
+    def record(self, model: str, route: str, client: str, prompt_tokens: int, completion_tokens: int):
+        now = _utcnow()
+        key = (now.replace(second=0, microsecond=0), model, route, client)
+        total = prompt_tokens + completion_tokens
+        with self._lock:
+            counters = self._pending.setdefault(key, [0, 0, 0, 0])
+            counters[0] += 1
+            counters[1] += prompt_tokens
+            counters[2] += completion_tokens
+            counters[3] += total
+            self._roll_window(now)
+            self._unsynced[client] = self._unsynced.get(client, 0) + total
+
+    def used(self, client: str) -> int:
+        """
+        Tokens the client used in the current budget window, as far as this process knows
+        """
+        with self._lock:
+            self._roll_window(_utcnow())
+            return self._synced.get(client, 0) + self._flushing.get(client, 0) + self._unsynced.get(client, 0)
+
+    def _roll_window(self, now: datetime):
+        window_start = budget_window_start(now)
+        if window_start != self._window_start:
+            self._window_start = window_start
+            self._synced, self._flushing, self._unsynced = {}, {}, {}
+
+    def flush(self) -> int:
+        """
+        Write pending rollups to the database and resync budget totals
+
+        Returns:
+            int: Rollup rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                for client, tokens in self._unsynced.items():
+                    self._flushing[client] = self._flushing.get(client, 0) + tokens
+                self._unsynced = {}
+            if pending:
+                try:
+                    _upsert_rollups(pending)
+                except Exception:
+                    with self._lock:
+                        for key, counters in pending.items():
+                            merged = self._pending.setdefault(key, [0, 0, 0, 0])
+                            for i, value in enumerate(counters):
+                                merged[i] += value
+                    raise
+            self.sync_budgets()
+            return len(pending)
+
+    def sync_budgets(self):
+        """
+        Reload every client's tokens in the current window from the database
+        """
+        window_start = budget_window_start(_utcnow())
+        totals = _window_totals(window_start)
+        with self._lock:
+            if window_start == self._window_start:
+                self._synced = totals
+                self._flushing = {}
+
+def _rollup_rows(pending: Dict[RollupKey, List[int]]) -> List[Dict[str, object]]:
+    return [
+        {"bucket": bucket, "model": model, "route": route, "client": client, **dict(zip(COUNTERS, counters))}
+        for (bucket, model, route, client), counters in pending.items()
+    ]
+
+def _upsert_rollups(pending: Dict[RollupKey, List[int]]):
+    rows = _rollup_rows(pending)
+    with SessionLocal() as db:
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            statement = insert(AIUsageRollup)
+            statement = statement.on_conflict_do_update(
+                index_elements=["bucket", "model", "route", "client"],
+                set_={name: getattr(AIUsageRollup, name) + getattr(statement.excluded, name) for name in COUNTERS}
+            )
+            db.execute(statement, rows)
+        else:
+            # No portable upsert: add to the row, inserting it when there is none
+            for row in rows:
+                result = db.execute(
+                    update(AIUsageRollup)
+                    .where(
+                        AIUsageRollup.bucket == row["bucket"],
+                        AIUsageRollup.model == row["model"],
+                        AIUsageRollup.route == row["route"],
+                        AIUsageRollup.client == row["client"]
+                    )
+                    .values({name: getattr(AIUsageRollup, name) + row[name] for name in COUNTERS})
+                )
+                if result.rowcount == 0:
+                    db.add(AIUsageRollup(**row))
+        db.commit()
+
+def _window_totals(window_start: datetime) -> Dict[str, int]:
+    with SessionLocal() as db:
+        return dict(db.execute(
+            select(AIUsageRollup.client, func.sum(AIUsageRollup.total_tokens))
+            .where(AIUsageRollup.bucket >= window_start)
+            .group_by(AIUsageRollup.client)
+        ).all())
+
+# The ledger of this process
+usage_ledger = UsageLedger()
+_flusher: Optional[asyncio.Task] = None
+
+def record_usage(model: str, usage: Optional[Dict[str, int]]):
+    """
+    Add a completion's token usage to the ledger under the current route and client
+    """
+    if not settings.AI_USAGE_ENABLED:
+        return
+    usage = usage or {}
+    route, client = _usage_source.get() or (USAGE_ROUTE_BACKGROUND, USAGE_CLIENT_INTERNAL)
+    usage_ledger.record(model, route, client, int(usage.get("prompt_tokens") or 0), int(usage.get("completion_tokens") or 0))
+
+def _budget_exception() -> HTTPException:
+    window_end = budget_window_start(_utcnow()) + timedelta(hours=settings.AI_USAGE_BUDGET_WINDOW_HOURS)
+    retry_after = max(int(math.ceil((window_end - _utcnow()).total_seconds())), 1)
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=ERROR_USAGE_BUDGET_EXCEEDED,
+        headers={"Retry-After": str(retry_after)}
+    )
+
+def check_usage_budget(client: str):
+    """
+    Reject a client that used up its token budget with 429
+    """
+    if settings.AI_USAGE_ENABLED:
+        budget = client_budget(client)
+        if budget and usage_ledger.used(client) >= budget:
+            raise _budget_exception()
+
+async def bind_usage_source(request: Request):
+    """
+    Attribute usage in this request to its route and client, rejecting clients over budget with 429
+
+    Only for routes without path parameters: the path is the route label.
+    """
+    client = get_client_key(request.scope)
+    _usage_source.set((request.url.path, client))
+    check_usage_budget(client)
+
+def bind_job_usage_source(job_type: str, client: Optional[str]):
+    """
+    Attribute usage in the current background job to its type and the client that queued it
+    """
+    _usage_source.set((job_type, client or USAGE_CLIENT_INTERNAL))
+
+async def _flush_periodically():
+    while True:
+        await asyncio.sleep(settings.AI_USAGE_FLUSH_SECONDS)
+        try:
+            await run_in_threadpool(usage_ledger.flush)
+        except Exception as e:
+            logger.error(f"Error flushing usage ledger: {e}")
+
+async def start_usage_ledger():
+    """
+    Load budget totals and start flushing rollups every AI_USAGE_FLUSH_SECONDS
+    """
+    global _flusher
+    if not settings.AI_USAGE_ENABLED:
+        return
+    try:
+        await run_in_threadpool(usage_ledger.sync_budgets)
+    except Exception as e:
+        logger.error(f"Error loading usage budgets: {e}")
+    _flusher = asyncio.ensure_future(_flush_periodically())
+
+async def stop_usage_ledger():
+    """
+    Stop the periodic flush and write what is still buffered
+    """
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        await asyncio.gather(_flusher, return_exceptions=True)
+        _flusher = None
+    try:
+        await run_in_threadpool(usage_ledger.flush)
+    except Exception as e:
+        logger.error(f"Error flushing usage ledger: {e}")
+
+def _fetch_rollups(
+    start: datetime,
+    end: datetime,
+    model: Optional[str],
+    route: Optional[str],
+    client: Optional[str]
+) -> List[tuple]:
+    query = select(
+        AIUsageRollup.bucket,
+        AIUsageRollup.model,
+        AIUsageRollup.route,
+        AIUsageRollup.client,
+        *(getattr(AIUsageRollup, name) for name in COUNTERS)
+    ).where(AIUsageRollup.bucket >= start, AIUsageRollup.bucket < end)
+    if model:
+        query = query.where(AIUsageRollup.model == model)
+    if route:
+        query = query.where(AIUsageRollup.route == route)
+    if client:
+        query = query.where(AIUsageRollup.client == client)
+    with SessionLocal() as db:
+        return db.execute(query.order_by(AIUsageRollup.bucket)).all()
+
+def _truncate(bucket: datetime, interval: str) -> datetime:
+    if interval == USAGE_INTERVAL_DAY:
+        return bucket.replace(hour=0, minute=0)
+    if interval == USAGE_INTERVAL_HOUR:
+        return bucket.replace(minute=0)
+    return bucket
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+async def query_usage(
+    start: Optional[datetime],
+    end: Optional[datetime],
+    interval: str,
+    model: Optional[str],
+    route: Optional[str],
+    client: Optional[str]
+) -> AIUsageReport:
+    """
+    Usage in [start, end) per interval, model, route and client, with totals
+
+    Defaults to the last 24 hours. Reads the stored per-minute rollups,
+    after flushing this process's buffer; other processes' usage shows up
+    once they flush, within AI_USAGE_FLUSH_SECONDS.
+    """
+    end = _naive_utc(end) if end else _utcnow()
+    start = _naive_utc(start) if start else end - timedelta(days=1)
+    if settings.AI_USAGE_ENABLED:
+        try:
+            await run_in_threadpool(usage_ledger.flush)
+        except Exception as e:
+            logger.error(f"Error flushing usage ledger: {e}")
+    rows = await run_in_threadpool(_fetch_rollups, start, end, model, route, client)
+
+    merged: Dict[RollupKey, List[int]] = {}
+    for row in rows:
+        counters = merged.setdefault((_truncate(row.bucket, interval), row.model, row.route, row.client), [0, 0, 0, 0])
+        for i, name in enumerate(COUNTERS):
+            counters[i] += getattr(row, name)
+
+    items = [
+        AIUsageRollupItem(
+            bucket=_isoformat(key[0]), model=key[1], route=key[2], client=key[3], **dict(zip(COUNTERS, counters))
+        )
+        for key, counters in merged.items()
+    ]
+    totals = {name: sum(getattr(item, name) for item in items) for name in COUNTERS}
+    return AIUsageReport(interval=interval, start=_isoformat(start), end=_isoformat(end), items=items, totals=totals)
+
+def get_usage_budget(request: Request) -> AIUsageBudget:
+    """
+    Budget and tokens used in the current window by the calling client
+    """
+    client = get_client_key(request.scope)
+    budget = client_budget(client)
+    used = usage_ledger.used(client)
+    window_end = budget_window_start(_utcnow()) + timedelta(hours=settings.AI_USAGE_BUDGET_WINDOW_HOURS)
+    return AIUsageBudget(
+        client=client,
+        budget=budget or None,
+        used=used,
+        remaining=max(budget - used, 0) if budget else None,
+        window_resets_at=_isoformat(window_end)
+    )
@@ -0,0 +1,304 @@
+import asyncio
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.logger import setup_logging
+from app.core.tracing import get_tracer
+
+logger = setup_logging()
+tracer = get_tracer()
+
+CURRENT_FILE = "CURRENT"
+VECTORS_FILE = "vectors.{generation}.f32"
+IDS_FILE = "ids.{generation}.jsonl"
+DELETED_FILE = "deleted.{generation}.txt"
+
+class VectorIndex:
+    """
+    On-disk vector index searched with brute-force cosine similarity
+
+    Vectors are L2-normalised on insert and appended as raw float32 rows to
+    a vectors file, which is memory-mapped for search, so a query is one
+    matrix-vector product plus an argpartition for the top k. An IDs file
+    maps row numbers to external IDs (and optional metadata) and a deleted
+    file lists tombstoned rows. Re-adding an ID tombstones its old row.
+    `compact` writes a new generation of files without tombstoned rows and
+    switches to it by atomically replacing CURRENT.
+
+    Writes are serialised by a lock and searches run on an immutable
+    snapshot, so searching never blocks on appends. An index directory must
+    not be shared across processes: another process would not see appends
+    or tombstones, and its `compact` would delete the generation this one
+    still appends to. The owning API process also compacts it, see
+    `start_vector_compaction`.
+    """
+    def __init__(self, path: str, dimensions: int):
+        self.path = path
+        self.dimensions = dimensions
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    def _file(self, name: str, generation: Optional[int] = None) -> str:
+        return os.path.join(self.path, name.format(generation=self.generation if generation is None else generation))
+
+    def _load(self):
+        with tracer.start_as_current_span("vector_index.load", attributes={"vector_index.path": self.path}):
+            self.generation = 0
+            if os.path.exists(os.path.join(self.path, CURRENT_FILE)):
+                with open(os.path.join(self.path, CURRENT_FILE)) as f:
+                    self.generation = int(f.read().strip() or 0)
+
+            self._ids: List[str] = []
+            self._metadata: List[Optional[Dict[str, Any]]] = []
+            offsets = [0]
+            if os.path.exists(self._file(IDS_FILE)):
+                with open(self._file(IDS_FILE), "rb") as f:
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break  # torn final write
+                        record = json.loads(line)
+                        self._ids.append(record["id"])
+                        self._metadata.append(record.get("metadata"))
+                        offsets.append(offsets[-1] + len(line))
+
+            row_bytes = self.dimensions * 4
+            vectors_size = os.path.getsize(self._file(VECTORS_FILE)) if os.path.exists(self._file(VECTORS_FILE)) else 0
+            # A crash between the two appends leaves one file ahead; trust the shorter
+            count = min(vectors_size // row_bytes, len(self._ids))
+            del self._ids[count:], self._metadata[count:]
+            with open(self._file(IDS_FILE), "ab") as f:
+                f.truncate(offsets[count])
+            with open(self._file(VECTORS_FILE), "ab") as f:
+                f.truncate(count * row_bytes)
+
+            self._deleted = np.zeros(count, dtype=bool)
+            if os.path.exists(self._file(DELETED_FILE)):
+                with open(self._file(DELETED_FILE)) as f:
+                    rows = [int(line) for line in f if line.strip().isdigit()]
+                self._deleted[[row for row in rows if row < count]] = True
+
+            self._rows: Dict[str, int] = {
+                external_id: row for row, external_id in enumerate(self._ids) if not self._deleted[row]
+            }
+            self._remap(count)
+
+    def _remap(self, count: int):
+        self._vectors = (
+            np.memmap(self._file(VECTORS_FILE), dtype=np.float32, mode="r", shape=(count, self.dimensions))
+            if count else np.empty((0, self.dimensions), dtype=np.float32)
+        )
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def deleted_count(self) -> int:
+        return int(self._deleted.sum())
+
+    def _tombstone(self, rows: Sequence[int]):
+        if not rows:
+            return
+        with open(self._file(DELETED_FILE), "a") as f:
+            f.writelines(f"{row}\n" for row in rows)
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray, metadata: Optional[Sequence[Optional[Dict[str, Any]]]] = None):
+        """
+        Append vectors, replacing any existing rows with the same IDs
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dimensions)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        metadata = list(metadata) if metadata is not None else [None] * len(ids)
+
+        with self._lock:
+            start = len(self._ids)
+            replaced = [self._rows[external_id] for external_id in ids if external_id in self._rows]
+            # Duplicates within the batch: the last occurrence wins
+            last = {external_id: start + offset for offset, external_id in enumerate(ids)}
+            replaced += [row for offset, row in enumerate(range(start, start + len(ids))) if last[ids[offset]] != row]
+
+            with open(self._file(VECTORS_FILE), "ab") as f:
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._file(IDS_FILE), "a", encoding="utf-8") as f:
+                f.writelines(json.dumps({"id": i, "metadata": m}) + "\n" for i, m in zip(ids, metadata))
+            self._tombstone(replaced)
+
+            self._ids.extend(ids)
+            self._metadata.extend(metadata)
+            deleted = np.zeros(len(self._ids), dtype=bool)
+            deleted[:start] = self._deleted
+            deleted[replaced] = True
+            self._deleted = deleted
+            self._rows.update(last)
+            self._remap(len(self._ids))
+
+    def delete(self, ids: Sequence[str]) -> int:
+        """
+        Tombstone vectors by ID
+
+        Returns:
+            int: Number of vectors deleted
+        """
+        with self._lock:
+            rows = [self._rows.pop(external_id) for external_id in ids if external_id in self._rows]
+            self._tombstone(rows)
+            if rows:
+                deleted = self._deleted.copy()
+                deleted[rows] = True
+                self._deleted = deleted
+            return len(rows)
+
+    def search(self, query: np.ndarray, top_k: int = 10) -> List[Tuple[str, float, Optional[Dict[str, Any]]]]:
+        """
+        Find the `top_k` most cosine-similar live vectors
+
+        Returns:
+            list: (id, score, metadata) tuples, best first
+        """
+        # Snapshot: add/delete/compact swap these attributes rather than mutating them
+        vectors, deleted, ids, metadata = self._vectors, self._deleted, self._ids, self._metadata
+        count = min(len(vectors), len(deleted))
+        if count == 0 or top_k <= 0:
+            return []
+
+        query = np.asarray(query, dtype=np.float32).reshape(self.dimensions)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+
+        scores = vectors[:count] @ (query / norm)
+        scores[deleted[:count]] = -np.inf
+        k = min(top_k, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[row], float(scores[row]), metadata[row]) for row in top if scores[row] != -np.inf]
+
+    def compact(self) -> int:
+        """
+        Rewrite the index without tombstoned rows
+
+        Returns:
+            int: Number of rows reclaimed
+        """
+        with self._lock, tracer.start_as_current_span("vector_index.compact") as span:
+            reclaimed = self.deleted_count
+            span.set_attribute("vector_index.reclaimed", reclaimed)
+            if reclaimed == 0:
+                return 0
+
+            previous, generation = self.generation, self.generation + 1
+            live = np.flatnonzero(~self._deleted)
+            chunk = settings.AI_VECTOR_COMPACTION_CHUNK_ROWS
+            with open(self._file(VECTORS_FILE, generation), "wb") as f:
+                for start in range(0, len(live), chunk):
+                    f.write(np.ascontiguousarray(self._vectors[live[start:start + chunk]]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            ids = [self._ids[row] for row in live]
+            metadata = [self._metadata[row] for row in live]
+            with open(self._file(IDS_FILE, generation), "w", encoding="utf-8") as f:
+                f.writelines(json.dumps({"id": i, "metadata": m}) + "\n" for i, m in zip(ids, metadata))
+                f.flush()
+                os.fsync(f.fileno())
+
+            current = os.path.join(self.path, CURRENT_FILE)
+            with open(current + ".tmp", "w") as f:
+                f.write(str(generation))
+            os.replace(current + ".tmp", current)
+            self.generation = generation
+            for name in (VECTORS_FILE, IDS_FILE, DELETED_FILE):
+                # Searches still holding the old memmap keep reading the unlinked file
+                if os.path.exists(self._file(name, previous)):
+                    os.remove(self._file(name, previous))
+
+            self._ids, self._metadata = ids, metadata
+            self._deleted = np.zeros(len(ids), dtype=bool)
+            self._rows = {external_id: row for row, external_id in enumerate(ids)}
+            self._remap(len(ids))
+            logger.info(f"Compacted vector index {self.path}: reclaimed {reclaimed} rows")
+            return reclaimed
+
+_indexes: Dict[str, VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+def _open_index(path: str) -> VectorIndex:
+    # One instance per directory: a second one would append at stale row numbers
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = VectorIndex(path, settings.AI_EMBEDDING_DIMENSIONS)
+        return index
+
+def get_vector_index(model: str) -> VectorIndex:
+    """
+    Get the process-wide index for an embedding model
+    """
+    return _open_index(os.path.join(settings.AI_VECTOR_INDEX_PATH, re.sub(r"[^A-Za-z0-9_.-]", "_", model)))
+
+def list_vector_indexes() -> List[VectorIndex]:
+    """
+    Get every index on disk
+    """
+    if not os.path.isdir(settings.AI_VECTOR_INDEX_PATH):
+        return []
+    return [
+        _open_index(os.path.join(settings.AI_VECTOR_INDEX_PATH, name))
+        for name in sorted(os.listdir(settings.AI_VECTOR_INDEX_PATH))
+        if os.path.isdir(os.path.join(settings.AI_VECTOR_INDEX_PATH, name))
+    ]
+
+def compact_vector_indexes() -> int:
+    """
+    Compact indexes whose share of deleted rows reached AI_VECTOR_COMPACTION_MIN_DELETED_RATIO
+
+    Returns:
+        int: Rows reclaimed across all indexes
+    """
+    reclaimed = 0
+    for index in list_vector_indexes():
+        total = len(index) + index.deleted_count
+        if total and index.deleted_count / total >= settings.AI_VECTOR_COMPACTION_MIN_DELETED_RATIO:
+            reclaimed += index.compact()
+    return reclaimed
+
+_compactor: Optional[asyncio.Task] = None
+
+async def _compact_periodically():
+    while True:
+        await asyncio.sleep(settings.AI_VECTOR_COMPACTION_INTERVAL_SECONDS)
+        try:
+            reclaimed = await run_in_threadpool(compact_vector_indexes)
+            logger.info(f"Vector indexes compacted, {reclaimed} rows reclaimed")
+        except Exception as e:
+            logger.error(f"Error compacting vector indexes: {e}")
+
+async def start_vector_compaction():
+    """
+    Compact this process's indexes every AI_VECTOR_COMPACTION_INTERVAL_SECONDS
+
+    Runs inside the API process that owns the indexes rather than as a
+    scheduler cron job, which would open the same directories from another
+    process.
+    """
+    global _compactor
+    if settings.AI_VECTOR_COMPACTION_INTERVAL_SECONDS <= 0:
+        return
+    _compactor = asyncio.ensure_future(_compact_periodically())
+
+async def stop_vector_compaction():
+    """
+    Stop the periodic compaction
+    """
+    global _compactor
+    if _compactor is not None:
+        _compactor.cancel()
+        await asyncio.gather(_compactor, return_exceptions=True)
+        _compactor = None
@@ -0,0 +1,46 @@
+from fastapi.encoders import jsonable_encoder
+from app.core.config import settings
+from app.core.logger import setup_logging
+from app.core.response import ResponseModel
+from .ai_constants import MODEL_GOOGLE_GEMINI_PRO, MODEL_OPENAI_GPT35_TURBO
+from .ai_models import AIChatRequest, AIChatResponse, AIMessage, AIPrompt, AIResponse
+from .ai_service import get_google_ai_client, get_openai_client
+
+logger = setup_logging()
+
+WARMUP_TEXT = "warm-up"
+
+async def warm_up_openai():
+    """
+    Open the shared OpenAI client's keep-alive connection with a free models listing
+    """
+    if not settings.WARMUP_PROVIDERS or not settings.OPENAI_API_KEY:
+        return
+    # with_options copies the client but shares its connection pool
+    client = get_openai_client().with_options(timeout=settings.WARMUP_TIMEOUT_SECONDS, max_retries=0)
+    await client.models.list()
+
+async def warm_up_google():
+    """
+    Open Gemini's async channel with a free token count
+    """
+    if not settings.WARMUP_PROVIDERS or not settings.GOOGLE_API_KEY:
+        return
+    model = get_google_ai_client().GenerativeModel(MODEL_GOOGLE_GEMINI_PRO)
+    await model.count_tokens_async(WARMUP_TEXT, request_options={"timeout": settings.WARMUP_TIMEOUT_SECONDS})
+
+async def warm_up_serialization():
+    """
+    Run the AI request and response models through validation and JSON encoding once
+    """
+    message = {"role": "user", "content": WARMUP_TEXT}
+    request = AIChatRequest.model_validate({"messages": [message], "model": MODEL_OPENAI_GPT35_TURBO})
+    AIPrompt.model_validate({"text": WARMUP_TEXT, "model": MODEL_OPENAI_GPT35_TURBO})
+    usage = {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+    responses = [
+        AIChatResponse(message=AIMessage(**message), model=request.model, usage=usage),
+        AIResponse(text=WARMUP_TEXT, model=request.model, usage=usage)
+    ]
+    for response in responses:
+        response.model_dump_json()
+        jsonable_encoder(ResponseModel(trace_id="warmup").success_response(data=response))
@@ -0,0 +1,25 @@
+# Error messages
+ERROR_DEBUG_FORBIDDEN = "Invalid or missing debug token"
+ERROR_PROFILING_DISABLED = "Profiling is disabled"
+ERROR_PROFILE_NOT_FOUND = "Profile not found"
+ERROR_MEMORY_DEBUG_DISABLED = "Memory instrumentation is disabled"
+ERROR_TRACEMALLOC_NOT_TRACING = "tracemalloc is not tracing"
+ERROR_SNAPSHOT_NOT_FOUND = "Snapshot not found"
+
+# Snapshot grouping keys, as accepted by tracemalloc
+GROUP_BY_LINENO = "lineno"
+GROUP_BY_FILENAME = "filename"
+GROUP_BY_TRACEBACK = "traceback"
+
+# Success messages
+MSG_PROFILES_OK = "Profiles retrieved successfully"
+MSG_TRACEMALLOC_STARTED = "tracemalloc started"
+MSG_TRACEMALLOC_STOPPED = "tracemalloc stopped"
+MSG_MEMORY_STATUS_OK = "Memory status retrieved successfully"
+MSG_SNAPSHOT_TAKEN = "Snapshot taken successfully"
+MSG_SNAPSHOT_DELETED = "Snapshot deleted successfully"
+MSG_SNAPSHOT_STATS_OK = "Snapshot statistics retrieved successfully"
+MSG_SNAPSHOT_DIFF_OK = "Snapshot diff computed successfully"
+MSG_GC_STATS_OK = "GC statistics retrieved successfully"
+MSG_GC_COLLECTED = "Garbage collection completed"
+MSG_OBJECT_COUNTS_OK = "Object counts retrieved successfully"
@@ -0,0 +1,244 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from starlette.concurrency import run_in_threadpool
+from .debug_service import (
+    verify_debug_token,
+    list_profiles,
+    download_profile,
+    download_global_profile,
+    ensure_memory_debug_enabled,
+    get_memory_status,
+    start_tracemalloc,
+    stop_tracemalloc,
+    take_snapshot,
+    delete_snapshot,
+    snapshot_statistics,
+    snapshot_diff,
+    get_gc_stats,
+    collect_garbage,
+    get_object_counts
+)
+from .debug_constants import (
+    MSG_PROFILES_OK,
+    MSG_TRACEMALLOC_STARTED,
+    MSG_TRACEMALLOC_STOPPED,
+    MSG_MEMORY_STATUS_OK,
+    MSG_SNAPSHOT_TAKEN,
+    MSG_SNAPSHOT_DELETED,
+    MSG_SNAPSHOT_STATS_OK,
+    MSG_SNAPSHOT_DIFF_OK,
+    MSG_GC_STATS_OK,
+    MSG_GC_COLLECTED,
+    MSG_OBJECT_COUNTS_OK
+)
+from app.core.config import settings
+from app.core.logger import setup_logging
+from app.core.response import ResponseModel
+from app.core.tracing import trace_request
+
+logger = setup_logging()
+router = APIRouter(dependencies=[Depends(verify_debug_token)])
+
+PROFILE_FORMAT = Query("speedscope", pattern="^(speedscope|collapsed)$")
+GROUP_BY = Query("lineno", pattern="^(lineno|filename|traceback)$")
+SNAPSHOT_NAME_PATTERN = "^[A-Za-z0-9_.-]{1,64}$"
+
+@router.get("/profiles")
+async def get_profiles(response: ResponseModel = Depends(trace_request)):
+    """
+    List stored request profiles
+
+    Returns:
+        dict: Profile summaries, newest first
+    """
+    return response.success_response(
+        data=list_profiles(),
+        message=MSG_PROFILES_OK
+    )
+
+@router.get("/profiles/global")
+async def get_global_profile(
+    minutes: int = Query(settings.PROFILING_GLOBAL_WINDOW_MINUTES, ge=1, le=settings.PROFILING_GLOBAL_WINDOW_MINUTES),
+    format: str = PROFILE_FORMAT
+):
+    """
+    Download the global sampled profile of the last `minutes` minutes
+
+    Returns:
+        Response: speedscope JSON or collapsed stacks
+    """
+    return download_global_profile(minutes, format)
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = PROFILE_FORMAT):
+    """
+    Download a request profile by trace id
+
+    Returns:
+        Response: speedscope JSON or collapsed stacks
+    """
+    logger.info(f"Profile {profile_id} downloaded")
+    return download_profile(profile_id, format)
+
+
+memory_router = APIRouter(dependencies=[Depends(ensure_memory_debug_enabled)])
+
+@memory_router.get("")
+async def get_memory(response: ResponseModel = Depends(trace_request)):
+    """
+    Get process RSS, tracemalloc state and stored snapshots
+
+    Returns:
+        dict: Memory status
+    """
+    return response.success_response(
+        data=get_memory_status(),
+        message=MSG_MEMORY_STATUS_OK
+    )
+
+@memory_router.post("/tracemalloc/start")
+async def post_tracemalloc_start(
+    frames: int = Query(1, ge=1, le=100),
+    response: ResponseModel = Depends(trace_request)
+):
+    """
+    Start tracing allocations; more frames per traceback cost more memory and CPU
+
+    Returns:
+        dict: Memory status
+    """
+    return response.success_response(
+        data=start_tracemalloc(frames),
+        message=MSG_TRACEMALLOC_STARTED
+    )
+
+@memory_router.post("/tracemalloc/stop")
+async def post_tracemalloc_stop(response: ResponseModel = Depends(trace_request)):
+    """
+    Stop tracing allocations and drop stored snapshots
+
+    Returns:
+        dict: Memory status
+    """
+    return response.success_response(
+        data=stop_tracemalloc(),
+        message=MSG_TRACEMALLOC_STOPPED
+    )
+
+@memory_router.post("/snapshots")
+async def post_snapshot(
+    name: str = Query(..., pattern=SNAPSHOT_NAME_PATTERN),
+    response: ResponseModel = Depends(trace_request)
+):
+    """
+    Take a named tracemalloc snapshot
+
+    Returns:
+        dict: Snapshot totals
+    """
+    data = await run_in_threadpool(take_snapshot, name)
+    return response.success_response(
+        data=data,
+        message=MSG_SNAPSHOT_TAKEN
+    )
+
+@memory_router.get("/snapshots/diff")
+async def get_snapshot_diff(
+    base: str = Query(..., pattern=SNAPSHOT_NAME_PATTERN),
+    target: Optional[str] = Query(None, pattern=SNAPSHOT_NAME_PATTERN),
+    group_by: str = GROUP_BY,
+    limit: int = Query(25, ge=1, le=500),
+    response: ResponseModel = Depends(trace_request)
+):
+    """
+    Compare two snapshots, or a snapshot against the live heap when `target` is omitted
+
+    Returns:
+        dict: Allocation sites, largest growth first
+    """
+    data = await run_in_threadpool(snapshot_diff, base, target, group_by, limit)
+    return response.success_response(
+        data=data,
+        message=MSG_SNAPSHOT_DIFF_OK
+    )
+
+@memory_router.get("/snapshots/{name}")
+async def get_snapshot(
+    name: str,
+    group_by: str = GROUP_BY,
+    limit: int = Query(25, ge=1, le=500),
+    response: ResponseModel = Depends(trace_request)
+):
+    """
+    Get the top allocation sites of a snapshot
+
+    Returns:
+        dict: Allocation sites, largest first
+    """
+    data = await run_in_threadpool(snapshot_statistics, name, group_by, limit)
+    return response.success_response(
+        data=data,
+        message=MSG_SNAPSHOT_STATS_OK
+    )
+
+@memory_router.delete("/snapshots/{name}")
+async def remove_snapshot(name: str, response: ResponseModel = Depends(trace_request)):
+    """
+    Delete a stored snapshot
+
+    Returns:
+        dict: Success message
+    """
+    delete_snapshot(name)
+    return response.success_response(
+        data=None,
+        message=MSG_SNAPSHOT_DELETED
+    )
+
+@memory_router.get("/gc")
+async def get_gc(response: ResponseModel = Depends(trace_request)):
+    """
+    Get garbage collector counts, thresholds and per-generation stats
+
+    Returns:
+        dict: GC statistics
+    """
+    return response.success_response(
+        data=get_gc_stats(),
+        message=MSG_GC_STATS_OK
+    )
+
+@memory_router.post("/gc/collect")
+async def post_gc_collect(
+    generation: int = Query(2, ge=0, le=2),
+    response: ResponseModel = Depends(trace_request)
+):
+    """
+    Force a garbage collection of `generation`
+
+    Returns:
+        dict: Objects collected and pause time
+    """
+    return response.success_response(
+        data=collect_garbage(generation),
+        message=MSG_GC_COLLECTED
+    )
+
+@memory_router.get("/objects")
+async def get_objects(
+    limit: int = Query(50, ge=1, le=1000),
+    response: ResponseModel = Depends(trace_request)
+):
+    """
+    Count live GC-tracked objects per type
+
+    Returns:
+        dict: Types, most common first
+    """
+    data = await run_in_threadpool(get_object_counts, limit)
+    return response.success_response(
+        data=data,
+        message=MSG_OBJECT_COUNTS_OK
+    )
+
+router.include_router(memory_router, prefix="/memory")
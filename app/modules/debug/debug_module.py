@@ -0,0 +1,9 @@
+from app.core.config import settings
+from app.core.modules import ModuleSpec, RouterSpec
+
+module = ModuleSpec(
+    name="debug",
+    routers=[RouterSpec("app.modules.debug.debug_controller:router", prefix="/api/debug", tags=["Debug"])],
+    # Debug endpoints only exist when a token protects them
+    enabled=bool(settings.DEBUG_TOKEN)
+)
@@ -0,0 +1,291 @@
+import gc
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+from fastapi import Header, HTTPException, status
+from fastapi.responses import Response
+from app.core.config import settings
+from app.core.logger import setup_logging
+from app.core.profiling import Profile, is_authorized, render_profile, profile_store, global_sampler
+from app.core.tracing import get_tracer
+from .debug_constants import (
+    ERROR_DEBUG_FORBIDDEN,
+    ERROR_PROFILING_DISABLED,
+    ERROR_PROFILE_NOT_FOUND,
+    ERROR_MEMORY_DEBUG_DISABLED,
+    ERROR_TRACEMALLOC_NOT_TRACING,
+    ERROR_SNAPSHOT_NOT_FOUND,
+    GROUP_BY_FILENAME,
+    GROUP_BY_TRACEBACK
+)
+
+logger = setup_logging()
+tracer = get_tracer()
+
+async def verify_debug_token(x_debug_token: Optional[str] = Header(None)):
+    """
+    Dependency rejecting requests without the configured debug token
+    """
+    if not is_authorized(x_debug_token, settings.DEBUG_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=ERROR_DEBUG_FORBIDDEN
+        )
+
+def _download(profile: Profile, fmt: str) -> Response:
+    body, media_type, filename = render_profile(profile, fmt)
+    return Response(
+        content=body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """
+    Summaries of the stored request profiles, newest first
+    """
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_PROFILING_DISABLED
+        )
+    return [profile.summary() for profile in profile_store.list()]
+
+def download_profile(profile_id: str, fmt: str) -> Response:
+    """
+    Download a request profile by trace id
+    """
+    profile = profile_store.get(profile_id) if settings.PROFILING_ENABLED else None
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_PROFILE_NOT_FOUND
+        )
+    return _download(profile, fmt)
+
+def download_global_profile(minutes: int, fmt: str) -> Response:
+    """
+    Download the global sampled profile aggregated over the last `minutes` minutes
+    """
+    if not settings.PROFILING_GLOBAL_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_PROFILING_DISABLED
+        )
+    with tracer.start_as_current_span("aggregate_global_profile", attributes={"profile.minutes": minutes}):
+        return _download(global_sampler.aggregate(minutes), fmt)
+
+# Allocations made by tracemalloc itself and the import machinery are noise in diffs
+SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>")
+]
+
+class _Snapshot:
+    def __init__(self, snapshot: tracemalloc.Snapshot):
+        self.snapshot = snapshot
+        self.taken_at = time.time()
+
+_snapshots: "OrderedDict[str, _Snapshot]" = OrderedDict()
+_snapshots_lock = threading.Lock()
+
+def ensure_memory_debug_enabled():
+    """
+    Raise 404 unless memory instrumentation is enabled
+    """
+    if not settings.DEBUG_MEMORY_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MEMORY_DEBUG_DISABLED
+        )
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # Peak rather than current RSS, in bytes on macOS and KiB elsewhere
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return None
+
+def get_memory_status() -> Dict[str, Any]:
+    """
+    Process RSS, tracemalloc state and stored snapshot names
+    """
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "rssBytes": _rss_bytes(),
+        "tracing": tracemalloc.is_tracing(),
+        "tracebackFrames": tracemalloc.get_traceback_limit(),
+        "tracedBytes": current,
+        "tracedPeakBytes": peak,
+        "tracemallocOverheadBytes": tracemalloc.get_tracemalloc_memory(),
+        "snapshots": [
+            {"name": name, "takenAt": entry.taken_at, "traces": len(entry.snapshot.traces)}
+            for name, entry in _snapshots.items()
+        ]
+    }
+
+def start_tracemalloc(frames: int) -> Dict[str, Any]:
+    """
+    Start tracing allocations, keeping `frames` frames per traceback
+    """
+    if tracemalloc.is_tracing() and tracemalloc.get_traceback_limit() != frames:
+        tracemalloc.stop()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        logger.warning(f"tracemalloc started with {frames} frames per traceback")
+    return get_memory_status()
+
+def stop_tracemalloc() -> Dict[str, Any]:
+    """
+    Stop tracing allocations and drop stored snapshots
+    """
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        logger.warning("tracemalloc stopped")
+    with _snapshots_lock:
+        _snapshots.clear()
+    return get_memory_status()
+
+def take_snapshot(name: str) -> Dict[str, Any]:
+    """
+    Take a named snapshot, replacing one with the same name
+
+    The oldest snapshot is dropped beyond DEBUG_MAX_SNAPSHOTS.
+    """
+    if not tracemalloc.is_tracing():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=ERROR_TRACEMALLOC_NOT_TRACING
+        )
+    with tracer.start_as_current_span("take_memory_snapshot", attributes={"snapshot.name": name}):
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        with _snapshots_lock:
+            _snapshots.pop(name, None)
+            _snapshots[name] = _Snapshot(snapshot)
+            while len(_snapshots) > settings.DEBUG_MAX_SNAPSHOTS:
+                _snapshots.popitem(last=False)
+
+    stats = snapshot.statistics("filename")
+    return {
+        "name": name,
+        "traces": len(snapshot.traces),
+        "sizeBytes": sum(stat.size for stat in stats),
+        "count": sum(stat.count for stat in stats)
+    }
+
+def delete_snapshot(name: str):
+    """
+    Drop a stored snapshot
+    """
+    with _snapshots_lock:
+        if _snapshots.pop(name, None) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=ERROR_SNAPSHOT_NOT_FOUND
+            )
+
+def _get_snapshot(name: str) -> tracemalloc.Snapshot:
+    entry = _snapshots.get(name)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_SNAPSHOT_NOT_FOUND
+        )
+    return entry.snapshot
+
+def _location(traceback: tracemalloc.Traceback, group_by: str) -> Dict[str, Any]:
+    if group_by == GROUP_BY_TRACEBACK:
+        return {"traceback": [f"{frame.filename}:{frame.lineno}" for frame in traceback]}
+    frame = traceback[0]
+    return {"file": frame.filename, "line": frame.lineno if group_by != GROUP_BY_FILENAME else None}
+
+def snapshot_statistics(name: str, group_by: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Top `limit` allocation sites of a snapshot by size
+    """
+    stats = _get_snapshot(name).statistics(group_by)
+    return [
+        {**_location(stat.traceback, group_by), "sizeBytes": stat.size, "count": stat.count}
+        for stat in stats[:limit]
+    ]
+
+def snapshot_diff(base: str, target: Optional[str], group_by: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Top `limit` allocation sites by size growth from `base` to `target`
+
+    Without `target`, compares against a snapshot taken now.
+    """
+    base_snapshot = _get_snapshot(base)
+    if target:
+        target_snapshot = _get_snapshot(target)
+    elif tracemalloc.is_tracing():
+        target_snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=ERROR_TRACEMALLOC_NOT_TRACING
+        )
+
+    with tracer.start_as_current_span("diff_memory_snapshots", attributes={"snapshot.base": base}):
+        stats = target_snapshot.compare_to(base_snapshot, group_by)
+    return [
+        {
+            **_location(stat.traceback, group_by),
+            "sizeDiffBytes": stat.size_diff,
+            "countDiff": stat.count_diff,
+            "sizeBytes": stat.size,
+            "count": stat.count
+        }
+        for stat in stats[:limit]
+    ]
+
+def get_gc_stats() -> Dict[str, Any]:
+    """
+    Garbage collector state: per-generation counts, thresholds and collection stats
+    """
+    return {
+        "enabled": gc.isenabled(),
+        "counts": list(gc.get_count()),
+        "thresholds": list(gc.get_threshold()),
+        "generations": gc.get_stats(),
+        "uncollectable": len(gc.garbage),
+        "frozen": gc.get_freeze_count()
+    }
+
+def collect_garbage(generation: int) -> Dict[str, Any]:
+    """
+    Run a collection of `generation` and report what it found
+    """
+    started = time.perf_counter()
+    collected = gc.collect(generation)
+    return {
+        "generation": generation,
+        "collected": collected,
+        "durationMs": round((time.perf_counter() - started) * 1000, 3),
+        "uncollectable": len(gc.garbage)
+    }
+
+def get_object_counts(limit: int) -> List[Dict[str, Any]]:
+    """
+    Live objects tracked by the GC, counted per type, most common first
+
+    Walks every tracked object, so it is slow on big heaps; run it in a thread.
+    """
+    counts = Counter(
+        f"{type(obj).__module__}.{type(obj).__qualname__}" for obj in gc.get_objects()
+    )
+    return [{"type": name, "count": count} for name, count in counts.most_common(limit)]
@@ -13,4 +13,6 @@ MSG_HEALTH_OK = "Service is healthy"
 MSG_HEALTH_FAIL = "Service is unhealthy"
 MSG_COMPONENT_OK = "Component is healthy"
 MSG_COMPONENT_FAIL = "Component is unhealthy"
+MSG_READY = "Service is ready to accept requests"
+MSG_NOT_READY = "Service is warming up"
 
@@ -1,17 +1,23 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from .health_service import get_health_status
-from .health_constants import STATUS_OK, MSG_HEALTH_OK, MSG_HEALTH_FAIL
+from .health_constants import STATUS_OK, MSG_HEALTH_OK, MSG_HEALTH_FAIL, MSG_READY, MSG_NOT_READY
 from app.core.logger import setup_logging
 from app.core.response import ResponseModel
 from app.core.tracing import trace_request
+from app.core.cache import cached_route
+from app.core.warmup import warmup_state
 
 logger = setup_logging()
 router = APIRouter()
 
 @router.get("/")
+@cached_route(ttl=5, stale_while_revalidate=10)
 async def health_check(request: Request, response: ResponseModel = Depends(trace_request)):
     """
     Perform a health check of the service
+
+    Component probes are cached briefly so frequent probes don't hammer
+    the database and AI providers.
     
     Returns:
         dict: Health status information
@@ -28,14 +34,21 @@ async def health_check(request: Request, response: ResponseModel = Depends(trace
 async def readiness_check(response: ResponseModel = Depends(trace_request)):
     """
     Check if the service is ready to accept requests
+
+    Reports 503 until the startup warm-up has finished or timed out.
     
     Returns:
         dict: Readiness status information
     """
     logger.info(f"Readiness check requested - Trace ID: {response.trace_id}")
+    if not warmup_state.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=MSG_NOT_READY
+        )
     return response.success_response(
         data="ready",
-        message="Service is ready to accept requests"
+        message=MSG_READY
     )
 
 @router.get("/liveness")
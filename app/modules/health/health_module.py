@@ -0,0 +1,6 @@
+from app.core.modules import ModuleSpec, RouterSpec
+
+module = ModuleSpec(
+    name="health",
+    routers=[RouterSpec("app.modules.health.health_controller:router", prefix="/api/health", tags=["Health"])]
+)
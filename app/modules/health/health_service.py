@@ -9,9 +9,9 @@ from app.modules.health.health_constants import (
     COMPONENT_API,
     COMPONENT_AI
 )
-import openai
-import google.generativeai as genai
 from app.core.config import settings
+from app.core.resilience import STATE_CLOSED, get_circuit_breakers
+from app.modules.ai.ai_constants import PROVIDER_OPENAI, PROVIDER_GOOGLE
 
 logger = setup_logging()
 tracer = get_tracer()
@@ -37,10 +37,28 @@ async def check_database_health():
             "message": f"Database connection failed: {str(e)}"
         }
 
+def check_circuit_health(provider: str, label: str):
+    """
+    Report a provider's health from its circuit breakers instead of probing it
+    """
+    unhealthy = [breaker for breaker in get_circuit_breakers(f"{provider}:") if breaker.state != STATE_CLOSED]
+    if unhealthy:
+        states = ", ".join(f"{breaker.name} {breaker.state}" for breaker in unhealthy)
+        return {
+            "status": STATUS_FAIL,
+            "name": COMPONENT_AI,
+            "message": f"{label} circuit not closed: {states}"
+        }
+    return {
+        "status": STATUS_OK,
+        "name": COMPONENT_AI,
+        "message": f"{label} circuits closed"
+    }
+
 @trace_function
 async def check_openai_health():
     """
-    Check OpenAI API connection health
+    Check OpenAI API health from its circuit breakers
     """
     if not settings.OPENAI_API_KEY:
         return {
@@ -49,26 +67,12 @@ async def check_openai_health():
             "message": "OpenAI API key not configured"
         }
     
-    try:
-        client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        client.models.list()
-        return {
-            "status": STATUS_OK,
-            "name": COMPONENT_AI,
-            "message": "OpenAI API connection successful"
-        }
-    except Exception as e:
-        logger.error(f"OpenAI health check failed: {e}")
-        return {
-            "status": STATUS_FAIL,
-            "name": COMPONENT_AI,
-            "message": f"OpenAI API connection failed: {str(e)}"
-        }
+    return check_circuit_health(PROVIDER_OPENAI, "OpenAI")
 
 @trace_function
 async def check_google_ai_health():
     """
-    Check Google AI API connection health
+    Check Google AI API health from its circuit breakers
     """
     if not settings.GOOGLE_API_KEY:
         return {
@@ -77,21 +81,7 @@ async def check_google_ai_health():
             "message": "Google AI API key not configured"
         }
     
-    try:
-        genai.configure(api_key=settings.GOOGLE_API_KEY)
-        models = genai.list_models()
-        return {
-            "status": STATUS_OK,
-            "name": COMPONENT_AI,
-            "message": "Google AI API connection successful"
-        }
-    except Exception as e:
-        logger.error(f"Google AI health check failed: {e}")
-        return {
-            "status": STATUS_FAIL,
-            "name": COMPONENT_AI,
-            "message": f"Google AI API connection failed: {str(e)}"
-        }
+    return check_circuit_health(PROVIDER_GOOGLE, "Google AI")
 
 @trace_function
 async def get_health_status():
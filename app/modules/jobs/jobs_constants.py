@@ -0,0 +1,27 @@
+# Job statuses
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_SUCCEEDED = "succeeded"
+JOB_STATUS_FAILED = "failed"
+JOB_STATUS_CANCELLED = "cancelled"
+JOB_TERMINAL_STATUSES = (JOB_STATUS_SUCCEEDED, JOB_STATUS_FAILED, JOB_STATUS_CANCELLED)
+
+# Job types whose token usage counts against the enqueuing client's AI budget
+AI_JOB_TYPE_PREFIX = "ai."
+
+# Server-sent event names
+EVENT_STATUS = "status"
+EVENT_DONE = "done"
+EVENT_TIMEOUT = "timeout"
+
+# Error messages
+ERROR_JOB_NOT_FOUND = "Job not found"
+ERROR_JOB_TYPE_NOT_SUPPORTED = "Job type not supported"
+ERROR_JOB_PAYLOAD_INVALID = "Invalid job payload"
+ERROR_JOB_FINISHED = "Job has already finished"
+ERROR_JOB_ATTEMPTS_EXHAUSTED = "Job lease expired too many times"
+
+# Success messages
+MSG_JOB_QUEUED = "Job queued successfully"
+MSG_JOB_OK = "Job retrieved successfully"
+MSG_JOB_CANCELLED = "Job cancelled successfully"
@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from .jobs_service import enqueue_job, get_job, cancel_job, wait_for_job, stream_job_events, notify_job_enqueued
+from .jobs_models import JobCreateRequest
+from .jobs_constants import AI_JOB_TYPE_PREFIX, MSG_JOB_QUEUED, MSG_JOB_OK, MSG_JOB_CANCELLED
+from app.core.admission import get_client_key
+from app.core.config import settings
+from app.core.logger import setup_logging
+from app.core.orjson_route import ORJSONRoute
+from app.core.response import ResponseModel
+from app.core.tracing import trace_request
+
+logger = setup_logging()
+router = APIRouter(route_class=ORJSONRoute)
+
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    request: JobCreateRequest,
+    http_request: Request,
+    response: ResponseModel = Depends(trace_request)
+):
+    """
+    Queue a background job; poll, long-poll or stream its status by ID
+
+    AI jobs are charged to the enqueuing client, so a client over its token
+    budget gets the same 429 as from the AI routes.
+
+    Returns:
+        dict: The queued job
+    """
+    logger.info(f"Job of type {request.type} requested - Trace ID: {response.trace_id}")
+    client = get_client_key(http_request.scope)
+    if request.type.startswith(AI_JOB_TYPE_PREFIX):
+        # AI job types only exist when the ai module is enabled, so import it on use
+        from app.modules.ai.ai_usage_service import check_usage_budget
+
+        check_usage_budget(client)
+    job = await run_in_threadpool(enqueue_job, request, response.trace_id, client)
+    notify_job_enqueued()
+
+    return response.success_response(
+        data=job.model_dump(),
+        message=MSG_JOB_QUEUED
+    )
+
+@router.get("/{job_id}")
+async def read_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=settings.JOBS_MAX_WAIT_SECONDS),
+    response: ResponseModel = Depends(trace_request)
+):
+    """
+    Get a job's status and result; with `wait`, hold the request until the job finishes or `wait` seconds pass
+
+    Returns:
+        dict: The job
+    """
+    job = await wait_for_job(job_id, wait) if wait else await run_in_threadpool(get_job, job_id)
+
+    return response.success_response(
+        data=job.model_dump(),
+        message=MSG_JOB_OK
+    )
+
+@router.get("/{job_id}/events")
+async def stream_job(job_id: str):
+    """
+    Stream a job's status changes as server-sent events
+
+    Returns:
+        StreamingResponse: `status` events followed by a `done` event carrying the result
+    """
+    job = await run_in_threadpool(get_job, job_id)
+
+    return StreamingResponse(
+        stream_job_events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@router.delete("/{job_id}")
+async def delete_job(job_id: str, response: ResponseModel = Depends(trace_request)):
+    """
+    Cancel a queued or running job
+
+    Returns:
+        dict: The cancelled job
+    """
+    job = await run_in_threadpool(cancel_job, job_id)
+    logger.info(f"Job {job_id} cancelled - Trace ID: {response.trace_id}")
+
+    return response.success_response(
+        data=job.model_dump(),
+        message=MSG_JOB_CANCELLED
+    )
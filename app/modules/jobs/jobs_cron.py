@@ -0,0 +1,31 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+from app.core.config import settings
+from app.core.logger import logger
+from .jobs_service import purge_finished_jobs
+
+def purge_old_jobs():
+    """
+    Delete finished jobs older than JOBS_RETENTION_DAYS
+    """
+    logger.info("Running scheduled job: purge_old_jobs")
+    try:
+        deleted = purge_finished_jobs(settings.JOBS_RETENTION_DAYS)
+        logger.info(f"Old jobs purged, {deleted} deleted")
+    except Exception as e:
+        logger.error(f"Error purging old jobs: {e}")
+
+def register_jobs(scheduler: BackgroundScheduler):
+    """
+    Register jobs module cron jobs
+    """
+    # Purge finished jobs daily
+    scheduler.add_job(
+        purge_old_jobs,
+        'cron',
+        hour=4,
+        minute=0,
+        id='purge_old_jobs',
+        replace_existing=True
+    )
+    
+    logger.info("Jobs module cron jobs registered successfully")
@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
+
+class JobCreateRequest(BaseModel):
+    """
+    Job enqueue request model
+    """
+    type: str
+    payload: Dict[str, Any]
+    max_attempts: Optional[int] = Field(None, ge=1, le=20)
+    delay_seconds: float = Field(0, ge=0, le=86400)
+
+class JobResponse(BaseModel):
+    """
+    Job status model
+    """
+    id: str
+    type: str
+    status: str
+    attempts: int
+    max_attempts: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
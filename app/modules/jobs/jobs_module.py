@@ -0,0 +1,10 @@
+from app.core.modules import ModuleSpec, RouterSpec, ROLE_WORKER
+
+module = ModuleSpec(
+    name="jobs",
+    routers=[RouterSpec("app.modules.jobs.jobs_controller:router", prefix="/api/jobs", tags=["Jobs"])],
+    cron="app.modules.jobs.jobs_cron:register_jobs",
+    tables=["app.modules.jobs.jobs_tables"],
+    startup={ROLE_WORKER: ["app.modules.jobs.jobs_worker:start_job_worker"]},
+    shutdown={ROLE_WORKER: ["app.modules.jobs.jobs_worker:stop_job_worker"]}
+)
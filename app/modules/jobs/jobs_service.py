@@ -0,0 +1,432 @@
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import and_, delete, func, or_, select, update
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.core.logger import setup_logging
+from app.core.tracing import get_tracer, trace_function
+from app.core.modules import register_job_handlers
+from .jobs_constants import (
+    JOB_STATUS_QUEUED,
+    JOB_STATUS_RUNNING,
+    JOB_STATUS_SUCCEEDED,
+    JOB_STATUS_FAILED,
+    JOB_STATUS_CANCELLED,
+    JOB_TERMINAL_STATUSES,
+    EVENT_STATUS,
+    EVENT_DONE,
+    EVENT_TIMEOUT,
+    ERROR_JOB_NOT_FOUND,
+    ERROR_JOB_TYPE_NOT_SUPPORTED,
+    ERROR_JOB_PAYLOAD_INVALID,
+    ERROR_JOB_FINISHED
+)
+from .jobs_models import JobCreateRequest, JobResponse
+from .jobs_tables import Job
+
+logger = setup_logging()
+tracer = get_tracer()
+
+# Seconds between SSE keep-alive comments, so proxies don't drop idle streams
+SSE_KEEPALIVE_SECONDS = 15
+
+JobHandler = Callable[[BaseModel], Awaitable[Any]]
+
+_handlers: Dict[str, Tuple[Type[BaseModel], JobHandler]] = {}
+_handlers_loaded = False
+
+def register_job_handler(job_type: str, payload_model: Type[BaseModel], handler: JobHandler):
+    """
+    Register the coroutine that runs jobs of `job_type`; payloads are validated with `payload_model`
+    """
+    _handlers[job_type] = (payload_model, handler)
+
+def get_job_handler(job_type: str) -> Tuple[Type[BaseModel], JobHandler]:
+    """
+    Get the payload model and handler for a job type
+
+    Handlers are registered by enabled modules on first use, so processes
+    that never enqueue or run jobs don't import the modules' job code.
+    """
+    global _handlers_loaded
+    if not _handlers_loaded:
+        register_job_handlers(register_job_handler)
+        _handlers_loaded = True
+    if job_type not in _handlers:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_JOB_TYPE_NOT_SUPPORTED
+        )
+    return _handlers[job_type]
+
+def _utcnow() -> datetime:
+    # Naive UTC: SQLite drops timezone info, so store every timestamp the same way
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.replace(tzinfo=timezone.utc).isoformat() if value is not None else None
+
+def _to_response(job: Job) -> JobResponse:
+    return JobResponse(
+        id=job.id,
+        type=job.type,
+        status=job.status,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        result=job.result,
+        error=job.error,
+        created_at=_isoformat(job.created_at),
+        started_at=_isoformat(job.started_at),
+        finished_at=_isoformat(job.finished_at)
+    )
+
+class ClaimedJob:
+    """
+    A job leased to a worker; writes back are fenced by `lease_id`
+    """
+    def __init__(self, job: Job):
+        self.id = job.id
+        self.type = job.type
+        self.payload = job.payload
+        self.attempts = job.attempts
+        self.max_attempts = job.max_attempts
+        self.lease_id = job.lease_id
+        self.trace_id = job.trace_id
+        self.client = job.client
+        self.lease_lost = False
+
+@trace_function
+def enqueue_job(request: JobCreateRequest, trace_id: Optional[str] = None, client: Optional[str] = None) -> JobResponse:
+    """
+    Validate a job's payload and queue it
+
+    Args:
+        request: Job enqueue request
+        trace_id: Trace ID of the enqueuing request, kept for correlation
+        client: Client key of the enqueuing request, charged for the job's AI usage
+
+    Returns:
+        JobResponse: The queued job
+    """
+    payload_model, _ = get_job_handler(request.type)
+    try:
+        payload = payload_model.model_validate(request.payload)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{ERROR_JOB_PAYLOAD_INVALID}: {e.errors(include_url=False)}"
+        )
+
+    now = _utcnow()
+    job = Job(
+        id=str(uuid.uuid4()),
+        type=request.type,
+        status=JOB_STATUS_QUEUED,
+        payload=payload.model_dump(),
+        attempts=0,
+        max_attempts=request.max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=now + timedelta(seconds=request.delay_seconds),
+        trace_id=trace_id,
+        client=client,
+        created_at=now
+    )
+    with SessionLocal() as db:
+        db.add(job)
+        db.commit()
+        logger.info(f"Job {job.id} ({job.type}) queued")
+        return _to_response(job)
+
+@trace_function
+def get_job(job_id: str) -> JobResponse:
+    """
+    Get a job's status, and its result once finished
+
+    Raises:
+        HTTPException: 404 if the job does not exist
+    """
+    with SessionLocal() as db:
+        job = db.get(Job, job_id)
+        if job is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=ERROR_JOB_NOT_FOUND
+            )
+        return _to_response(job)
+
+@trace_function
+def cancel_job(job_id: str) -> JobResponse:
+    """
+    Cancel a queued or running job; a running job is interrupted at its next lease renewal
+
+    Raises:
+        HTTPException: 404 if the job does not exist, 409 if it already finished
+    """
+    with SessionLocal() as db:
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status.in_([JOB_STATUS_QUEUED, JOB_STATUS_RUNNING]))
+            .values(status=JOB_STATUS_CANCELLED, finished_at=_utcnow(), lease_id=None, locked_until=None)
+        )
+        db.commit()
+    job = get_job(job_id)
+    if result.rowcount == 0:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=ERROR_JOB_FINISHED
+        )
+    return job
+
+# Callbacks run when a job is queued by this process, e.g. to wake a local worker
+_enqueue_listeners: List[Callable[[], None]] = []
+
+def add_enqueue_listener(listener: Callable[[], None]):
+    """
+    Call `listener` on the event loop whenever this process queues a job
+    """
+    _enqueue_listeners.append(listener)
+
+def remove_enqueue_listener(listener: Callable[[], None]):
+    """
+    Stop calling `listener` on enqueue
+    """
+    if listener in _enqueue_listeners:
+        _enqueue_listeners.remove(listener)
+
+def notify_job_enqueued():
+    """
+    Run the enqueue listeners; must be called on the event loop
+    """
+    for listener in list(_enqueue_listeners):
+        listener()
+
+# Jobs finished by a worker in this process wake their watchers without waiting for the next poll
+_watchers: Dict[str, List[asyncio.Event]] = {}
+
+def notify_job_changed(job_id: str):
+    """
+    Wake local watchers of a job; must be called on the event loop
+    """
+    for event in _watchers.get(job_id, ()):
+        event.set()
+
+async def _wait_for_change(job_id: str, timeout: float):
+    event = asyncio.Event()
+    _watchers.setdefault(job_id, []).append(event)
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        _watchers[job_id].remove(event)
+        if not _watchers[job_id]:
+            del _watchers[job_id]
+
+async def wait_for_job(job_id: str, wait: float) -> JobResponse:
+    """
+    Long-poll a job: return once it finishes or `wait` seconds pass
+    """
+    deadline = time.monotonic() + wait
+    interval = settings.JOBS_WATCH_POLL_INTERVAL_MS / 1000
+    while True:
+        job = await run_in_threadpool(get_job, job_id)
+        remaining = deadline - time.monotonic()
+        if job.status in JOB_TERMINAL_STATUSES or remaining <= 0:
+            return job
+        await _wait_for_change(job_id, min(interval, remaining))
+
+def _sse(event: str, job: JobResponse) -> str:
+    return f"event: {event}\ndata: {job.model_dump_json()}\n\n"
+
+async def stream_job_events(job: JobResponse) -> AsyncIterator[str]:
+    """
+    Server-sent events for a job: `status` on every change, then `done`
+    with the finished job, or `timeout` after JOBS_STREAM_MAX_SECONDS
+    """
+    interval = settings.JOBS_WATCH_POLL_INTERVAL_MS / 1000
+    started = last_sent = time.monotonic()
+    yield _sse(EVENT_STATUS, job)
+    while job.status not in JOB_TERMINAL_STATUSES:
+        if time.monotonic() - started >= settings.JOBS_STREAM_MAX_SECONDS:
+            yield _sse(EVENT_TIMEOUT, job)
+            return
+        await _wait_for_change(job.id, interval)
+        current = await run_in_threadpool(get_job, job.id)
+        if (current.status, current.attempts) != (job.status, job.attempts):
+            job = current
+            if job.status not in JOB_TERMINAL_STATUSES:
+                yield _sse(EVENT_STATUS, job)
+                last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= SSE_KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+    yield _sse(EVENT_DONE, job)
+
+def claim_jobs(worker_id: str, limit: int, lease_seconds: float) -> List[ClaimedJob]:
+    """
+    Lease up to `limit` runnable jobs: queued jobs that are due, and running
+    jobs whose lease expired because their worker died or stalled
+
+    PostgreSQL claims with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    workers never wait on each other's rows. SQLite has no row locks; it
+    serialises writers, and each claim is a conditional UPDATE that only
+    matches if the row is unchanged since it was read.
+    """
+    now = _utcnow()
+    claimable = or_(
+        and_(Job.status == JOB_STATUS_QUEUED, Job.run_at <= now),
+        and_(Job.status == JOB_STATUS_RUNNING, Job.locked_until < now)
+    )
+    query = select(Job.id, Job.status, Job.lease_id).where(claimable).order_by(Job.run_at).limit(limit)
+    skip_locked = engine.dialect.name == "postgresql"
+    if skip_locked:
+        query = query.with_for_update(skip_locked=True)
+
+    with SessionLocal() as db, db.begin():
+        claimed = []
+        for job_id, job_status, lease_id in db.execute(query).all():
+            conditions = [Job.id == job_id]
+            if not skip_locked:
+                conditions += [
+                    Job.status == job_status,
+                    Job.lease_id == lease_id if lease_id is not None else Job.lease_id.is_(None)
+                ]
+            result = db.execute(
+                update(Job)
+                .where(*conditions)
+                .values(
+                    status=JOB_STATUS_RUNNING,
+                    attempts=Job.attempts + 1,
+                    lease_id=str(uuid.uuid4()),
+                    worker_id=worker_id,
+                    locked_until=now + timedelta(seconds=lease_seconds),
+                    started_at=func.coalesce(Job.started_at, now)
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                claimed.append(job_id)
+        if not claimed:
+            return []
+        return [ClaimedJob(job) for job in db.execute(select(Job).where(Job.id.in_(claimed))).scalars()]
+
+def _update_leased(job: ClaimedJob, **values) -> bool:
+    # Only the current lease holder may write; a lost lease makes this a no-op
+    with SessionLocal() as db:
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.lease_id == job.lease_id, Job.status == JOB_STATUS_RUNNING)
+            .values(**values)
+        )
+        db.commit()
+        return result.rowcount == 1
+
+def extend_lease(job: ClaimedJob, lease_seconds: float) -> bool:
+    """
+    Push back a running job's lease expiry
+
+    Returns:
+        bool: False if the lease was lost (expired and reclaimed, or the job was cancelled)
+    """
+    return _update_leased(job, locked_until=_utcnow() + timedelta(seconds=lease_seconds))
+
+def complete_job(job: ClaimedJob, result: Any) -> bool:
+    """
+    Store a job's result and mark it succeeded
+    """
+    return _update_leased(
+        job,
+        status=JOB_STATUS_SUCCEEDED,
+        result=result,
+        error=None,
+        finished_at=_utcnow(),
+        lease_id=None,
+        locked_until=None
+    )
+
+def fail_job(job: ClaimedJob, error: str, retry_delay: Optional[float]) -> str:
+    """
+    Record a failed attempt: requeue after `retry_delay` seconds while
+    attempts remain, otherwise mark the job failed
+
+    Returns:
+        str: The job's new status
+    """
+    if retry_delay is not None and job.attempts < job.max_attempts:
+        values = dict(
+            status=JOB_STATUS_QUEUED,
+            run_at=_utcnow() + timedelta(seconds=retry_delay),
+            error=error,
+            lease_id=None,
+            worker_id=None,
+            locked_until=None
+        )
+    else:
+        values = dict(
+            status=JOB_STATUS_FAILED,
+            error=error,
+            finished_at=_utcnow(),
+            lease_id=None,
+            locked_until=None
+        )
+    _update_leased(job, **values)
+    return values["status"]
+
+def release_job(job: ClaimedJob) -> bool:
+    """
+    Hand a job back to the queue without counting the attempt, e.g. on worker shutdown
+    """
+    return _update_leased(
+        job,
+        status=JOB_STATUS_QUEUED,
+        run_at=_utcnow(),
+        attempts=Job.attempts - 1,
+        lease_id=None,
+        worker_id=None,
+        locked_until=None
+    )
+
+def retry_delay(error: Exception, attempts: int) -> Optional[float]:
+    """
+    Seconds to wait before retrying a failed attempt, or None if retrying cannot help
+
+    Client errors and invalid payloads are permanent; rate limits, provider
+    outages and timeouts back off exponentially with full jitter, never
+    sooner than the provider's Retry-After.
+    """
+    retry_after = None
+    if isinstance(error, ValidationError):
+        return None
+    if isinstance(error, HTTPException):
+        if error.status_code < 500 and error.status_code not in (status.HTTP_408_REQUEST_TIMEOUT, status.HTTP_429_TOO_MANY_REQUESTS):
+            return None
+        retry_after = (error.headers or {}).get("Retry-After")
+
+    backoff = random.uniform(0, min(settings.JOBS_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), settings.JOBS_RETRY_MAX_SECONDS))
+    try:
+        return max(backoff, float(retry_after)) if retry_after is not None else backoff
+    except ValueError:
+        return backoff
+
+def purge_finished_jobs(older_than_days: int) -> int:
+    """
+    Delete jobs that finished more than `older_than_days` days ago
+
+    Returns:
+        int: Number of jobs deleted
+    """
+    with SessionLocal() as db:
+        result = db.execute(
+            delete(Job).where(
+                Job.status.in_(JOB_TERMINAL_STATUSES),
+                Job.finished_at < _utcnow() - timedelta(days=older_than_days)
+            )
+        )
+        db.commit()
+        return result.rowcount
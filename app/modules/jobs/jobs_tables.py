@@ -0,0 +1,39 @@
+from sqlalchemy import Column, DateTime, Index, Integer, JSON, String, Text
+from app.core.database import Base
+from .jobs_constants import JOB_STATUS_QUEUED
+
+class Job(Base):
+    """
+    Background job row
+
+    `lease_id` changes on every claim; a worker only writes back to a job
+    while it still holds the lease, so a job whose lease expired and was
+    claimed again (or was cancelled) ignores the stale worker.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(String(36), primary_key=True)
+    type = Column(String(64), nullable=False)
+    status = Column(String(16), nullable=False, default=JOB_STATUS_QUEUED)
+    payload = Column(JSON, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime, nullable=False)
+    locked_until = Column(DateTime, nullable=True)
+    lease_id = Column(String(36), nullable=True)
+    worker_id = Column(String(128), nullable=True)
+    trace_id = Column(String(36), nullable=True)
+    # Client key of the enqueuing request (see get_client_key), charged for the job's AI usage
+    client = Column(String(64), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Claim scans: queued jobs by run_at, running jobs by lease expiry
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+        Index("ix_jobs_status_locked_until", "status", "locked_until"),
+        Index("ix_jobs_finished_at", "finished_at"),
+    )
@@ -0,0 +1,219 @@
+import asyncio
+import os
+import socket
+import uuid
+from typing import Dict, Optional
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.deadline import deadline_scope
+from app.core.logger import setup_logging
+from app.core.tracing import get_tracer
+from .jobs_constants import AI_JOB_TYPE_PREFIX, JOB_STATUS_SUCCEEDED, JOB_STATUS_FAILED, ERROR_JOB_ATTEMPTS_EXHAUSTED
+from .jobs_service import (
+    ClaimedJob,
+    add_enqueue_listener,
+    remove_enqueue_listener,
+    claim_jobs,
+    complete_job,
+    extend_lease,
+    fail_job,
+    get_job_handler,
+    notify_job_changed,
+    release_job,
+    retry_delay
+)
+
+logger = setup_logging()
+tracer = get_tracer()
+
+class JobWorker:
+    """
+    Claim jobs from the queue and run them concurrently on the event loop
+
+    Up to `concurrency` jobs run at once. Each claim leases the job for
+    `lease_seconds` (the visibility timeout) and a heartbeat renews the
+    lease every third of that while the job runs, so a job is only picked
+    up again if its worker dies or stalls. A lost lease (reclaimed or
+    cancelled job) cancels the local run without writing anything back.
+    Failed attempts are retried with backoff while attempts remain. On
+    stop, running jobs get a grace period, then are cancelled and handed
+    back to the queue without counting the attempt.
+    """
+    def __init__(
+        self,
+        concurrency: int = 16,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 60.0,
+        job_timeout: float = 600.0,
+        worker_id: Optional[str] = None
+    ):
+        self.concurrency = max(concurrency, 1)
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.job_timeout = job_timeout
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def start(self):
+        """
+        Start claiming jobs on the running event loop
+        """
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._runner = asyncio.ensure_future(self._run())
+        logger.info(f"Job worker {self.worker_id} started with concurrency {self.concurrency}")
+
+    def wake(self):
+        """
+        Poll for jobs now instead of at the next interval, e.g. right after an enqueue
+        """
+        if self._wake is not None:
+            self._wake.set()
+
+    async def stop(self, grace: float = 30.0):
+        """
+        Stop claiming, wait up to `grace` seconds for running jobs, then requeue the rest
+        """
+        self._stopping = True
+        self.wake()
+        if self._runner is not None:
+            await self._runner
+            self._runner = None
+        if self._tasks:
+            logger.info(f"Job worker {self.worker_id} waiting for {len(self._tasks)} running jobs")
+            _, pending = await asyncio.wait(list(self._tasks.values()), timeout=grace)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        logger.info(f"Job worker {self.worker_id} stopped")
+
+    async def _run(self):
+        while not self._stopping:
+            self._wake.clear()
+            free = self.concurrency - len(self._tasks)
+            jobs = []
+            if free > 0:
+                try:
+                    jobs = await run_in_threadpool(claim_jobs, self.worker_id, free, self.lease_seconds)
+                except Exception as e:
+                    logger.error(f"Error claiming jobs: {e}")
+
+            for job in jobs:
+                task = asyncio.ensure_future(self._execute(job))
+                self._tasks[job.id] = task
+                task.add_done_callback(lambda _, job_id=job.id: self._finished(job_id))
+
+            # A full batch suggests more work is waiting
+            if jobs and len(jobs) == free:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _finished(self, job_id: str):
+        self._tasks.pop(job_id, None)
+        notify_job_changed(job_id)
+        self.wake()
+
+    async def _heartbeat(self, job: ClaimedJob, task: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                held = await run_in_threadpool(extend_lease, job, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"Error renewing lease of job {job.id}: {e}")
+                continue
+            if not held:
+                job.lease_lost = True
+                task.cancel()
+                return
+
+    async def _execute(self, job: ClaimedJob):
+        with tracer.start_as_current_span(
+            f"job.{job.type}",
+            attributes={
+                "job.id": job.id,
+                "job.type": job.type,
+                "job.attempt": job.attempts,
+                "job.enqueue_trace_id": job.trace_id or ""
+            }
+        ) as span:
+            if job.attempts > job.max_attempts:
+                # Every earlier lease expired mid-run; the job likely kills its worker
+                await run_in_threadpool(fail_job, job, ERROR_JOB_ATTEMPTS_EXHAUSTED, None)
+                span.set_attribute("job.status", JOB_STATUS_FAILED)
+                return
+
+            if job.type.startswith(AI_JOB_TYPE_PREFIX):
+                # Charge the job's tokens to the client that queued it; each job runs in its own task context
+                from app.modules.ai.ai_usage_service import bind_job_usage_source
+
+                bind_job_usage_source(job.type, job.client)
+
+            heartbeat = asyncio.ensure_future(self._heartbeat(job, asyncio.current_task()))
+            try:
+                result = await self._run_handler(job)
+            except asyncio.CancelledError:
+                if job.lease_lost:
+                    logger.info(f"Job {job.id} lost its lease, abandoned")
+                    span.set_attribute("job.status", "abandoned")
+                    return
+                await run_in_threadpool(release_job, job)
+                logger.info(f"Job {job.id} released on shutdown")
+                raise
+            except Exception as e:
+                span.record_exception(e)
+                error = getattr(e, "detail", None) or str(e) or type(e).__name__
+                status = await run_in_threadpool(fail_job, job, str(error), retry_delay(e, job.attempts))
+                span.set_attribute("job.status", status)
+                logger.warning(f"Job {job.id} attempt {job.attempts}/{job.max_attempts} failed ({status}): {error}")
+                return
+            finally:
+                heartbeat.cancel()
+
+            stored = await run_in_threadpool(complete_job, job, result)
+            span.set_attribute("job.status", JOB_STATUS_SUCCEEDED if stored else "abandoned")
+
+    async def _run_handler(self, job: ClaimedJob):
+        payload_model, handler = get_job_handler(job.type)
+        payload = payload_model.model_validate(job.payload)
+        # The deadline lets provider calls size their own timeouts, as they do for requests
+        with deadline_scope(self.job_timeout):
+            return await asyncio.wait_for(handler(payload), self.job_timeout)
+
+def create_job_worker() -> JobWorker:
+    """
+    Create a worker configured from settings
+    """
+    return JobWorker(
+        concurrency=settings.JOBS_WORKER_CONCURRENCY,
+        poll_interval=settings.JOBS_WORKER_POLL_INTERVAL_MS / 1000,
+        lease_seconds=settings.JOBS_LEASE_SECONDS,
+        job_timeout=settings.JOBS_TIMEOUT_SECONDS
+    )
+
+# The worker of this process, when it runs the worker role
+job_worker: Optional[JobWorker] = None
+
+def start_job_worker():
+    """
+    Start this process's worker on the running event loop
+    """
+    global job_worker
+    job_worker = create_job_worker()
+    job_worker.start()
+    add_enqueue_listener(job_worker.wake)
+
+async def stop_job_worker():
+    """
+    Stop this process's worker, requeueing jobs still running after JOBS_SHUTDOWN_GRACE_SECONDS
+    """
+    global job_worker
+    if job_worker is not None:
+        remove_enqueue_listener(job_worker.wake)
+        await job_worker.stop(settings.JOBS_SHUTDOWN_GRACE_SECONDS)
+        job_worker = None
@@ -0,0 +1,32 @@
+# S3 multipart constants
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+S3_MAX_PARTS = 10000
+S3_MAX_KEY_LENGTH = 1024
+# Longest expiry SigV4 allows for a presigned URL (7 days)
+S3_MAX_PRESIGNED_URL_EXPIRY = 604800
+
+# Streaming constants
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+LOCAL_WRITE_BUFFER_SIZE = 1024 * 1024
+LOCAL_TEMP_SUFFIX = ".part"
+
+# Presigned URL methods
+PRESIGN_METHOD_GET = "GET"
+PRESIGN_METHOD_PUT = "PUT"
+
+# Default content type for stored objects
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+# Error messages
+ERROR_STORAGE_NOT_CONFIGURED = "Storage is not configured"
+ERROR_INVALID_KEY = "Invalid object key"
+ERROR_OBJECT_NOT_FOUND = "Object not found"
+ERROR_OBJECT_TOO_LARGE = "Object exceeds the maximum multipart upload size"
+ERROR_UPLOAD_TOO_LARGE = "Upload exceeds the maximum allowed size"
+ERROR_UPLOAD_FAILED = "Upload to storage failed"
+ERROR_DOWNLOAD_FAILED = "Download from storage failed"
+
+# Success messages
+MSG_UPLOAD_OK = "Object uploaded successfully"
+MSG_DELETE_OK = "Object deleted successfully"
+MSG_PRESIGN_OK = "Presigned URL generated successfully"
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from .storage_service import (
+    is_s3_configured,
+    limit_stream,
+    upload_stream,
+    open_download_stream,
+    delete_object,
+    generate_presigned_url
+)
+from .storage_local_service import open_local_file, write_local_stream, delete_local_file
+from .storage_models import PresignedUrlRequest
+from .storage_constants import MSG_UPLOAD_OK, MSG_DELETE_OK, MSG_PRESIGN_OK
+from app.core.logger import setup_logging
+from app.core.response import ResponseModel
+from app.core.tracing import trace_request
+
+logger = setup_logging()
+router = APIRouter()
+
+@router.put("/objects/{key:path}")
+async def upload_object(key: str, request: Request, response: ResponseModel = Depends(trace_request)):
+    """
+    Stream the raw request body into S3, or local disk when S3 is not configured
+
+    Returns:
+        dict: Stored object metadata
+    """
+    logger.info(f"Upload requested for {key} - Trace ID: {response.trace_id}")
+    chunks = limit_stream(request.stream(), request.headers.get("content-length"))
+    content_type = request.headers.get("content-type")
+    if is_s3_configured():
+        stored = await upload_stream(key, chunks, content_type)
+    else:
+        stored = await write_local_stream(key, chunks, content_type)
+
+    return response.success_response(
+        data=stored.model_dump(),
+        message=MSG_UPLOAD_OK
+    )
+
+@router.api_route("/objects/{key:path}", methods=["GET", "HEAD"])
+async def download_object(key: str):
+    """
+    Stream an object back to the client without buffering it
+
+    Local files support Range requests and conditional GETs.
+    """
+    if not is_s3_configured():
+        return await open_local_file(key)
+
+    chunks, headers = await open_download_stream(key)
+    return StreamingResponse(chunks, headers=headers, media_type=headers["Content-Type"])
+
+@router.delete("/objects/{key:path}")
+async def remove_object(key: str, response: ResponseModel = Depends(trace_request)):
+    """
+    Delete an object
+
+    Returns:
+        dict: Deleted object key
+    """
+    if is_s3_configured():
+        await delete_object(key)
+    else:
+        await delete_local_file(key)
+    return response.success_response(
+        data={"key": key},
+        message=MSG_DELETE_OK
+    )
+
+@router.post("/presigned-urls")
+async def create_presigned_url(request: PresignedUrlRequest, response: ResponseModel = Depends(trace_request)):
+    """
+    Create a presigned URL so large transfers go directly to storage
+
+    Returns:
+        dict: Presigned URL information
+    """
+    presigned = generate_presigned_url(request)
+    return response.success_response(
+        data=presigned.model_dump(),
+        message=MSG_PRESIGN_OK
+    )
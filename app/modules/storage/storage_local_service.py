@@ -0,0 +1,311 @@
+import os
+import stat
+import uuid
+import mimetypes
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, Optional, Tuple
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from app.core.config import settings
+from app.core.logger import setup_logging
+from app.core.tracing import get_tracer, trace_function
+from .storage_constants import (
+    DOWNLOAD_CHUNK_SIZE,
+    LOCAL_WRITE_BUFFER_SIZE,
+    LOCAL_TEMP_SUFFIX,
+    DEFAULT_CONTENT_TYPE,
+    ERROR_INVALID_KEY,
+    ERROR_OBJECT_NOT_FOUND
+)
+from .storage_models import StoredObject
+from .storage_service import validate_object_key
+
+logger = setup_logging()
+tracer = get_tracer()
+
+def get_local_root() -> str:
+    """
+    Get the absolute root directory for local storage
+    """
+    return os.path.realpath(settings.STORAGE_LOCAL_PATH)
+
+def resolve_local_path(key: str) -> str:
+    """
+    Resolve an object key to a path inside the local storage root
+    """
+    key = validate_object_key(key)
+    root = get_local_root()
+    path = os.path.realpath(os.path.join(root, key))
+    if not path.startswith(root + os.sep) or path.endswith(LOCAL_TEMP_SUFFIX):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_INVALID_KEY
+        )
+
+    return path
+
+def make_etag(stat_result: os.stat_result) -> str:
+    """
+    Build an ETag from file modification time and size
+    """
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison, as required for If-None-Match
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag[2:] == etag if tag.startswith("W/") else tag == etag for tag in candidates)
+
+def _parse_http_date(value: str) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+def is_not_modified(request_headers: Headers, etag: str, mtime: float) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against the file validators
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is not None:
+        since = _parse_http_date(if_modified_since)
+        return since is not None and int(mtime) <= since
+
+    return False
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header into an inclusive (start, end) pair
+
+    Returns None when the header is absent, malformed or asks for several
+    ranges, in which case the whole file is served. Raises ValueError when
+    the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+
+    spec = header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+
+    start_text, end_text = (part.strip() for part in spec.split("-", 1))
+    if not (start_text or end_text):
+        return None
+    if any(part and not part.isdigit() for part in (start_text, end_text)):
+        return None
+
+    if not start_text:
+        length = int(end_text)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        if size == 0:
+            raise ValueError("suffix range of an empty file")
+        return max(size - length, 0), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size:
+        raise ValueError("range starts past end of file")
+    if start > end:
+        return None
+
+    return start, min(end, size - 1)
+
+class LocalFileResponse(Response):
+    """
+    File response with conditional GETs and single Range requests
+
+    The file is read in chunks with `os.pread` off the event loop, so bodies
+    pass through Python memory. Uvicorn offers neither `zerocopysend` nor
+    `pathsend`, and `zerocopysend` could not pass the app's `@app.middleware`
+    interceptor anyway; only a server offering `pathsend` gets whole-file
+    bodies sent from the path.
+    """
+    chunk_size = DOWNLOAD_CHUNK_SIZE
+
+    def __init__(self, path: str, stat_result: os.stat_result, media_type: Optional[str] = None):
+        self.path = path
+        self.stat_result = stat_result
+        self.status_code = status.HTTP_200_OK
+        self.media_type = media_type or mimetypes.guess_type(path)[0] or DEFAULT_CONTENT_TYPE
+        self.background = None
+        self.init_headers({
+            "accept-ranges": "bytes",
+            "content-length": str(stat_result.st_size),
+            "etag": make_etag(stat_result),
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True)
+        })
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        size = self.stat_result.st_size
+        etag = self.headers["etag"]
+
+        if is_not_modified(request_headers, etag, self.stat_result.st_mtime):
+            await send({
+                "type": "http.response.start",
+                "status": status.HTTP_304_NOT_MODIFIED,
+                "headers": [
+                    (b"etag", etag.encode("latin-1")),
+                    (b"last-modified", self.headers["last-modified"].encode("latin-1"))
+                ]
+            })
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        byte_range = None
+        if_range = request_headers.get("if-range")
+        if if_range is None or if_range == etag or if_range == self.headers["last-modified"]:
+            try:
+                byte_range = parse_range(request_headers.get("range"), size)
+            except ValueError:
+                await send({
+                    "type": "http.response.start",
+                    "status": status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                    "headers": [(b"content-range", f"bytes */{size}".encode("latin-1"))]
+                })
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+        offset, count = 0, size
+        status_code = self.status_code
+        if byte_range is not None:
+            start, end = byte_range
+            offset, count = start, end - start + 1
+            status_code = status.HTTP_206_PARTIAL_CONTENT
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(count)
+
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD" or count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        await self._send_file(scope, send, offset, count)
+
+    async def _send_file(self, scope: Scope, send: Send, offset: int, count: int) -> None:
+        extensions = scope.get("extensions") or {}
+        if "http.response.pathsend" in extensions and offset == 0 and count == self.stat_result.st_size:
+            await send({"type": "http.response.pathsend", "path": self.path})
+            return
+
+        fd = await run_in_threadpool(os.open, self.path, os.O_RDONLY)
+        try:
+            remaining = count
+            while remaining > 0:
+                chunk = await run_in_threadpool(os.pread, fd, min(self.chunk_size, remaining), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+
+            if remaining > 0:
+                # File shrank while streaming; terminate the body rather than hang
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
+
+def _stat_regular_file(path: str) -> os.stat_result:
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        stat_result = None
+
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_OBJECT_NOT_FOUND
+        )
+
+    return stat_result
+
+async def open_local_file(key: str) -> LocalFileResponse:
+    """
+    Build a file response for a locally stored object
+
+    Args:
+        key: Object key
+
+    Returns:
+        LocalFileResponse: Response streaming the file
+    """
+    path = resolve_local_path(key)
+    stat_result = await run_in_threadpool(_stat_regular_file, path)
+    return LocalFileResponse(path, stat_result)
+
+async def write_local_stream(
+    key: str,
+    chunks: AsyncIterator[bytes],
+    content_type: Optional[str] = None
+) -> StoredObject:
+    """
+    Stream an upload to local disk
+
+    The body is written in LOCAL_WRITE_BUFFER_SIZE chunks to a temporary file
+    next to the target, which is atomically renamed into place once complete.
+
+    Args:
+        key: Object key
+        chunks: Async iterator of body chunks
+        content_type: Content type of the object
+
+    Returns:
+        StoredObject: Stored object metadata
+    """
+    path = resolve_local_path(key)
+    temp_path = f"{path}.{uuid.uuid4().hex}{LOCAL_TEMP_SUFFIX}"
+
+    with tracer.start_as_current_span("storage.write_local_stream", attributes={"storage.key": key}) as span:
+        await run_in_threadpool(os.makedirs, os.path.dirname(path), exist_ok=True)
+        file = await run_in_threadpool(open, temp_path, "wb")
+        try:
+            buffer = bytearray()
+            async for chunk in chunks:
+                buffer += chunk
+                if len(buffer) >= LOCAL_WRITE_BUFFER_SIZE:
+                    await run_in_threadpool(file.write, buffer)
+                    buffer = bytearray()
+            if buffer:
+                await run_in_threadpool(file.write, buffer)
+            await run_in_threadpool(file.close)
+            await run_in_threadpool(os.replace, temp_path, path)
+        except BaseException:
+            file.close()
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        stat_result = await run_in_threadpool(os.stat, path)
+        span.set_attribute("storage.size", stat_result.st_size)
+
+    return StoredObject(
+        key=key,
+        size=stat_result.st_size,
+        etag=make_etag(stat_result),
+        content_type=content_type or mimetypes.guess_type(path)[0] or DEFAULT_CONTENT_TYPE
+    )
+
+@trace_function
+async def delete_local_file(key: str):
+    """
+    Delete a locally stored object
+    """
+    path = resolve_local_path(key)
+    try:
+        await run_in_threadpool(os.unlink, path)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_OBJECT_NOT_FOUND
+        )
@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from .storage_constants import S3_MAX_PRESIGNED_URL_EXPIRY
+
+class StoredObject(BaseModel):
+    """
+    Stored object metadata
+    """
+    key: str
+    size: int
+    etag: Optional[str] = None
+    content_type: Optional[str] = None
+
+class PresignedUrlRequest(BaseModel):
+    """
+    Presigned URL request model
+    """
+    key: str
+    method: str = "GET"
+    # Capped at S3_PRESIGNED_URL_EXPIRY when longer
+    expires_in: Optional[int] = Field(None, ge=1, le=S3_MAX_PRESIGNED_URL_EXPIRY)
+    content_type: Optional[str] = None
+
+class PresignedUrlResponse(BaseModel):
+    """
+    Presigned URL response model
+    """
+    url: str
+    key: str
+    method: str
+    expires_in: int
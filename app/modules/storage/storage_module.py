@@ -0,0 +1,7 @@
+from app.core.modules import ModuleSpec, RouterSpec
+
+module = ModuleSpec(
+    name="storage",
+    routers=[RouterSpec("app.modules.storage.storage_controller:router", prefix="/api/storage", tags=["Storage"])],
+    dependencies=["boto3"]
+)
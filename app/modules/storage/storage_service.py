@@ -0,0 +1,365 @@
+import asyncio
+import threading
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
+from app.core.body_limit import STATUS_BODY_TOO_LARGE
+from app.core.config import settings
+from app.core.logger import setup_logging
+from app.core.tracing import get_tracer, trace_function
+from .storage_constants import (
+    S3_MIN_PART_SIZE,
+    S3_MAX_PARTS,
+    S3_MAX_KEY_LENGTH,
+    DOWNLOAD_CHUNK_SIZE,
+    PRESIGN_METHOD_GET,
+    PRESIGN_METHOD_PUT,
+    DEFAULT_CONTENT_TYPE,
+    ERROR_STORAGE_NOT_CONFIGURED,
+    ERROR_INVALID_KEY,
+    ERROR_OBJECT_NOT_FOUND,
+    ERROR_OBJECT_TOO_LARGE,
+    ERROR_UPLOAD_TOO_LARGE,
+    ERROR_UPLOAD_FAILED,
+    ERROR_DOWNLOAD_FAILED
+)
+from .storage_models import StoredObject, PresignedUrlRequest, PresignedUrlResponse
+
+logger = setup_logging()
+tracer = get_tracer()
+
+_client_lock = threading.Lock()
+
+def is_s3_configured() -> bool:
+    """
+    Check whether S3 storage is configured
+    """
+    return bool(settings.S3_BUCKET_NAME)
+
+@lru_cache()
+def get_s3_session():
+    """
+    Get the shared boto3 session
+    """
+    return boto3.session.Session(
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_REGION
+    )
+
+@lru_cache()
+def _create_s3_client():
+    # boto3 sessions are not thread-safe, clients are
+    with _client_lock:
+        return get_s3_session().client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            config=Config(
+                max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                retries={"max_attempts": 3, "mode": "standard"}
+            )
+        )
+
+def get_s3_client():
+    """
+    Get the shared, connection-pooled S3 client
+    """
+    if not is_s3_configured():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=ERROR_STORAGE_NOT_CONFIGURED
+        )
+
+    return _create_s3_client()
+
+def reset_s3_client():
+    """
+    Drop the cached session and client, e.g. after swapping in a local S3 stand-in
+    """
+    _create_s3_client.cache_clear()
+    get_s3_session.cache_clear()
+
+def validate_object_key(key: str) -> str:
+    """
+    Validate an object key and return it normalized
+    """
+    key = key.strip()
+    if (
+        not key
+        or len(key) > S3_MAX_KEY_LENGTH
+        or key.startswith("/")
+        or "\\" in key
+        or any(part in ("", ".", "..") for part in key.split("/"))
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_INVALID_KEY
+        )
+
+    return key
+
+async def limit_stream(
+    chunks: AsyncIterator[bytes],
+    content_length: Optional[str] = None,
+    max_size: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """
+    Enforce the upload size cap while the body streams in
+
+    A declared Content-Length over the cap is rejected before any byte is read;
+    bodies without one (chunked transfer) are cut off as soon as they exceed it.
+
+    Args:
+        chunks: Async iterator of body chunks
+        content_length: Declared Content-Length header, if any
+        max_size: Maximum number of bytes, defaults to STORAGE_MAX_UPLOAD_SIZE
+
+    Yields:
+        bytes: Body chunks
+    """
+    max_size = max_size if max_size is not None else settings.STORAGE_MAX_UPLOAD_SIZE
+    too_large = HTTPException(
+        status_code=STATUS_BODY_TOO_LARGE,
+        detail=ERROR_UPLOAD_TOO_LARGE
+    )
+
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_size:
+        raise too_large
+
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > max_size:
+            raise too_large
+        yield chunk
+
+def _is_not_found(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+async def upload_stream(
+    key: str,
+    chunks: AsyncIterator[bytes],
+    content_type: Optional[str] = None
+) -> StoredObject:
+    """
+    Stream an upload to S3 using concurrent multipart parts
+
+    Only one part per upload slot is held in memory, so memory per upload is
+    bounded by (S3_MAX_CONCURRENCY + 1) * part size regardless of object size.
+    Objects smaller than one part are sent with a single PUT.
+
+    Args:
+        key: Object key
+        chunks: Async iterator of body chunks
+        content_type: Content type of the object
+
+    Returns:
+        StoredObject: Stored object metadata
+    """
+    key = validate_object_key(key)
+    client = get_s3_client()
+    bucket = settings.S3_BUCKET_NAME
+    content_type = content_type or DEFAULT_CONTENT_TYPE
+    part_size = max(settings.S3_MULTIPART_CHUNK_SIZE, S3_MIN_PART_SIZE)
+    slots = asyncio.Semaphore(max(settings.S3_MAX_CONCURRENCY, 1))
+
+    buffer = bytearray()
+    size = 0
+    upload_id: Optional[str] = None
+    tasks: List[asyncio.Future] = []
+
+    async def upload_part(part_number: int, body: bytes) -> Dict[str, Any]:
+        try:
+            response = await run_in_threadpool(
+                client.upload_part,
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        finally:
+            slots.release()
+
+    async def submit_part(body: bytes):
+        nonlocal upload_id
+        if upload_id is None:
+            response = await run_in_threadpool(
+                client.create_multipart_upload,
+                Bucket=bucket,
+                Key=key,
+                ContentType=content_type
+            )
+            upload_id = response["UploadId"]
+
+        if len(tasks) >= S3_MAX_PARTS:
+            raise HTTPException(
+                status_code=STATUS_BODY_TOO_LARGE,
+                detail=ERROR_OBJECT_TOO_LARGE
+            )
+
+        # Wait for a free slot before accepting more input (backpressure)
+        await slots.acquire()
+        for task in tasks:
+            if task.done() and task.exception():
+                slots.release()
+                raise task.exception()
+        tasks.append(asyncio.ensure_future(upload_part(len(tasks) + 1, body)))
+
+    with tracer.start_as_current_span(
+        "storage.upload_stream",
+        attributes={"storage.key": key, "storage.part_size": part_size}
+    ) as span:
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                buffer += chunk
+                while len(buffer) >= part_size:
+                    body = bytes(buffer[:part_size])
+                    del buffer[:part_size]
+                    await submit_part(body)
+
+            if upload_id is None:
+                response = await run_in_threadpool(
+                    client.put_object,
+                    Bucket=bucket,
+                    Key=key,
+                    Body=bytes(buffer),
+                    ContentType=content_type
+                )
+                etag = response.get("ETag")
+            else:
+                if buffer:
+                    await submit_part(bytes(buffer))
+                    buffer.clear()
+                parts = await asyncio.gather(*tasks)
+                response = await run_in_threadpool(
+                    client.complete_multipart_upload,
+                    Bucket=bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={"Parts": parts}
+                )
+                etag = response.get("ETag")
+
+            span.set_attribute("storage.size", size)
+            span.set_attribute("storage.parts", len(tasks))
+            return StoredObject(key=key, size=size, etag=etag, content_type=content_type)
+        except BaseException as e:
+            for task in tasks:
+                task.cancel()
+            if upload_id is not None:
+                try:
+                    await run_in_threadpool(
+                        client.abort_multipart_upload,
+                        Bucket=bucket,
+                        Key=key,
+                        UploadId=upload_id
+                    )
+                except Exception as abort_error:
+                    logger.error(f"Failed to abort multipart upload {upload_id}: {abort_error}")
+            if isinstance(e, HTTPException) or not isinstance(e, Exception):
+                raise
+            logger.error(f"S3 upload error: {e}")
+            span.record_exception(e)
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"{ERROR_UPLOAD_FAILED}: {str(e)}"
+            )
+
+async def _iterate_body(body) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in iterate_in_threadpool(body.iter_chunks(DOWNLOAD_CHUNK_SIZE)):
+            yield chunk
+    finally:
+        body.close()
+
+async def open_download_stream(key: str) -> Tuple[AsyncIterator[bytes], Dict[str, str]]:
+    """
+    Open a streaming download of an S3 object
+
+    Args:
+        key: Object key
+
+    Returns:
+        Tuple of an async chunk iterator and the response headers
+    """
+    key = validate_object_key(key)
+    client = get_s3_client()
+
+    with tracer.start_as_current_span("storage.open_download_stream", attributes={"storage.key": key}):
+        try:
+            response = await run_in_threadpool(
+                client.get_object,
+                Bucket=settings.S3_BUCKET_NAME,
+                Key=key
+            )
+        except ClientError as e:
+            if _is_not_found(e):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=ERROR_OBJECT_NOT_FOUND
+                )
+            logger.error(f"S3 download error: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"{ERROR_DOWNLOAD_FAILED}: {str(e)}"
+            )
+
+    headers = {
+        "Content-Length": str(response["ContentLength"]),
+        "Content-Type": response.get("ContentType") or DEFAULT_CONTENT_TYPE
+    }
+    if response.get("ETag"):
+        headers["ETag"] = response["ETag"]
+
+    return _iterate_body(response["Body"]), headers
+
+@trace_function
+async def delete_object(key: str):
+    """
+    Delete an S3 object
+    """
+    key = validate_object_key(key)
+    client = get_s3_client()
+    await run_in_threadpool(client.delete_object, Bucket=settings.S3_BUCKET_NAME, Key=key)
+
+@trace_function
+def generate_presigned_url(request: PresignedUrlRequest) -> PresignedUrlResponse:
+    """
+    Generate a presigned GET or PUT URL so clients can transfer directly with S3
+
+    Args:
+        request: Presigned URL request
+
+    Returns:
+        PresignedUrlResponse: Presigned URL
+    """
+    key = validate_object_key(request.key)
+    method = request.method.upper()
+    if method not in (PRESIGN_METHOD_GET, PRESIGN_METHOD_PUT):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported presign method: {request.method}"
+        )
+
+    client = get_s3_client()
+    expires_in = min(request.expires_in or settings.S3_PRESIGNED_URL_EXPIRY, settings.S3_PRESIGNED_URL_EXPIRY)
+    params = {"Bucket": settings.S3_BUCKET_NAME, "Key": key}
+    if method == PRESIGN_METHOD_PUT and request.content_type:
+        params["ContentType"] = request.content_type
+
+    url = client.generate_presigned_url(
+        "get_object" if method == PRESIGN_METHOD_GET else "put_object",
+        Params=params,
+        ExpiresIn=expires_in
+    )
+
+    return PresignedUrlResponse(url=url, key=key, method=method, expires_in=expires_in)
@@ -0,0 +1,5 @@
+"""
+Load-testing and latency-regression benchmarks for the API
+
+Run `python -m benchmarks --help` from the project root.
+"""
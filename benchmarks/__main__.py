@@ -0,0 +1,86 @@
+"""
+Command line entry point: python -m benchmarks
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from .baseline import build_report, save_report, load_report, find_regressions
+from .runner import run_benchmarks, configure_in_process_app
+from .scenarios import get_scenarios
+
+DEFAULT_BASELINE = "benchmarks/baselines/baseline.json"
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the API in-process over ASGI or against a running server"
+    )
+    parser.add_argument("--url", help="Base URL of a running server; defaults to the in-process app")
+    parser.add_argument("--scenario", action="append", dest="scenarios", help="Scenario to run (repeatable)")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight")
+    parser.add_argument("--alloc-requests", type=int, default=50, help="Requests traced with tracemalloc (0 disables)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Overwrite the baseline with these results")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression as a fraction")
+    parser.add_argument("--fake-ttft-ms", type=float, default=0.0, help="In-process fake AI time to first token")
+    parser.add_argument("--fake-tokens-per-second", type=float, default=0.0, help="In-process fake AI token rate (0 = instant)")
+    parser.add_argument(
+        "--with-ai",
+        action="store_true",
+        help="Run AI scenarios against --url too; the server must set AI_FAKE_PROVIDER"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    scenarios = get_scenarios(args.scenarios)
+
+    if args.url is None:
+        configure_in_process_app(args.fake_ttft_ms, args.fake_tokens_per_second)
+    elif not args.with_ai:
+        # fake-* models are only served when the remote server enables the fake provider
+        scenarios = [scenario for scenario in scenarios if not scenario.requires_fake_ai]
+
+    results = asyncio.run(run_benchmarks(
+        scenarios,
+        url=args.url,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        alloc_requests=args.alloc_requests
+    ))
+    report = build_report(results, {
+        "mode": "remote" if args.url else "in-process",
+        "requests": args.requests,
+        "concurrency": args.concurrency
+    })
+
+    print(json.dumps(report["scenarios"], indent=2, sort_keys=True))
+    if args.output:
+        save_report(report, args.output)
+
+    if args.save_baseline:
+        save_report(report, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = load_report(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    regressions = find_regressions(report, baseline, args.tolerance)
+    if regressions:
+        print(f"Regressions beyond {args.tolerance:.0%} tolerance:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        return 1
+
+    print(f"No regressions beyond {args.tolerance:.0%} tolerance")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
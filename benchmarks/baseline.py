@@ -0,0 +1,85 @@
+"""
+JSON baselines and regression checks for benchmark results
+"""
+import json
+import os
+import platform
+import time
+from typing import Any, Dict, List, Optional
+
+# Metric name -> True when higher is better
+COMPARED_METRICS = {
+    "throughput_rps": True,
+    "latency_p50_ms": False,
+    "latency_p95_ms": False,
+    "latency_p99_ms": False,
+    "alloc_peak_bytes_per_request": False
+}
+
+def build_report(results: Dict[str, Dict[str, Any]], options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Wrap scenario results with information about the run
+    """
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **options
+        },
+        "scenarios": results
+    }
+
+def save_report(report: Dict[str, Any], path: str):
+    """
+    Write a report to disk as JSON
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+
+def load_report(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a report from disk, or None if it does not exist
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+def find_regressions(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float
+) -> List[str]:
+    """
+    Compare a report against a baseline
+
+    A metric regresses when it is worse than the baseline by more than
+    `tolerance` (a fraction, e.g. 0.2 for 20%). Scenarios or metrics missing
+    from either side are ignored.
+
+    Returns:
+        list: Human readable regression descriptions
+    """
+    regressions: List[str] = []
+
+    for name, result in current.get("scenarios", {}).items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if not reference:
+            continue
+
+        if result.get("errors") and not reference.get("errors"):
+            regressions.append(f"{name}: {result['errors']} failed requests")
+
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = reference.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append(f"{name}: {metric} {old} -> {new} ({change:+.1%})")
+
+    return regressions
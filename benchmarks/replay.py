@@ -0,0 +1,165 @@
+"""
+Replay captured traffic: python -m benchmarks.replay captures/ [--speed 2]
+
+Sends requests recorded by TRAFFIC_CAPTURE_ENABLED to the in-process app
+(every model served by the fake AI provider) or a running server, keeping
+their original inter-arrival times scaled by --speed, and reports latency
+percentiles overall and per route.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .runner import create_client, percentile, serve_in_process, summarize_latencies
+
+# Set by the client or transport for the replayed request
+SKIPPED_HEADERS = {"host", "content-length", "transfer-encoding", "connection"}
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.replay", description=__doc__)
+    parser.add_argument("captures", nargs="+", help="Capture files or directories of them")
+    parser.add_argument("--url", help="Base URL of a running server; defaults to the in-process app")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Replay N times faster than captured (0 = send as fast as --concurrency allows)"
+    )
+    parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight with --speed 0")
+    parser.add_argument("--limit", type=int, help="Replay at most this many requests")
+    parser.add_argument("--fake-ttft-ms", type=float, default=0.0, help="In-process fake AI time to first token")
+    parser.add_argument("--fake-tokens-per-second", type=float, default=0.0, help="In-process fake AI token rate (0 = instant)")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    return parser.parse_args(argv)
+
+def configure_replay_app(ttft_ms: float, tokens_per_second: float):
+    """
+    In-process app settings for replay; call before `app` is imported
+    """
+    from .runner import configure_in_process_app
+
+    # Captured traffic names real models, so fake them all, and don't capture the replay
+    os.environ["TRAFFIC_CAPTURE_ENABLED"] = "False"
+    configure_in_process_app(ttft_ms, tokens_per_second)
+
+    from app.core.config import settings
+    from app.modules.ai.ai_constants import FAKE_PROVIDER_ALL
+
+    settings.AI_FAKE_PROVIDER = FAKE_PROVIDER_ALL
+
+def load_records(paths: List[str], limit: Optional[int]) -> List[Dict[str, Any]]:
+    """
+    Captured requests ordered by arrival, across every capturing process
+    """
+    from app.core.traffic_capture import read_captures
+
+    records = sorted(read_captures(paths), key=lambda record: record["timestamp"])
+    return records[:limit] if limit else records
+
+def route_label(record: Dict[str, Any]) -> str:
+    return f"{record['method']} {record['path']}"
+
+async def replay_one(client: httpx.AsyncClient, record: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    headers = [(name, value) for name, value in record["headers"] if name.lower() not in SKIPPED_HEADERS]
+    url = record["path"] + (f"?{record['query']}" if record["query"] else "")
+    begin = time.perf_counter()
+    status = None
+    size = 0
+    try:
+        async with client.stream(record["method"], url, headers=headers, content=body) as response:
+            status = response.status_code
+            async for chunk in response.aiter_raw():
+                size += len(chunk)
+    except httpx.HTTPError:
+        pass
+    return {"route": route_label(record), "latency": time.perf_counter() - begin, "status": status, "bytes": size}
+
+async def replay(records: List[Dict[str, Any]], url: Optional[str], speed: float, concurrency: int) -> Dict[str, Any]:
+    """
+    Send every record at its captured offset divided by `speed` and collect the results
+
+    Requests are not held back by earlier ones still running, as with real
+    clients. `schedule_lag` is how late requests went out: a large value
+    means the replay itself could not keep up, not that the app was slow.
+    """
+    from app.core.traffic_capture import decode_body
+
+    results = []
+    lags = []
+    skipped = 0
+    semaphore = asyncio.Semaphore(max(concurrency, 1)) if speed <= 0 else None
+
+    async def send(record: Dict[str, Any], body: bytes):
+        if semaphore is None:
+            results.append(await replay_one(client, record, body))
+            return
+        async with semaphore:
+            results.append(await replay_one(client, record, body))
+
+    async with serve_in_process(url), create_client(url, timeout=120.0) as client:
+        tasks = []
+        first = records[0]["timestamp"] if records else 0.0
+        begin = time.perf_counter()
+        for record in records:
+            body = decode_body(record)
+            if body is None:
+                # Too large to capture, so there is nothing faithful to send
+                skipped += 1
+                continue
+            if speed > 0:
+                due = (record["timestamp"] - first) / speed
+                delay = due - (time.perf_counter() - begin)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                lags.append(max(-delay, 0.0))
+            tasks.append(asyncio.ensure_future(send(record, body)))
+        await asyncio.gather(*tasks)
+        wall_time = time.perf_counter() - begin
+
+    lags.sort()
+    by_route: Dict[str, List[float]] = defaultdict(list)
+    for result in results:
+        by_route[result["route"]].append(result["latency"])
+    return {
+        "overall": {
+            **summarize_latencies([result["latency"] for result in results], wall_time),
+            "errors": sum(1 for result in results if result["status"] is None or result["status"] >= 500),
+            "statuses": dict(Counter(str(result["status"]) for result in results)),
+            "response_bytes": sum(result["bytes"] for result in results),
+            "skipped_large_bodies": skipped,
+            "schedule_lag_p99_ms": round(percentile(lags, 0.99) * 1000, 3),
+            "captured_span_seconds": round(records[-1]["timestamp"] - first, 3) if records else 0.0
+        },
+        "routes": {
+            route: summarize_latencies(latencies, wall_time)
+            for route, latencies in sorted(by_route.items())
+        }
+    }
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.url is None:
+        configure_replay_app(args.fake_ttft_ms, args.fake_tokens_per_second)
+
+    records = load_records(args.captures, args.limit)
+    if not records:
+        print("No captured requests found")
+        return 1
+    print(f"Replaying {len(records)} requests at {'max rate' if args.speed <= 0 else f'{args.speed:g}x'}")
+
+    report = asyncio.run(replay(records, args.url, args.speed, args.concurrency))
+    report["options"] = {"speed": args.speed, "mode": "remote" if args.url else "in-process"}
+    print(json.dumps(report, indent=2, sort_keys=True))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
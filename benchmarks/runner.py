@@ -0,0 +1,197 @@
+"""
+Benchmark runner: drives scenarios through an httpx client and collects stats
+"""
+import asyncio
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+from .scenarios import Scenario
+
+# httpx logs every request at INFO, which would put a log line on stdout and
+# in logs/app.log per benchmark request and skew the measurements
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted sequence
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def summarize_latencies(latencies: Sequence[float], wall_time: float) -> Dict[str, float]:
+    """
+    Summarize request latencies (seconds) into throughput and percentiles (ms)
+    """
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "throughput_rps": round(len(ordered) / wall_time, 2) if wall_time > 0 else 0.0,
+        "latency_mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "latency_p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "latency_p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "latency_p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "latency_max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0
+    }
+
+def configure_in_process_app(ttft_ms: float = 0.0, tokens_per_second: float = 0.0):
+    """
+    Prepare settings for the in-process app; call before `app` is imported
+
+    Serves the fake-* models from the fake AI provider and turns off the
+    per-client rate limit, which a single benchmark client would trip.
+    Concurrency limits stay on.
+    """
+    # Importing anything under `app` builds the app and its rate limiter,
+    # so the limit has to be switched off through the environment first
+    os.environ["RATE_LIMIT_PER_SECOND"] = "0"
+    # Serve only: no scheduler, and no warm-up calls to the real providers
+    os.environ["PROCESS_ROLES"] = '["api"]'
+    os.environ["WARMUP_PROVIDERS"] = "False"
+
+    from app.core.config import settings
+    from app.modules.ai.ai_constants import FAKE_PROVIDER_MODELS
+
+    settings.AI_FAKE_PROVIDER = FAKE_PROVIDER_MODELS
+    settings.AI_FAKE_TTFT_MS = ttft_ms
+    settings.AI_FAKE_TOKENS_PER_SECOND = tokens_per_second
+    settings.AI_FAKE_ERROR_RATE = 0.0
+    settings.AI_FAKE_RATE_LIMIT_RATE = 0.0
+
+def create_client(url: Optional[str] = None, timeout: float = 30.0) -> httpx.AsyncClient:
+    """
+    Create a client for a running server, or for the in-process app over ASGI
+    """
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=timeout)
+
+    from app import app
+
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=timeout)
+
+@asynccontextmanager
+async def serve_in_process(url: Optional[str] = None):
+    """
+    Run the in-process app's lifespan and wait for warm-up, as a server would before taking traffic
+    """
+    if url:
+        yield
+        return
+
+    from app import app
+    from app.core.warmup import wait_for_warmup
+
+    async with app.router.lifespan_context(app):
+        await wait_for_warmup()
+        yield
+
+async def _send(client: httpx.AsyncClient, scenario: Scenario) -> httpx.Response:
+    return await client.request(scenario.method, scenario.path, json=scenario.json)
+
+async def measure_latency(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    warmup: int = 10
+) -> Dict[str, Any]:
+    """
+    Fire `requests` requests with up to `concurrency` in flight
+
+    Returns:
+        dict: Throughput, latency percentiles and error count
+    """
+    for _ in range(warmup):
+        await _send(client, scenario)
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await _send(client, scenario)
+                ok = response.status_code == scenario.expected_status
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(min(concurrency, requests), 1))))
+    wall_time = time.perf_counter() - started
+
+    stats = summarize_latencies(latencies, wall_time)
+    stats["errors"] = errors
+    return stats
+
+async def measure_allocations(client: httpx.AsyncClient, scenario: Scenario, requests: int) -> Dict[str, float]:
+    """
+    Measure memory allocated per request with tracemalloc
+
+    Requests are sent sequentially so each peak belongs to one request. The
+    figures include the in-process httpx client, which is constant across runs.
+
+    Returns:
+        dict: Mean peak and retained bytes per request
+    """
+    await _send(client, scenario)
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+
+    peaks: List[int] = []
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        for _ in range(requests):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await _send(client, scenario)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    return {
+        "alloc_peak_bytes_per_request": round(sum(peaks) / len(peaks), 1) if peaks else 0.0,
+        "retained_bytes_per_request": round(max(retained - baseline, 0) / requests, 1) if requests else 0.0
+    }
+
+async def run_benchmarks(
+    scenarios: Sequence[Scenario],
+    url: Optional[str] = None,
+    requests: int = 500,
+    concurrency: int = 20,
+    alloc_requests: int = 50
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run every scenario and return results keyed by scenario name
+
+    Allocation tracking only makes sense in-process and is skipped for `url`.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+
+    async with serve_in_process(url), create_client(url) as client:
+        for scenario in scenarios:
+            result = await measure_latency(client, scenario, requests, concurrency)
+            if url is None and alloc_requests > 0:
+                result.update(await measure_allocations(client, scenario, alloc_requests))
+            results[scenario.name] = result
+
+    return results
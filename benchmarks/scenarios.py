@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+@dataclass
+class Scenario:
+    """
+    A single benchmarked request
+    """
+    name: str
+    method: str
+    path: str
+    json: Optional[Dict[str, Any]] = None
+    expected_status: int = 200
+    requires_fake_ai: bool = False
+
+CHAT_MESSAGES = [
+    {"role": "system", "content": "You are a helpful assistant."},
+    {"role": "user", "content": "Summarise the benefits of connection pooling."},
+    {"role": "assistant", "content": "Pooling reuses established connections to avoid handshake costs."},
+    {"role": "user", "content": "And the drawbacks?"}
+]
+
+def chat_history(turns: int) -> List[Dict[str, str]]:
+    """
+    A long alternating chat history ending with a user turn
+    """
+    messages = [{"role": "system", "content": "You are a helpful assistant."}]
+    for turn in range(1, turns):
+        role = "user" if turn % 2 else "assistant"
+        messages.append({"role": role, "content": f"Turn {turn}: what else should we consider about pooling connections?"})
+    if messages[-1]["role"] != "user":
+        messages.append({"role": "user", "content": "And the drawbacks?"})
+    return messages
+
+SCENARIOS: List[Scenario] = [
+    Scenario(name="root", method="GET", path="/"),
+    Scenario(name="health", method="GET", path="/api/health/"),
+    Scenario(name="health_readiness", method="GET", path="/api/health/readiness"),
+    Scenario(name="health_liveness", method="GET", path="/api/health/liveness"),
+    Scenario(
+        name="ai_completion",
+        method="POST",
+        path="/api/ai/completions",
+        json={"text": "Write a haiku about latency.", "model": "fake-openai", "max_tokens": 64},
+        requires_fake_ai=True
+    ),
+    Scenario(
+        name="ai_chat",
+        method="POST",
+        path="/api/ai/chat",
+        json={"messages": CHAT_MESSAGES, "model": "fake-openai", "max_tokens": 64},
+        requires_fake_ai=True
+    ),
+    Scenario(
+        name="ai_chat_1k_messages",
+        method="POST",
+        path="/api/ai/chat",
+        json={"messages": chat_history(1000), "model": "fake-openai", "max_tokens": 64},
+        requires_fake_ai=True
+    ),
+    Scenario(
+        name="ai_chat_10k_messages",
+        method="POST",
+        path="/api/ai/chat",
+        json={"messages": chat_history(10000), "model": "fake-openai", "max_tokens": 64},
+        requires_fake_ai=True
+    ),
+    Scenario(
+        name="ai_chat_stream",
+        method="POST",
+        path="/api/ai/chat/stream",
+        json={"messages": CHAT_MESSAGES, "model": "fake-gemini", "max_tokens": 64},
+        requires_fake_ai=True
+    )
+]
+
+def get_scenarios(names: Optional[List[str]] = None) -> List[Scenario]:
+    """
+    Select scenarios by name, or all of them
+    """
+    if not names:
+        return list(SCENARIOS)
+
+    by_name = {scenario.name: scenario for scenario in SCENARIOS}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(unknown)}")
+
+    return [by_name[name] for name in names]
@@ -1,6 +1,26 @@
-from core.config import settings
-import uvicorn
+import argparse
+import asyncio
+import json
+import os
 
-if __name__ == "__main__":  # Protect the main entry point
+def run_api():
+    import uvicorn
+    from app.core.config import settings
     uvicorn.run("app:app", host="0.0.0.0", port=settings.PORT, reload=True if settings.ENV != "production" else False,
         workers=1,)
+
+def run_background():
+    from app.core.lifespan import run_background_process
+    asyncio.run(run_background_process())
+
+if __name__ == "__main__":  # Protect the main entry point
+    parser = argparse.ArgumentParser(description="Run the API server, a background job worker or the scheduler")
+    parser.add_argument("--role", choices=["api", "worker", "scheduler"], default="api")
+    args = parser.parse_args()
+
+    if args.role == "api":
+        run_api()
+    else:
+        # Settings are read on import, so the role must be set before loading the app
+        os.environ["PROCESS_ROLES"] = json.dumps([args.role])
+        run_background()